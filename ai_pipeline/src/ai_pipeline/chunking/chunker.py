@@ -3,29 +3,87 @@ Basic transcript chunking service.
 Fallback when YouTube chapters are not available.
 """
 
+import re
+import numpy as np
+from ai_pipeline.tokens import DEFAULT_SECTION_TOKEN_BUDGET, count_tokens_batch
+from ai_pipeline.transcript import Transcript
+
+SENTENCE_END = (".", "?", "!", "。", "？", "！", "।")
+
 def chunk_by_time(transcript, chunk_minutes=2):
     """
     Split transcript into ~2 minute chunks.
+    Returns a list of Transcript views (no segment copies).
     """
 
+    transcript = Transcript.coerce(transcript)
     if not transcript:
         return []
 
     chunks = []
-    current_chunk = []
-    chunk_start = transcript[0]["start"]
     max_duration = chunk_minutes * 60
+    chunk_first = 0
+    chunk_start = transcript.starts[0]
+
+    for i, (start, end) in enumerate(zip(transcript.starts.tolist(), transcript.ends.tolist())):
+        if i > chunk_first and end - chunk_start > max_duration:
+            chunks.append(transcript[chunk_first:i])
+            chunk_first = i
+            chunk_start = start
+
+    chunks.append(transcript[chunk_first:])
+
+    return chunks
+
+def chunk_by_tokens(transcript, max_tokens=DEFAULT_SECTION_TOKEN_BUDGET, min_fill=0.6, pause_sec=1.5):
+    """
+    Pack segments into chunks of at most `max_tokens` tokens.
+
+    When a chunk is full it is cut at the last sentence end or pause
+    (gap >= pause_sec) that keeps it at least `min_fill` full, so chunks
+    don't split mid-sentence. A single segment above the budget becomes
+    its own chunk. Returns a list of Transcript views.
+    """
+
+    transcript = Transcript.coerce(transcript)
+    n = len(transcript)
+    if not n:
+        return []
+
+    texts = transcript.texts()
+    # +1 per segment for the joining space
+    cum_tokens = np.cumsum(count_tokens_batch(texts) + 1)
 
-    for segment in transcript:
-        if segment["end"] - chunk_start <= max_duration:
-            current_chunk.append(segment)
-        else:
-            chunks.append(current_chunk)
-            current_chunk = [segment]
-            chunk_start = segment["start"]
+    gaps = np.empty(n)
+    gaps[:-1] = transcript.starts[1:] - transcript.ends[:-1]
+    gaps[-1] = np.inf
+    is_boundary = (gaps >= pause_sec) | np.fromiter(
+        (t.rstrip().endswith(SENTENCE_END) for t in texts), dtype=bool, count=n
+    )
 
-    if current_chunk:
-        chunks.append(current_chunk)
+    chunks = []
+    first = 0
+    min_tokens = max_tokens * min_fill
+
+    while first < n:
+        base = cum_tokens[first - 1] if first else 0
+        # Last segment index that still fits in the budget
+        last = int(np.searchsorted(cum_tokens, base + max_tokens, side="right")) - 1
+        if last >= n - 1:
+            chunks.append(transcript[first:])
+            break
+        if last < first:
+            last = first
+
+        # Prefer a natural break that keeps the chunk reasonably full
+        lo = max(first, int(np.searchsorted(cum_tokens, base + min_tokens, side="left")))
+        if lo <= last:
+            candidates = np.flatnonzero(is_boundary[lo:last + 1])
+            if len(candidates):
+                last = lo + int(candidates[-1])
+
+        chunks.append(transcript[first:last + 1])
+        first = last + 1
 
     return chunks
 
@@ -34,25 +92,63 @@ def merge_chunk_text(chunk):
     Merge transcript segments into one section.
     """
 
-    full_text = " ".join(seg["text"] for seg in chunk)
+    chunk = Transcript.coerce(chunk)
 
     return {
-        "start": chunk[0]["start"],
-        "end": chunk[-1]["end"],
-        "text": full_text,
+        "start": chunk.start,
+        "end": chunk.end,
+        "text": chunk.joined_text(),
         "source": "ai_chunking"
     }
 
-def create_sections(transcript):
+def create_sections(transcript, max_tokens=DEFAULT_SECTION_TOKEN_BUDGET):
     """
     Create fallback sections when YouTube chapters don't exist.
+    Sections are packed up to the notes prompt's token budget.
     """
 
-    time_chunks = chunk_by_time(transcript)
+    token_chunks = chunk_by_tokens(transcript, max_tokens=max_tokens)
 
     sections = []
-    for chunk in time_chunks:
+    for chunk in token_chunks:
         merged = merge_chunk_text(chunk)
         sections.append(merged)
 
     return sections
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?।。？！])\s+")
+
+def split_text_by_tokens(text, max_tokens=DEFAULT_SECTION_TOKEN_BUDGET):
+    """
+    Split plain text into pieces of at most ~max_tokens tokens,
+    breaking between sentences (or between words for run-on text).
+    """
+    if not text:
+        return []
+
+    sentences = []
+    for sentence in SENTENCE_SPLIT_RE.split(text.strip()):
+        if count_tokens_batch([sentence])[0] <= max_tokens:
+            sentences.append(sentence)
+            continue
+        # Run-on sentence (unpunctuated auto-captions): split on words
+        words = sentence.split()
+        step = max(1, len(words) * max_tokens // int(count_tokens_batch([sentence])[0]))
+        sentences.extend(" ".join(words[i:i + step]) for i in range(0, len(words), step))
+
+    tokens = count_tokens_batch(sentences) + 1
+    pieces = []
+    current = []
+    current_tokens = 0
+    for sentence, n in zip(sentences, tokens.tolist()):
+        if current and current_tokens + n > max_tokens:
+            pieces.append(" ".join(current))
+            current = []
+            current_tokens = 0
+        current.append(sentence)
+        current_tokens += n
+
+    if current:
+        pieces.append(" ".join(current))
+
+    return pieces
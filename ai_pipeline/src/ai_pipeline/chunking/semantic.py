@@ -0,0 +1,125 @@
+"""
+Embedding-based topic segmentation.
+Used instead of plain token chunking when a video has no chapters.
+
+1. Group the transcript into small windows (~a few sentences each)
+2. Batch-encode all windows with a sentence-transformer (`encode` callable)
+3. Compare the mean embedding of the k windows before and after every gap
+   (vectorized cosine similarity)
+4. Cut at similarity valleys, respecting min/max section size in tokens
+
+The model is passed in so ai_pipeline stays free of torch/sentence-transformers.
+"""
+
+import bisect
+import numpy as np
+from ai_pipeline.chunking.chunker import chunk_by_tokens, merge_chunk_text
+from ai_pipeline.tokens import DEFAULT_SECTION_TOKEN_BUDGET, count_tokens_batch
+from ai_pipeline.transcript import Transcript
+
+def gap_similarities(embeddings, block: int = 3):
+    """
+    Cosine similarity between the mean of the `block` windows left of each
+    gap and the `block` windows right of it. Returns len(embeddings) - 1 values.
+    """
+    n = len(embeddings)
+    if n < 2:
+        return np.zeros(0)
+
+    embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    cum = np.vstack([np.zeros((1, embeddings.shape[1])), np.cumsum(embeddings, axis=0)])
+
+    gaps = np.arange(1, n)
+    left_lo = np.maximum(gaps - block, 0)
+    right_hi = np.minimum(gaps + block, n)
+    left = cum[gaps] - cum[left_lo]
+    right = cum[right_hi] - cum[gaps]
+
+    dot = np.einsum("ij,ij->i", left, right)
+    norms = np.linalg.norm(left, axis=1) * np.linalg.norm(right, axis=1)
+    return dot / np.maximum(norms, 1e-12)
+
+def find_boundaries(similarities, window_tokens, min_tokens: int, max_tokens: int, depth: float = 0.5):
+    """
+    Pick gap indices to cut at (gap g sits between window g and g + 1).
+
+    1. Valleys (similarity `depth` std below the mean) are accepted from the
+       deepest up, as long as every section stays >= min_tokens.
+    2. Sections still above max_tokens are split recursively at their
+       lowest-similarity gap that keeps both halves >= min_tokens.
+    """
+    n_gaps = len(similarities)
+    if n_gaps == 0:
+        return []
+
+    # cum[i] = tokens before window i
+    cum = np.concatenate([[0], np.cumsum(window_tokens)])
+    threshold = similarities.mean() - depth * similarities.std()
+
+    cuts = []
+    for g in np.argsort(similarities, kind="stable").tolist():
+        if similarities[g] > threshold:
+            break
+        i = bisect.bisect_left(cuts, g)
+        left = cum[cuts[i - 1] + 1] if i else 0
+        right = cum[cuts[i] + 1] if i < len(cuts) else cum[-1]
+        if cum[g + 1] - left >= min_tokens and right - cum[g + 1] >= min_tokens:
+            cuts.insert(i, g)
+
+    def split(a: int, b: int):
+        # Section = windows a..b inclusive
+        if a >= b or cum[b + 1] - cum[a] <= max_tokens:
+            return []
+        gaps = np.arange(a, b)
+        left = cum[gaps + 1] - cum[a]
+        right = cum[b + 1] - cum[gaps + 1]
+        admissible = gaps[(left >= min_tokens) & (right >= min_tokens)]
+        if not len(admissible):
+            admissible = gaps
+        g = int(admissible[np.argmin(similarities[admissible])])
+        return split(a, g) + [g] + split(g + 1, b)
+
+    boundaries = []
+    first = 0
+    for g in cuts + [n_gaps]:
+        boundaries.extend(split(first, g))
+        if g < n_gaps:
+            boundaries.append(g)
+        first = g + 1
+
+    return boundaries
+
+def semantic_sections(
+    transcript,
+    encode,
+    window_tokens: int = 80,
+    min_tokens: int = DEFAULT_SECTION_TOKEN_BUDGET // 3,
+    max_tokens: int = DEFAULT_SECTION_TOKEN_BUDGET,
+    block: int = 3,
+):
+    """
+    Split a chapterless transcript into topic-coherent sections.
+    `encode(list[str]) -> np.ndarray` embeds a batch of texts.
+    """
+    transcript = Transcript.coerce(transcript)
+    windows = chunk_by_tokens(transcript, max_tokens=window_tokens)
+    if len(windows) <= 1:
+        return [merge_chunk_text(w) | {"source": "semantic_chunking"} for w in windows]
+
+    texts = [w.joined_text() for w in windows]
+    embeddings = np.asarray(encode(texts), dtype=np.float32)
+    similarities = gap_similarities(embeddings, block=block)
+    boundaries = find_boundaries(similarities, count_tokens_batch(texts) + 1, min_tokens, max_tokens)
+
+    # Window boundaries -> segment boundaries
+    window_first = np.cumsum([0] + [len(w) for w in windows])
+    sections = []
+    first_window = 0
+    for cut in boundaries + [len(windows) - 1]:
+        lo = int(window_first[first_window])
+        hi = int(window_first[cut + 1])
+        if hi > lo:
+            sections.append(merge_chunk_text(transcript[lo:hi]) | {"source": "semantic_chunking"})
+        first_window = cut + 1
+
+    return sections
@@ -0,0 +1,117 @@
+"""
+Transcript normalization.
+
+Auto-generated captions (YouTube ASR, JSON3 auto-subs) are noisy:
+- rolling captions repeat the tail of the previous line at the start of the next
+- lines are split into tiny 1-3 word fragments
+- filler tokens and non-speech tags ([Music], "um", "uh", ">>") are kept verbatim
+
+This stage cleans that up before sectioning so the text sent to the LLM
+is shorter and denser. Timestamps are preserved: a merged segment starts
+at its first fragment and ends at its last one.
+"""
+
+import re
+from ai_pipeline.transcript import Transcript
+
+NON_SPEECH_RE = re.compile(r"\[[^\]]{0,40}\]|\([^)]{0,20}(?:music|applause|laughter|inaudible)[^)]{0,20}\)|>>|&gt;&gt;", re.IGNORECASE)
+FILLER_RE = re.compile(r"(?<![\w'])(?:u+m+|u+h+m*|e+r+m+|h+m+|a+h+)(?![\w'])[,.]?", re.IGNORECASE)
+SPACES_RE = re.compile(r"\s+")
+WORD_KEY_RE = re.compile(r"[^\w']+")
+SENTENCE_END = (".", "?", "!", "。", "？", "！", "।")
+
+def strip_fillers(text: str) -> str:
+    """
+    Remove non-speech tags and filler tokens, collapse whitespace.
+    """
+    text = NON_SPEECH_RE.sub(" ", text)
+    text = FILLER_RE.sub(" ", text)
+    return SPACES_RE.sub(" ", text).strip()
+
+def _word_keys(words):
+    return [WORD_KEY_RE.sub("", w).lower() for w in words]
+
+def remove_rolling_overlap(prev_words: list, words: list, max_overlap: int = 20, min_overlap: int = 2) -> list:
+    """
+    Drop the prefix of `words` that repeats the suffix of `prev_words`.
+    Single-word overlaps are only removed when the whole line is a repeat,
+    so legitimate repetitions ("the the") are not eaten.
+    """
+    if not prev_words or not words:
+        return words
+
+    prev_keys = _word_keys(prev_words[-max_overlap:])
+    keys = _word_keys(words[:max_overlap])
+
+    for n in range(min(len(prev_keys), len(keys)), 0, -1):
+        if n < min_overlap and n != len(words):
+            break
+        if prev_keys[-n:] == keys[:n]:
+            return words[n:]
+
+    return words
+
+def normalize_transcript(
+    transcript,
+    min_chars: int = 60,
+    max_chars: int = 400,
+    max_duration: float = 20.0,
+    max_gap: float = 2.0,
+):
+    """
+    Clean a transcript and merge fragments into sentence-level segments.
+
+    - strips fillers / non-speech tags
+    - removes rolling duplicate text between consecutive captions
+    - merges fragments until a sentence end (once `min_chars` is reached),
+      `max_chars`, `max_duration` or a pause longer than `max_gap`
+
+    Returns a new Transcript.
+    """
+    transcript = Transcript.coerce(transcript)
+
+    texts, starts, ends = [], [], []
+    cur_words = []
+    cur_len = 0
+    cur_start = cur_end = None
+    prev_words = []
+
+    def flush():
+        if cur_words:
+            texts.append(" ".join(cur_words))
+            starts.append(cur_start)
+            ends.append(cur_end)
+
+    for text, start, end in zip(transcript.texts(), transcript.starts.tolist(), transcript.ends.tolist()):
+        words = strip_fillers(text).split()
+        words = remove_rolling_overlap(prev_words, words)
+        if not words:
+            # Pure repeat/filler: still extends the current segment in time
+            if cur_words:
+                cur_end = max(cur_end, end)
+            continue
+        prev_words = (prev_words + words)[-20:]
+
+        if cur_words:
+            ends_sentence = cur_words[-1].endswith(SENTENCE_END) and cur_len >= min_chars
+            if (
+                ends_sentence
+                or cur_len >= max_chars
+                or end - cur_start > max_duration
+                or start - cur_end > max_gap
+            ):
+                flush()
+                cur_words = []
+                cur_len = 0
+
+        if not cur_words:
+            cur_start = start
+            cur_end = end
+        else:
+            cur_end = max(cur_end, end)
+        cur_words.extend(words)
+        cur_len += sum(len(w) + 1 for w in words)
+
+    flush()
+
+    return Transcript.from_columns(texts, starts, ends)
@@ -0,0 +1,55 @@
+"""
+Token counting shared by the chunker and the LLM prompt budget.
+
+Uses tiktoken's cl100k_base encoding. It is not Llama's tokenizer, but it
+is close enough for budgeting and much faster than loading the real one.
+Falls back to a chars/4 estimate if tiktoken (or its encoding file) is
+unavailable.
+"""
+
+import functools
+import numpy as np
+
+# Transcript tokens per notes prompt. The chunker packs sections up to this
+# size and the notes prompt accepts exactly this much, so nothing is cut.
+DEFAULT_SECTION_TOKEN_BUDGET = 1200
+
+@functools.lru_cache(maxsize=1)
+def get_encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        print(f"⚠️ tiktoken unavailable, estimating tokens from length: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode_ordinary(text))
+
+def count_tokens_batch(texts: list[str]):
+    """
+    Token count per text as an int64 array (batched, multi-threaded).
+    """
+    encoding = get_encoding()
+    if encoding is None:
+        return np.fromiter((max(1, len(t) // 4) if t else 0 for t in texts), dtype=np.int64, count=len(texts))
+    return np.fromiter((len(ids) for ids in encoding.encode_ordinary_batch(texts)), dtype=np.int64, count=len(texts))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Cut text to at most `max_tokens` tokens.
+    """
+    if not text:
+        return text
+    encoding = get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    ids = encoding.encode_ordinary(text)
+    if len(ids) <= max_tokens:
+        return text
+    return encoding.decode(ids[:max_tokens])
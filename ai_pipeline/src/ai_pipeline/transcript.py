@@ -0,0 +1,231 @@
+"""
+Compact columnar transcript representation.
+
+A multi-hour lecture has tens of thousands of segments. Keeping each one
+as a {"text", "start", "end"} dict costs hundreds of bytes per segment and
+makes every time-range lookup a linear scan. `Transcript` stores:
+
+- starts / ends: float64 NumPy arrays (sorted by start)
+- one text buffer holding every segment joined by a single space
+- text_start / text_end: offsets of each segment inside the buffer
+
+Slicing (by index or by time range) returns views that share the arrays
+and the buffer, and the text of any contiguous range is a single buffer
+slice. Dicts are only built when explicitly asked for (API edge).
+"""
+
+import numpy as np
+
+class Transcript:
+    __slots__ = ("starts", "ends", "buffer", "text_start", "text_end")
+
+    def __init__(self, starts, ends, buffer: str, text_start, text_end):
+        self.starts = starts
+        self.ends = ends
+        self.buffer = buffer
+        self.text_start = text_start
+        self.text_end = text_end
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_columns(cls, texts, starts, ends):
+        """
+        Build from parallel sequences. Segments are sorted by start time.
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        texts = list(texts)
+
+        if len(starts) and np.any(starts[1:] < starts[:-1]):
+            order = np.argsort(starts, kind="stable")
+            starts = starts[order]
+            ends = ends[order]
+            texts = [texts[i] for i in order]
+
+        lengths = np.fromiter((len(t) for t in texts), dtype=np.int64, count=len(texts))
+        text_start = np.zeros(len(texts), dtype=np.int64)
+        if len(texts) > 1:
+            # +1 for the space separating consecutive segments
+            np.cumsum(lengths[:-1] + 1, out=text_start[1:])
+        text_end = text_start + lengths
+
+        return cls(starts, ends, " ".join(texts), text_start, text_end)
+
+    @classmethod
+    def from_segments(cls, segments):
+        """
+        Build from an iterable of {"text", "start", "end"} dicts.
+        """
+        texts, starts, ends = [], [], []
+        for seg in segments:
+            texts.append(seg["text"])
+            starts.append(seg["start"])
+            ends.append(seg["end"])
+        return cls.from_columns(texts, starts, ends)
+
+    @classmethod
+    def coerce(cls, transcript):
+        """
+        Accept a Transcript or a legacy list of segment dicts.
+        """
+        if isinstance(transcript, cls):
+            return transcript
+        return cls.from_segments(transcript or [])
+
+    @classmethod
+    def empty(cls):
+        return cls.from_columns([], [], [])
+
+    # ------------------------------------------------------------------
+    # Sequence protocol
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __bool__(self):
+        return len(self.starts) > 0
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            if key.step not in (None, 1):
+                return self.take(np.arange(len(self))[key])
+            return Transcript(
+                self.starts[key], self.ends[key], self.buffer,
+                self.text_start[key], self.text_end[key],
+            )
+
+        if key < 0:
+            key += len(self)
+        return {
+            "text": self.text(key),
+            "start": float(self.starts[key]),
+            "end": float(self.ends[key]),
+        }
+
+    def __iter__(self):
+        buffer = self.buffer
+        for s, e, ts, te in zip(self.starts.tolist(), self.ends.tolist(), self.text_start.tolist(), self.text_end.tolist()):
+            yield {"text": buffer[ts:te], "start": s, "end": e}
+
+    def __repr__(self):
+        if not self:
+            return "Transcript(0 segments)"
+        return f"Transcript({len(self)} segments, {self.start:.1f}s-{self.end:.1f}s)"
+
+    def take(self, indices):
+        """
+        Copy of the given segment indices (non-contiguous selection).
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return Transcript.from_columns(
+            [self.text(i) for i in indices.tolist()],
+            self.starts[indices],
+            self.ends[indices],
+        )
+
+    # ------------------------------------------------------------------
+    # Text access
+    # ------------------------------------------------------------------
+
+    def text(self, i: int) -> str:
+        return self.buffer[self.text_start[i]:self.text_end[i]]
+
+    def texts(self) -> list[str]:
+        buffer = self.buffer
+        return [buffer[s:e] for s, e in zip(self.text_start.tolist(), self.text_end.tolist())]
+
+    def joined_text(self) -> str:
+        """
+        " ".join of every segment text. For contiguous views this is a
+        single slice of the shared buffer.
+        """
+        if not self:
+            return ""
+        return self.buffer[int(self.text_start[0]):int(self.text_end[-1])]
+
+    @property
+    def start(self) -> float:
+        return float(self.starts[0]) if len(self) else 0.0
+
+    @property
+    def end(self) -> float:
+        return float(self.ends[-1]) if len(self) else 0.0
+
+    # ------------------------------------------------------------------
+    # Time range queries
+    # ------------------------------------------------------------------
+
+    def index_range(self, start: float, end: float):
+        """
+        (lo, hi) indices of segments whose start lies in [start, end).
+        """
+        lo = int(np.searchsorted(self.starts, start, side="left"))
+        hi = int(np.searchsorted(self.starts, end, side="left"))
+        return lo, hi
+
+    def slice_time(self, start: float, end: float):
+        """
+        Zero-copy view of the segments starting in [start, end).
+        """
+        lo, hi = self.index_range(start, end)
+        return self[lo:hi]
+
+    # ------------------------------------------------------------------
+    # Conversion (API edge / storage)
+    # ------------------------------------------------------------------
+
+    def to_dicts(self) -> list[dict]:
+        return list(self)
+
+    def to_columns(self) -> dict:
+        """
+        Compact serializable form; round-trips through from_columns().
+        """
+        return {
+            "texts": self.texts(),
+            "starts": self.starts.tolist(),
+            "ends": self.ends.tolist(),
+        }
+
+class IntervalIndex:
+    """
+    Sorted index for assigning segments to time ranges by overlap.
+
+    A segment belongs to the range containing its midpoint, i.e. the range
+    it overlaps most. For contiguous chapters every segment lands in
+    exactly one chapter, including the ones crossing a chapter boundary.
+    Each lookup is two binary searches.
+    """
+
+    def __init__(self, transcript):
+        self.transcript = Transcript.coerce(transcript)
+        mids = (self.transcript.starts + self.transcript.ends) / 2
+
+        if len(mids) < 2 or np.all(mids[1:] >= mids[:-1]):
+            self.order = None
+            self.mids = mids
+        else:
+            # Overlapping captions can make midpoints slightly out of order
+            self.order = np.argsort(mids, kind="stable")
+            self.mids = mids[self.order]
+
+    def query(self, start: float, end: float):
+        """
+        Segments assigned to [start, end). Zero-copy when possible.
+        Pass end=float("inf") for the last range, so segments whose
+        midpoint is past it are not lost.
+        """
+        lo = int(np.searchsorted(self.mids, start, side="left"))
+        hi = int(np.searchsorted(self.mids, end, side="left"))
+
+        if self.order is None:
+            return self.transcript[lo:hi]
+
+        indices = np.sort(self.order[lo:hi])
+        if len(indices) and indices[-1] - indices[0] == len(indices) - 1:
+            return self.transcript[int(indices[0]):int(indices[-1]) + 1]
+        return self.transcript.take(indices)
@@ -0,0 +1,52 @@
+from ai_pipeline.chunking.chunker import chunk_by_time, chunk_by_tokens, create_sections, split_text_by_tokens
+from ai_pipeline.tokens import count_tokens
+from ai_pipeline.transcript import Transcript
+
+def sentences_transcript(count: int) -> Transcript:
+    # Two fragments per sentence: only every second one ends a sentence
+    texts = [f"fragment number {i} of the lecture" + ("." if i % 2 else "") for i in range(count)]
+    return Transcript.from_columns(texts, [i * 3.0 for i in range(count)], [i * 3.0 + 3 for i in range(count)])
+
+def test_chunk_by_tokens_covers_every_segment_in_order():
+    transcript = sentences_transcript(200)
+    chunks = chunk_by_tokens(transcript, max_tokens=100)
+    assert len(chunks) > 1
+    assert [t for chunk in chunks for t in chunk.texts()] == transcript.texts()
+
+def test_chunk_by_tokens_respects_the_budget():
+    for chunk in chunk_by_tokens(sentences_transcript(200), max_tokens=100):
+        assert count_tokens(chunk.joined_text()) <= 100
+
+def test_chunk_by_tokens_cuts_at_sentence_ends():
+    chunks = chunk_by_tokens(sentences_transcript(200), max_tokens=100)
+    for chunk in chunks[:-1]:
+        assert chunk.texts()[-1].endswith(".")
+
+def test_oversized_segment_gets_its_own_chunk():
+    transcript = Transcript.from_columns(["short.", "word " * 400, "short."], [0, 1, 2], [1, 2, 3])
+    chunks = chunk_by_tokens(transcript, max_tokens=50)
+    assert [len(chunk) for chunk in chunks] == [1, 1, 1]
+
+def test_chunk_by_time():
+    chunks = chunk_by_time(sentences_transcript(100), chunk_minutes=1)
+    assert all(chunk.end - chunk.start <= 60 for chunk in chunks)
+    assert sum(len(chunk) for chunk in chunks) == 100
+
+def test_create_sections_keeps_timestamps():
+    sections = create_sections(sentences_transcript(50), max_tokens=80)
+    assert sections[0]["start"] == 0.0
+    assert sections[-1]["end"] == 49 * 3.0 + 3
+    assert all(a["end"] == b["start"] for a, b in zip(sections, sections[1:]))
+
+def test_split_text_by_tokens_keeps_every_word():
+    text = " ".join(f"Sentence {i} is about binary trees." for i in range(100))
+    pieces = split_text_by_tokens(text, max_tokens=60)
+    assert len(pieces) > 1
+    assert " ".join(pieces).split() == text.split()
+    assert all(count_tokens(piece) <= 60 for piece in pieces)
+
+def test_split_text_by_tokens_splits_run_on_text():
+    text = "word " * 1000
+    pieces = split_text_by_tokens(text, max_tokens=50)
+    assert len(pieces) > 1
+    assert sum(len(piece.split()) for piece in pieces) == 1000
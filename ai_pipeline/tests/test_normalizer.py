@@ -0,0 +1,36 @@
+from ai_pipeline.normalization.normalizer import normalize_transcript, remove_rolling_overlap, strip_fillers
+from ai_pipeline.transcript import Transcript
+
+def test_strip_fillers_removes_tags_and_fillers():
+    assert strip_fillers("um so [Music] the uh answer >> is (applause) here") == "so the answer is here"
+
+def test_strip_fillers_keeps_words_containing_fillers():
+    assert strip_fillers("umbrella huh ahead") == "umbrella huh ahead"
+
+def test_rolling_overlap_is_removed():
+    assert remove_rolling_overlap(["the", "cat", "sat"], ["cat", "sat", "down"]) == ["down"]
+
+def test_rolling_overlap_ignores_case_and_punctuation():
+    assert remove_rolling_overlap(["The", "Cat,"], ["the", "cat", "ran"]) == ["ran"]
+
+def test_single_word_overlap_is_kept():
+    # "the the" is a legitimate repetition
+    assert remove_rolling_overlap(["said", "the"], ["the", "end"]) == ["the", "end"]
+
+def test_single_word_repeated_line_is_dropped():
+    assert remove_rolling_overlap(["hello"], ["hello"]) == []
+
+def test_normalize_merges_rolling_fragments_into_sentences():
+    transcript = Transcript.from_columns(
+        ["so today we", "today we talk about", "talk about trees.", "um", "Trees have roots."],
+        [0.0, 1.0, 2.0, 3.0, 4.0],
+        [1.5, 2.5, 3.5, 3.8, 5.0],
+    )
+    result = normalize_transcript(transcript, min_chars=10)
+    assert result.texts() == ["so today we talk about trees.", "Trees have roots."]
+    assert result.starts.tolist() == [0.0, 4.0]
+    assert result.ends.tolist() == [3.8, 5.0]
+
+def test_normalize_splits_on_long_pauses():
+    transcript = Transcript.from_columns(["first part", "second part"], [0.0, 10.0], [1.0, 11.0])
+    assert normalize_transcript(transcript, max_gap=2.0).texts() == ["first part", "second part"]
@@ -0,0 +1,37 @@
+import numpy as np
+
+from ai_pipeline.transcript import Transcript, IntervalIndex
+
+def make_transcript(count: int, step: float = 2.0, length: float = 2.5) -> Transcript:
+    starts = [i * step for i in range(count)]
+    return Transcript.from_columns([f"w{i}" for i in range(count)], starts, [s + length for s in starts])
+
+def test_query_assigns_by_midpoint():
+    index = IntervalIndex(make_transcript(10))
+    # Midpoints are 1.25, 3.25, 5.25, ...
+    assert index.query(0, 5).texts() == ["w0", "w1"]
+    assert index.query(5, 10).texts() == ["w2", "w3", "w4"]
+
+def test_contiguous_ranges_cover_every_segment_once():
+    index = IntervalIndex(make_transcript(50))
+    bounds = [0, 17, 42, 61, 90, float("inf")]
+    texts = [t for lo, hi in zip(bounds, bounds[1:]) for t in index.query(lo, hi).texts()]
+    assert texts == [f"w{i}" for i in range(50)]
+
+def test_open_last_range_keeps_captions_past_the_end():
+    # Captions run to 200.5, the last chapter ends at 199
+    index = IntervalIndex(make_transcript(100))
+    assert len(index.query(100, 199)) == 49
+    assert len(index.query(100, float("inf"))) == 50
+
+def test_out_of_order_midpoints():
+    transcript = Transcript.from_columns(["a", "b", "c"], [0, 1, 2], [10, 2, 3])
+    index = IntervalIndex(transcript)
+    assert index.order is not None
+    assert index.query(0, 4).texts() == ["b", "c"]
+    assert index.query(4, float("inf")).texts() == ["a"]
+
+def test_query_is_a_view_when_contiguous():
+    transcript = make_transcript(10)
+    part = IntervalIndex(transcript).query(3, 9)
+    assert np.shares_memory(part.starts, transcript.starts)
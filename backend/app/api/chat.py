@@ -6,4 +6,4 @@ router = APIRouter()
 
 @router.post("/chat")
 async def chat(req: ChatRequest):
-    return await ask_lecture_question(req.question, req.transcript)
+    return await ask_lecture_question(req.question, req.transcript, video_id=req.video_id, video_ids=req.video_ids)
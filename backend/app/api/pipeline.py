@@ -4,11 +4,18 @@ import time
 import json
 import asyncio
 from app.schemas.video import VideoProcessRequest, VideoRequest, CaptureFrameRequest
-from app.services.transcript_service import generate_transcript, get_video_metadata
+from app.services.transcript_service import generate_transcript_async, get_video_metadata_async, get_video_id
 from app.services.section_service import generate_sections
-from app.services.notes_service import generate_notes_for_sections
+from app.services.notes_service import (
+    generate_notes_for_sections,
+    generate_section_notes_auto,
+    build_note_item,
+    plan_note_batches,
+)
+from app.services.llm_service import generate_section_notes_batch
+from app.services.token_budget import notes_max_tokens, track_usage
 from app.services.embedding_service import create_embeddings_for_sections
-from app.services.visual_service import capture_specific_frame
+from app.core.config import STREAM_SECTION_NOTES, NOTES_BATCH_ENABLED
 
 router = APIRouter()
 
@@ -23,7 +30,7 @@ async def preview_video(req: VideoRequest):
     """
     print(f"DEBUG: Processing preview for URL: {req.url}")
     try:
-        data = get_video_metadata(req.url)
+        data = await get_video_metadata_async(req.url)
         print(f"DEBUG: Preview data generated: {data.get('title')}")
         return data
     except Exception as e:
@@ -37,8 +44,9 @@ async def capture_frame(req: CaptureFrameRequest):
     """
     Captures a specific frame from the video.
     """
+    # cv2 / pytesseract / yt_dlp load on first capture, not at startup
+    from app.services.visual_service import capture_specific_frame
     try:
-        
         url = await asyncio.to_thread(
             capture_specific_frame, req.url, req.video_id, req.timestamp
         )
@@ -61,6 +69,7 @@ async def process_video(req: VideoProcessRequest):
     async def event_generator():
         try:
             start = time.time()
+            usage = track_usage()
             yield json.dumps({"status": "starting", "message": "Initializing pipeline..."}) + "\n"
 
             depth = req.depth
@@ -73,7 +82,7 @@ async def process_video(req: VideoProcessRequest):
 
             t0 = time.time()
             
-            data = generate_transcript(req.url) 
+            data = await generate_transcript_async(req.url)
             yield json.dumps({"status": "transcribing_done", "message": "Transcript extracted"}) + "\n"
 
             yield json.dumps({"status": "processing_sections", "message": "Preparing sections..."}) + "\n"
@@ -85,69 +94,60 @@ async def process_video(req: VideoProcessRequest):
             )
             yield json.dumps({"status": "sections_done", "message": f"Prepared {len(sections)} sections", "sections_count": len(sections)}) + "\n"
 
+            transcript_dicts = data["transcript"].to_dicts()
             yield json.dumps({
                 "status": "metadata_ready",
                 "metadata": data["metadata"],
-                "transcript": data["transcript"]
+                "transcript": transcript_dicts
             }) + "\n"
 
             visual_resources = [] 
 
             yield json.dumps({"status": "generating_notes", "message": "Generating notes..."}) + "\n"
 
+            # note_delta events and finished notes from all sections, in
+            # the order they are produced
+            events = asyncio.Queue()
+
             async def process_and_stream_section(section, index):
-                from app.services.llm_service import generate_section_notes_with_title
-                max_attempts = 8  
-                
-                for attempt in range(max_attempts):
-                    try:
-                        
-                        section_visuals = [
-                            v for v in visual_resources 
-                            if section["start"] <= v["timestamp"] <= section["end"]
-                        ]
-
-                        result = await generate_section_notes_with_title(
-                            section["text"],
-                            section.get("title", ""),
-                            depth, format_type, tone, language,
-                            include_visuals=req.include_visuals,
-                            include_code=req.include_code,
-                            visual_resources=section_visuals
-                        )
-                        
-                        if not isinstance(result, dict):
-                            raise ValueError(f"Invalid result type: {type(result)}")
-                        
-                        note_item = {
-                            "title": result.get("title", section.get("title", "Untitled")),
-                            "summary": result.get("summary", ""),
-                            "start": section["start"],
-                            "end": section["end"],
-                            "notes": {
-                                "explanation": result.get("explanation", "") or "",
-                                "bullet_notes": result.get("bullet_notes", []) or [],
-                                "examples": result.get("examples", []) or [],
-                                "key_concepts": result.get("key_concepts", []) or [],
-                                "difficulty": result.get("difficulty", "Intermediate")
-                            }
-                        }
-                        if attempt > 0:
-                            print(f"✅ Section '{section.get('title', 'section')}' succeeded on attempt {attempt + 1}")
-                        return (index, note_item)
-                    except Exception as e:
-                        error_msg = str(e)
-                        print(f"❌ Error for section '{section.get('title', 'section')}' (attempt {attempt + 1}/{max_attempts}): {error_msg}")
-                        
-                        if attempt < max_attempts - 1:
-                            wait_time = min(5 * (2 ** attempt), 60)  
-                            print(f"🔄 Retrying '{section.get('title', 'section')}' in {wait_time}s...")
-                            await asyncio.sleep(wait_time)
-
-                import traceback
-                print(f"⚠️ All attempts exhausted for '{section.get('title', 'section')}'")
-                print(f"   Traceback: {traceback.format_exc()}")
-                note_item = {
+                # Transport retries and rate limiting happen in LLM_ROUTER;
+                # a section that still fails gets a placeholder instead of
+                # being retried for minutes here.
+                on_delta = None
+                if STREAM_SECTION_NOTES:
+                    def on_delta(kind, key, value):
+                        events.put_nowait(("delta", {
+                            "status": "note_delta",
+                            "index": index,
+                            "kind": kind,
+                            "field": key,
+                            "value": value
+                        }))
+
+                try:
+                    result = await generate_section_notes_auto(
+                        section["text"],
+                        section.get("title", ""),
+                        depth, format_type, tone, language,
+                        include_visuals=req.include_visuals,
+                        include_code=req.include_code,
+                        visual_resources=section_visuals(section),
+                        on_delta=on_delta
+                    )
+                    
+                    if not isinstance(result, dict):
+                        raise ValueError(f"Invalid result type: {type(result)}")
+                    
+                    return (index, build_note_item(section, result))
+                except Exception as e:
+                    import traceback
+                    print(f"❌ Error for section '{section.get('title', 'section')}': {e}")
+                    print(f"   Traceback: {traceback.format_exc()}")
+
+                return (index, placeholder_note(section))
+
+            def placeholder_note(section):
+                return {
                     "title": section.get("title", "Untitled"),
                     "summary": "",
                     "start": section["start"],
@@ -160,32 +160,126 @@ async def process_video(req: VideoProcessRequest):
                         "difficulty": "Unknown"
                     }
                 }
-                return (index, note_item)
 
-            tasks = [process_and_stream_section(s, i) for i, s in enumerate(sections)]
+            def section_visuals(section):
+                return [
+                    v for v in visual_resources
+                    if section["start"] <= v["timestamp"] <= section["end"]
+                ]
+
+            async def run_batch(indices):
+                """
+                One request for the whole batch; sections missing from a
+                truncated or malformed response are generated individually.
+                A transport failure (already retried by LLM_ROUTER) gives
+                placeholders instead of more retries per section.
+                """
+                delivered = set()
+
+                def deliver(position, result):
+                    index = indices[position]
+                    if index not in delivered:
+                        delivered.add(index)
+                        events.put_nowait(("note", (index, build_note_item(sections[index], result))))
+
+                on_delta = None
+                if STREAM_SECTION_NOTES:
+                    def on_delta(position, kind, key, value):
+                        if indices[position] not in delivered:
+                            events.put_nowait(("delta", {
+                                "status": "note_delta",
+                                "index": indices[position],
+                                "kind": kind,
+                                "field": key,
+                                "value": value
+                            }))
+
+                if len(indices) > 1:
+                    try:
+                        results = await generate_section_notes_batch(
+                            [
+                                {
+                                    "text": sections[i]["text"],
+                                    "title": sections[i].get("title", ""),
+                                    "visual_resources": section_visuals(sections[i])
+                                }
+                                for i in indices
+                            ],
+                            depth, format_type, tone, language,
+                            include_visuals=req.include_visuals,
+                            include_code=req.include_code,
+                            on_section=deliver,
+                            on_delta=on_delta
+                        )
+                        for position, result in results.items():
+                            deliver(position, result)
+                    except ValueError as e:
+                        # Unparseable / invalid output (ValidationError included)
+                        print(f"⚠️ Batch of {len(indices)} sections unparseable, generating individually: {e}")
+                    except Exception as e:
+                        print(f"❌ Batch of {len(indices)} sections failed: {e}")
+                        for index in indices:
+                            if index not in delivered:
+                                delivered.add(index)
+                                events.put_nowait(("note", (index, placeholder_note(sections[index]))))
+                        return
+
+                async def run_single(index):
+                    events.put_nowait(("note", await process_and_stream_section(sections[index], index)))
+
+                missing = [i for i in indices if i not in delivered]
+                if missing and len(indices) > 1:
+                    print(f"🔁 {len(missing)}/{len(indices)} batched sections missing, generating individually")
+                await asyncio.gather(*[run_single(i) for i in missing])
+
+            if NOTES_BATCH_ENABLED:
+                batches = plan_note_batches(
+                    sections,
+                    notes_max_tokens(depth, format_type, language, req.include_code)
+                )
+            else:
+                batches = [[i] for i in range(len(sections))]
+            print(f"📦 {len(sections)} sections -> {len(batches)} notes requests")
+
+            tasks = [asyncio.create_task(run_batch(batch)) for batch in batches]
             notes = [None] * len(sections)
             next_index = 0  
             completed_results = {}  
+            remaining = len(sections)
+
+            try:
+                while remaining:
+                    kind, payload = await events.get()
+                    if kind == "delta":
+                        # Partial content streams as soon as it exists;
+                        # note_ready (in section order) carries the final note
+                        yield json.dumps(payload) + "\n"
+                        continue
+
+                    index, note_item = payload
+                    remaining -= 1
+                    notes[index] = note_item
+                    completed_results[index] = note_item
 
-            for coro in asyncio.as_completed(tasks):
-                index, note_item = await coro
-                notes[index] = note_item
-                completed_results[index] = note_item
-
-                while next_index in completed_results:
-                    yield json.dumps({
-                        "status": "note_ready",
-                        "note": completed_results[next_index],
-                        "index": next_index,
-                        "total": len(sections)
-                    }) + "\n"
-                    del completed_results[next_index]
-                    next_index += 1
+                    while next_index in completed_results:
+                        yield json.dumps({
+                            "status": "note_ready",
+                            "note": completed_results[next_index],
+                            "index": next_index,
+                            "total": len(sections)
+                        }) + "\n"
+                        del completed_results[next_index]
+                        next_index += 1
+            finally:
+                # Client disconnected or the pipeline failed: stop generating
+                for task in tasks:
+                    task.cancel()
             
             yield json.dumps({"status": "notes_done", "message": "Notes generated"}) + "\n"
 
             yield json.dumps({"status": "creating_embeddings", "message": "Preparing for AI chat..."}) + "\n"
-            embeddings = create_embeddings_for_sections(sections)
+            # The id parsed from the URL, not whatever the metadata lookup returned
+            embeddings = await create_embeddings_for_sections(sections, get_video_id(req.url))
 
             total_time = round(time.time() - start, 2)
 
@@ -195,8 +289,9 @@ async def process_video(req: VideoProcessRequest):
                 "metadata": data["metadata"],
                 "sections": sections,
                 "notes": notes,
-                "transcript": data["transcript"],
-                "embeddings_created": True
+                "transcript": transcript_dicts,
+                "embeddings_created": True,
+                "token_usage": usage.as_dict()
             }
             yield json.dumps({"status": "complete", "data": final_data}) + "\n"
 
@@ -214,6 +309,41 @@ class ExtrasRequest(BaseModel):
     seed: int = 0
     count: int = 5
     existing_items: list[str] = []
+    # Per-section digest (title, summary, bullet notes): leaves of the summary tree
+    section_summaries: list[str] = []
+
+class StudyPackRequest(BaseModel):
+    notes_text: str
+    language: str = "English"
+    flashcard_count: int = 5
+    quiz_count: int = 5
+    interview_count: int = 5
+    section_summaries: list[str] = []
+
+def first_request(req: ExtrasRequest) -> bool:
+    """
+    Initial load of an extra (not "more"/"regenerate"): can come from a
+    cached study pack.
+    """
+    return req.seed == 0 and not req.existing_items
+
+@router.post("/generate-study-pack")
+async def api_generate_study_pack(req: StudyPackRequest):
+    """
+    TLDR, flashcards, quiz and interview questions in one batched call.
+    Cached per notes, so the single-extra endpoints reuse it.
+    """
+    from app.services.study_pack_service import generate_study_pack
+    try:
+        return await generate_study_pack(
+            req.notes_text, req.language,
+            flashcard_count=req.flashcard_count,
+            quiz_count=req.quiz_count,
+            interview_count=req.interview_count,
+            section_summaries=req.section_summaries
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/generate-quiz")
 async def api_generate_quiz(req: ExtrasRequest):
@@ -221,9 +351,20 @@ async def api_generate_quiz(req: ExtrasRequest):
     Generate UNIQUE MCQ questions from notes.
     """
     from app.services.llm_service import generate_quiz
+    from app.services.study_pack_service import get_cached_part
+    from app.services.extras_pool_service import generate_more
+    from app.services.summary_tree_service import lecture_digest
     try:
-        data = await generate_quiz(req.notes_text, req.language, seed=req.seed, existing_items=req.existing_items)
-        return data
+        if first_request(req):
+            cached = get_cached_part(req.notes_text, req.language, "quiz", req.count)
+            if cached:
+                return cached
+            source = await lecture_digest(req.notes_text, req.language, req.section_summaries)
+            return await generate_quiz(source, req.language, count=req.count)
+        return await generate_more(
+            "quiz", req.notes_text, req.language, count=req.count, seed=req.seed,
+            existing_items=req.existing_items, section_summaries=req.section_summaries
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -233,9 +374,20 @@ async def api_generate_flashcards(req: ExtrasRequest):
     Generate unique flashcards from notes.
     """
     from app.services.llm_service import generate_flashcards
+    from app.services.study_pack_service import get_cached_part
+    from app.services.extras_pool_service import generate_more
+    from app.services.summary_tree_service import lecture_digest
     try:
-        data = await generate_flashcards(req.notes_text, req.language, count=req.count, seed=req.seed, existing_items=req.existing_items)
-        return data
+        if first_request(req):
+            cached = get_cached_part(req.notes_text, req.language, "flashcards", req.count)
+            if cached:
+                return cached
+            source = await lecture_digest(req.notes_text, req.language, req.section_summaries)
+            return await generate_flashcards(source, req.language, count=req.count)
+        return await generate_more(
+            "flashcards", req.notes_text, req.language, count=req.count, seed=req.seed,
+            existing_items=req.existing_items, section_summaries=req.section_summaries
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -245,8 +397,19 @@ async def api_generate_interview(req: ExtrasRequest):
     Generate unique interview questions with answers from notes.
     """
     from app.services.llm_service import generate_interview_questions
+    from app.services.study_pack_service import get_cached_part
+    from app.services.extras_pool_service import generate_more
+    from app.services.summary_tree_service import lecture_digest
     try:
-        data = await generate_interview_questions(req.notes_text, req.language, count=req.count, seed=req.seed, existing_items=req.existing_items)
-        return data
+        if first_request(req):
+            cached = get_cached_part(req.notes_text, req.language, "interview", req.count)
+            if cached:
+                return cached
+            source = await lecture_digest(req.notes_text, req.language, req.section_summaries)
+            return await generate_interview_questions(source, req.language, count=req.count)
+        return await generate_more(
+            "interview", req.notes_text, req.language, count=req.count, seed=req.seed,
+            existing_items=req.existing_items, section_summaries=req.section_summaries
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
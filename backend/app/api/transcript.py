@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
-from app.services.transcript_service import generate_transcript
+from app.services.transcript_service import generate_transcript_async
 
 router = APIRouter()
 
@@ -8,5 +8,6 @@ class TranscriptRequest(BaseModel):
     url: str
 
 @router.post("/videos/transcript")
-def transcript(req: TranscriptRequest):
-    return generate_transcript(req.url)
+async def transcript(req: TranscriptRequest):
+    data = await generate_transcript_async(req.url)
+    return {**data, "transcript": data["transcript"].to_dicts()}
@@ -0,0 +1,185 @@
+"""
+Small persistent key/value cache used by the NoteFlix services.
+
+Backed by SQLite so it survives restarts and can be shared by several
+uvicorn workers on the same machine. Entries expire after `ttl` seconds
+and the least recently used ones are evicted once the store grows past
+`max_bytes`. An optional in-memory LRU sits in front for hot keys.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+class DiskCache:
+    """
+    SQLite-backed bytes cache with TTL and size-bounded LRU eviction.
+    Callers handle serialization (orjson, numpy bytes...).
+    """
+
+    def __init__(self, path, ttl: float = None, max_bytes: int = None, memory_items: int = 0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_items = memory_items
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.RLock()
+        self._memory = OrderedDict()
+        self._touched = {}
+
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries(accessed_at)")
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl is not None and now - created_at > self.ttl
+
+    def _remember(self, key: str, value: bytes, created_at: float):
+        if self.memory_items <= 0:
+            return
+        self._memory[key] = (value, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str):
+        """
+        Return cached bytes for `key`, or None if missing/expired.
+        """
+        now = time.time()
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                value, created_at = cached
+                if not self._expired(created_at, now):
+                    self._memory.move_to_end(key)
+                    self._touched[key] = now
+                    self.hits += 1
+                    return value
+                self._delete(key)
+                self.misses += 1
+                return None
+
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created_at = row
+            if self._expired(created_at, now):
+                self._delete(key)
+                self.misses += 1
+                return None
+
+            self._touched[key] = now
+            self._remember(key, value, created_at)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes):
+        """
+        Store bytes under `key`, evicting old entries if the store is full.
+        """
+        now = time.time()
+        value = bytes(value)
+        with self._lock:
+            old = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, value, len(value), now, now),
+            )
+            self._total_bytes += len(value) - (old[0] if old else 0)
+            self._touched.pop(key, None)
+            self._remember(key, value, now)
+
+            if self.max_bytes is not None and self._total_bytes > self.max_bytes:
+                self._evict(now)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._delete(key)
+
+    def _delete(self, key: str):
+        self._memory.pop(key, None)
+        self._touched.pop(key, None)
+        row = self._conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+        if row:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._total_bytes -= row[0]
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        self._conn.executemany(
+            "UPDATE entries SET accessed_at = ? WHERE key = ?",
+            [(ts, key) for key, ts in self._touched.items()],
+        )
+        self._touched.clear()
+
+    def _evict(self, now: float):
+        """
+        Drop expired entries, then least recently used ones until we are
+        back under 90% of max_bytes (so we don't evict on every write).
+        """
+        self._flush_touched()
+
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl,))
+
+        # Other workers may have written to the same file, so re-count.
+        self._total_bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if self._total_bytes <= target:
+            return
+
+        victims = []
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            victims.append((key,))
+            freed += size
+            if self._total_bytes - freed <= target:
+                break
+
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+        self._total_bytes -= freed
+        for (key,) in victims:
+            self._memory.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._memory.clear()
+            self._touched.clear()
+            self._total_bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            return {
+                "entries": count,
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,146 @@
+"""
+NoteFlix runtime configuration.
+All values can be overridden with environment variables.
+"""
+
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+from ai_pipeline.tokens import DEFAULT_SECTION_TOKEN_BUDGET
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+load_dotenv(BASE_DIR / ".env")
+# Older local setups keep the .env next to the services
+for env_path in (BASE_DIR / "app" / ".env", BASE_DIR / "app" / "services" / ".env"):
+    if env_path.exists():
+        load_dotenv(env_path)
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+def env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+def env_list(name: str, default: str = "") -> list[str]:
+    return [item.strip() for item in os.getenv(name, default).split(",") if item.strip()]
+
+# Local on-disk caches (transcripts, LLM responses, embeddings...)
+CACHE_DIR = Path(os.getenv("NOTEFLIX_CACHE_DIR", BASE_DIR / ".cache"))
+
+# Embedding cache (float16 vectors keyed by model + text hash)
+EMBEDDING_CACHE_ENABLED = env_bool("EMBEDDING_CACHE_ENABLED", True)
+EMBEDDING_CACHE_TTL = env_int("EMBEDDING_CACHE_TTL", 90 * 24 * 3600)
+EMBEDDING_CACHE_MAX_BYTES = env_int("EMBEDDING_CACHE_MAX_MB", 256) * 1024 * 1024
+EMBEDDING_CACHE_MEMORY_ITEMS = env_int("EMBEDDING_CACHE_MEMORY_ITEMS", 4096)
+
+# Persistent vector store for lecture chat (Chroma)
+VECTOR_STORE_PERSISTENT = env_bool("VECTOR_STORE_PERSISTENT", True)
+VECTOR_STORE_DIR = Path(os.getenv("VECTOR_STORE_DIR", CACHE_DIR / "chroma"))
+
+# Transcript cache
+TRANSCRIPT_CACHE_ENABLED = env_bool("TRANSCRIPT_CACHE_ENABLED", True)
+TRANSCRIPT_CACHE_TTL = env_int("TRANSCRIPT_CACHE_TTL", 7 * 24 * 3600)
+TRANSCRIPT_CACHE_MAX_BYTES = env_int("TRANSCRIPT_CACHE_MAX_MB", 512) * 1024 * 1024
+
+# Transcript / metadata acquisition (per-call deadlines, seconds)
+ACQUIRE_MAX_THREADS = env_int("ACQUIRE_MAX_THREADS", 8)
+# yt-dlp (the hedged/secondary strategy) gets its own, larger pool
+ACQUIRE_YTDLP_THREADS = env_int("ACQUIRE_YTDLP_THREADS", 16)
+# Per-socket-operation timeout inside yt-dlp, so abandoned calls end too
+YTDLP_SOCKET_TIMEOUT = env_float("YTDLP_SOCKET_TIMEOUT", 10)
+OEMBED_TIMEOUT = env_float("OEMBED_TIMEOUT", 5)
+YTDLP_METADATA_TIMEOUT = env_float("YTDLP_METADATA_TIMEOUT", 20)
+TRANSCRIPT_API_TIMEOUT = env_float("TRANSCRIPT_API_TIMEOUT", 20)
+YTDLP_CAPTIONS_TIMEOUT = env_float("YTDLP_CAPTIONS_TIMEOUT", 45)
+
+# Hedged acquisition: "sequential" | "hedged" | "race"
+ACQUIRE_HEDGE_MODE = os.getenv("ACQUIRE_HEDGE_MODE", "hedged")
+METADATA_HEDGE_DELAY = env_float("METADATA_HEDGE_DELAY", 1.5)
+TRANSCRIPT_HEDGE_DELAY = env_float("TRANSCRIPT_HEDGE_DELAY", 4.0)
+
+# Transcript tokens per notes prompt (chunker target == prompt budget)
+SECTION_TOKEN_BUDGET = env_int("SECTION_TOKEN_BUDGET", DEFAULT_SECTION_TOKEN_BUDGET)
+
+# Embedding-based topic segmentation for videos without chapters
+SEMANTIC_SECTIONING = env_bool("SEMANTIC_SECTIONING", True)
+
+# Sections above this many tokens are noted with map-reduce instead of truncated
+MAPREDUCE_THRESHOLD_TOKENS = env_int("MAPREDUCE_THRESHOLD_TOKENS", int(SECTION_TOKEN_BUDGET * 1.25))
+# Transcript tokens one notes prompt may carry: anything up to the threshold
+# is sent whole, so a single-call section is never silently truncated
+NOTES_INPUT_TOKEN_LIMIT = max(SECTION_TOKEN_BUDGET, MAPREDUCE_THRESHOLD_TOKENS)
+
+# LLM response cache
+LLM_CACHE_ENABLED = env_bool("LLM_CACHE_ENABLED", True)
+LLM_CACHE_TTL = env_int("LLM_CACHE_TTL", 30 * 24 * 3600)
+LLM_CACHE_MAX_BYTES = env_int("LLM_CACHE_MAX_MB", 256) * 1024 * 1024
+LLM_CACHE_MEMORY_ITEMS = env_int("LLM_CACHE_MEMORY_ITEMS", 512)
+
+# LLM providers: any of "groq", "gemini", "fake" (deterministic local fake)
+LLM_PROVIDERS = env_list("LLM_PROVIDERS", "groq")
+LLM_TIMEOUT = env_float("LLM_TIMEOUT", 15.0)
+LLM_BACKEND_COOLDOWN = env_float("LLM_BACKEND_COOLDOWN", 30.0)
+# One backend (and one rate limiter) per key
+GROQ_API_KEYS = env_list("GROQ_API_KEYS") or env_list("GROQ_API_KEY")
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL") or None
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY") or os.getenv("GOOGLE_API_KEY")
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_RPM = env_int("GEMINI_RPM", 15)
+GEMINI_TPM = env_int("GEMINI_TPM", 1_000_000)
+FAKE_LLM_LATENCY = env_float("FAKE_LLM_LATENCY", 0.3)
+FAKE_LLM_TOKENS_PER_SECOND = env_float("FAKE_LLM_TOKENS_PER_SECOND", 800.0)
+
+# Groq rate limiting, per key (synced at runtime from x-ratelimit-* headers)
+GROQ_RPM = env_int("GROQ_RPM", 30)
+GROQ_TPM = env_int("GROQ_TPM", 6000)
+GROQ_MAX_CONCURRENCY = env_int("GROQ_MAX_CONCURRENCY", 8)
+GROQ_INITIAL_CONCURRENCY = env_int("GROQ_INITIAL_CONCURRENCY", 4)
+LLM_MAX_ATTEMPTS = env_int("LLM_MAX_ATTEMPTS", 4)
+LLM_PARSE_ATTEMPTS = env_int("LLM_PARSE_ATTEMPTS", 2)
+LLM_DEFAULT_COMPLETION_TOKENS = env_int("LLM_DEFAULT_COMPLETION_TOKENS", 1024)
+
+# Stream section notes as note_delta events while they are generated
+STREAM_SECTION_NOTES = env_bool("STREAM_SECTION_NOTES", True)
+
+# Pack several small sections into one notes request (saves RPM)
+NOTES_BATCH_ENABLED = env_bool("NOTES_BATCH_ENABLED", True)
+NOTES_BATCH_MAX_SECTIONS = env_int("NOTES_BATCH_MAX_SECTIONS", 6)
+NOTES_BATCH_TOKEN_BUDGET = env_int("NOTES_BATCH_TOKEN_BUDGET", 12000)
+
+# "More" quiz/flashcards/interview: over-generate, drop near-duplicates by
+# embedding similarity, keep the rest in a per-notes pool for later rounds
+NOVELTY_OVERGENERATE_FACTOR = env_float("NOVELTY_OVERGENERATE_FACTOR", 2.0)
+NOVELTY_SIMILARITY_THRESHOLD = env_float("NOVELTY_SIMILARITY_THRESHOLD", 0.85)
+NOVELTY_PROMPT_EXCLUSIONS = env_int("NOVELTY_PROMPT_EXCLUSIONS", 10)
+
+# Summary tree: TLDR / extras read notes up to EXTRAS_INPUT_TOKENS as they
+# are (at least the old 4-6 KB windows); longer lectures are read through
+# section digests merged level by level instead of their first few KB
+EXTRAS_INPUT_TOKENS = env_int("EXTRAS_INPUT_TOKENS", 1500)
+SUMMARY_TREE_GROUP_TOKENS = env_int("SUMMARY_TREE_GROUP_TOKENS", 1200)
+
+# Load the embedding model in the background at startup (/ready reports it)
+WARMUP_ON_STARTUP = env_bool("WARMUP_ON_STARTUP", True)
+
+# Embedding executor: concurrent encodes are joined into micro-batches
+EMBED_MAX_BATCH = env_int("EMBED_MAX_BATCH", 64)
+EMBED_BATCH_WINDOW_MS = env_float("EMBED_BATCH_WINDOW_MS", 5.0)
+
+# Embedding backend: "torch" (sentence-transformers), "onnx" (ONNX Runtime,
+# no Torch) or "onnx-int8" (dynamically quantized ONNX export)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE", "onnx/model.onnx")
+EMBEDDING_ONNX_INT8_FILE = os.getenv("EMBEDDING_ONNX_INT8_FILE", "onnx/model_quint8_avx2.onnx")
+EMBEDDING_THREADS = env_int("EMBEDDING_THREADS", 0)
@@ -3,10 +3,42 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.pipeline import router as pipeline_router
 from app.api.chat import router as chat_router
+from app.api.transcript import router as transcript_router
+from app.services.transcript_service import close_http_client
+from app.services.llm_providers import LLM_ROUTER
+from app.services.embedding_service import warm_up, is_ready, embedding_stats
+from app.core.config import WARMUP_ON_STARTUP
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+import asyncio
 import os
 
-app = FastAPI(title="Noteflix API")
+warmup_state = {"status": "disabled" if not WARMUP_ON_STARTUP else "pending", "error": None}
+
+async def warm_up_models():
+    """
+    Load the embedding model off the event loop while the app already
+    serves requests.
+    """
+    warmup_state["status"] = "warming"
+    try:
+        await asyncio.to_thread(warm_up)
+        warmup_state["status"] = "done"
+    except Exception as e:
+        warmup_state["status"] = "failed"
+        warmup_state["error"] = str(e)
+        print(f"⚠️ Warm-up failed (models will load on first use): {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    warmup_task = asyncio.create_task(warm_up_models()) if WARMUP_ON_STARTUP else None
+    yield
+    if warmup_task:
+        warmup_task.cancel()
+    await close_http_client()
+
+app = FastAPI(title="Noteflix API", lifespan=lifespan)
 
 # Ensure static directories exist
 os.makedirs("static/visuals", exist_ok=True)
@@ -40,9 +72,22 @@ async def health_check():
     return {
         "status": "healthy", 
         "port": os.getenv("PORT", "8080"),
-        "env": os.getenv("RAILWAY_ENVIRONMENT", "production")
+        "env": os.getenv("RAILWAY_ENVIRONMENT", "production"),
+        "llm_backends": LLM_ROUTER.stats()
     }
 
+@app.get("/ready")
+async def readiness_check():
+    """
+    Readiness probe: 503 until the warm-up has loaded the models. Without
+    warm-up, models load lazily and the worker is always ready.
+    """
+    ready = is_ready() or not WARMUP_ON_STARTUP
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"ready": ready, "warmup": warmup_state, "embeddings": embedding_stats()}
+    )
+
 # Mount static files
 os.makedirs("static", exist_ok=True)
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -53,3 +98,4 @@ def root():
 
 app.include_router(pipeline_router)
 app.include_router(chat_router)
+app.include_router(transcript_router)
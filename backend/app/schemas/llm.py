@@ -0,0 +1,165 @@
+import re
+from pydantic import BaseModel, ValidationError, field_validator, model_validator
+from typing import List
+
+OPTION_LABEL_RE = re.compile(r"^\(?([A-Za-z])(?:[).:]\s*|\s*$)")
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return "\n\n".join(_as_text(v) for v in value if v)
+    if isinstance(value, dict):
+        return " - ".join(_as_text(v) for v in value.values() if v)
+    return str(value)
+
+def _as_text_list(value) -> list:
+    if value is None:
+        return []
+    if not isinstance(value, list):
+        value = [value]
+    return [_as_text(v) for v in value if v]
+
+def _valid_items(model, value):
+    """
+    The items of a list that validate as `model`; the others are dropped so
+    one malformed item doesn't fail the whole list. If none validates the
+    list is returned as is, and its errors surface.
+    """
+    if not isinstance(value, list):
+        return value
+    valid = []
+    for item in value:
+        try:
+            valid.append(model.model_validate(item))
+        except ValidationError:
+            continue
+    return valid or value
+
+def _option_text(answer, options: list) -> str:
+    """
+    The text of the option `answer` refers to. Models give the option
+    text, its letter ("B", "B) ..."), or its 0-based index (1, "1").
+    """
+    if isinstance(answer, int) and not isinstance(answer, bool):
+        return options[answer] if 0 <= answer < len(options) else str(answer)
+    answer = _as_text(answer).strip()
+    if answer in options:
+        return answer
+    folded = answer.casefold()
+    for option in options:
+        if option.strip().casefold() == folded:
+            return option
+    if answer.isdigit() and int(answer) < len(options):
+        return options[int(answer)]
+    label = OPTION_LABEL_RE.match(answer)
+    if label:
+        index = ord(label.group(1).upper()) - ord("A")
+        if index < len(options):
+            return options[index]
+    return answer
+
+class SectionNotes(BaseModel):
+    """
+    Notes for one section. Lenient: the model sometimes returns a list for
+    "explanation" or objects for "examples"; those are flattened to text.
+    """
+    title: str = ""
+    summary: str = ""
+    explanation: str = ""
+    bullet_notes: List[str] = []
+    examples: List[str] = []
+    key_concepts: List[str] = []
+    difficulty: str = "Intermediate"
+
+    @field_validator("title", "summary", "explanation", mode="before")
+    @classmethod
+    def _text(cls, value):
+        return _as_text(value)
+
+    @field_validator("bullet_notes", "examples", "key_concepts", mode="before")
+    @classmethod
+    def _text_list(cls, value):
+        return _as_text_list(value)
+
+    @field_validator("difficulty", mode="before")
+    @classmethod
+    def _difficulty(cls, value):
+        return _as_text(value) or "Intermediate"
+
+class TLDR(BaseModel):
+    tldr: List[str]
+
+    @field_validator("tldr", mode="before")
+    @classmethod
+    def _text_list(cls, value):
+        return _as_text_list(value)
+
+class Flashcard(BaseModel):
+    question: str
+    answer: str
+
+    @field_validator("question", "answer", mode="before")
+    @classmethod
+    def _text(cls, value):
+        return _as_text(value)
+
+class Flashcards(BaseModel):
+    flashcards: List[Flashcard]
+
+    @field_validator("flashcards", mode="before")
+    @classmethod
+    def _items(cls, value):
+        return _valid_items(Flashcard, value)
+
+class QuizQuestion(BaseModel):
+    """
+    One MCQ. "answer" is always the text of the correct option.
+    """
+    question: str
+    options: List[str]
+    answer: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def _answer_text(cls, data):
+        if isinstance(data, dict) and "options" in data:
+            options = _as_text_list(data["options"])
+            data = {**data, "options": options, "answer": _option_text(data.get("answer"), options)}
+        return data
+
+    @field_validator("question", mode="before")
+    @classmethod
+    def _text(cls, value):
+        return _as_text(value)
+
+    @model_validator(mode="after")
+    def _answer_is_option(self):
+        if self.answer not in self.options:
+            raise ValueError("answer is not one of the options")
+        return self
+
+class Quiz(BaseModel):
+    quiz: List[QuizQuestion]
+
+    @field_validator("quiz", mode="before")
+    @classmethod
+    def _items(cls, value):
+        return _valid_items(QuizQuestion, value)
+
+class InterviewQuestion(BaseModel):
+    question: str
+    answer: str
+
+    @field_validator("question", "answer", mode="before")
+    @classmethod
+    def _text(cls, value):
+        return _as_text(value)
+
+class InterviewQuestions(BaseModel):
+    questions: List[InterviewQuestion]
+
+    @field_validator("questions", mode="before")
+    @classmethod
+    def _items(cls, value):
+        return _valid_items(InterviewQuestion, value)
@@ -24,6 +24,9 @@ class VideoProcessRequest(BaseModel):
 class ChatRequest(BaseModel):
     question: str
     transcript: Optional[List[dict]] = None
+    # Scope of the vector search when no transcript is sent
+    video_id: Optional[str] = None
+    video_ids: Optional[List[str]] = None
 
 class CaptureFrameRequest(BaseModel):
     url: str
@@ -1,11 +1,11 @@
 from app.services.embedding_service import search_sections
 from app.services.llm_service import chat_with_context
 
-async def ask_lecture_question(question: str, transcript=None):
+async def ask_lecture_question(question: str, transcript=None, video_id: str = None, video_ids: list[str] = None):
     """
     RAG pipeline:
     - If transcript provided, use it directly (faster)
-    - Otherwise, use embedding search
+    - Otherwise, use embedding search (scoped to video_id / video_ids)
     """
     if transcript and len(transcript) > 0:
         
@@ -17,7 +17,7 @@ async def ask_lecture_question(question: str, transcript=None):
         }
     else:
         
-        relevant_sections = search_sections(question)
+        relevant_sections = await search_sections(question, video_id=video_id, video_ids=video_ids)
         answer = await chat_with_context(question, relevant_sections)
         return {
             "answer": answer,
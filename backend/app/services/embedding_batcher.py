@@ -0,0 +1,119 @@
+"""
+Micro-batched embedding executor.
+
+Encoding is CPU-bound. Run on the event loop it stalls every other request;
+run per call in asyncio.to_thread, concurrent users fight over the CPU with
+many tiny batches. EmbeddingBatcher sends all encodes through one dedicated
+thread: requests arriving within a short window (chat queries, section
+batches, novelty checks) are joined into one batch of up to `max_batch`
+texts, which is much cheaper per text than encoding them one by one.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+class EmbeddingBatcher:
+    def __init__(self, encode, max_batch: int = 64, window: float = 0.005):
+        """
+        `encode(list[str]) -> np.ndarray` runs on the batcher's thread.
+        `window` is how long (seconds) the first request of a batch waits
+        for company.
+        """
+        self.encode = encode
+        self.max_batch = max(1, max_batch)
+        self.window = window
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self.batches = 0
+        self.texts = 0
+        self.busy_seconds = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def encode_async(self, texts: list[str]) -> np.ndarray:
+        """
+        Embeddings for `texts`, in order. Requests larger than max_batch
+        are split, so a big section batch doesn't hold a chat query back
+        for its whole duration.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        self._ensure_worker()
+        futures = []
+        for i in range(0, len(texts), self.max_batch):
+            future = self._loop.create_future()
+            self._queue.put_nowait((texts[i:i + self.max_batch], future))
+            futures.append(future)
+        parts = await asyncio.gather(*futures)
+        return parts[0] if len(parts) == 1 else np.vstack(parts)
+
+    async def _collect(self, first):
+        """
+        `first` plus whatever else arrives within the window, up to
+        max_batch texts. Returns (batch, request left over for the next one).
+        """
+        batch, size = [first], len(first[0])
+        deadline = self._loop.time() + self.window
+        while size < self.max_batch:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                remaining = deadline - self._loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            if size + len(item[0]) > self.max_batch:
+                return batch, item
+            batch.append(item)
+            size += len(item[0])
+        return batch, None
+
+    async def _run(self):
+        carry = None
+        while True:
+            first = carry or await self._queue.get()
+            batch, carry = await self._collect(first)
+            # Callers that gave up (client disconnected) don't cost CPU
+            batch = [(texts, future) for texts, future in batch if not future.done()]
+            if not batch:
+                continue
+
+            texts = [text for chunk, _ in batch for text in chunk]
+            t0 = time.perf_counter()
+            try:
+                vectors = await self._loop.run_in_executor(self.executor, self.encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.texts += len(texts)
+            self.busy_seconds += time.perf_counter() - t0
+
+            offset = 0
+            for chunk, future in batch:
+                if not future.done():
+                    future.set_result(vectors[offset:offset + len(chunk)])
+                offset += len(chunk)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "texts": self.texts,
+            "avg_batch": round(self.texts / self.batches, 1) if self.batches else 0,
+            "busy_seconds": round(self.busy_seconds, 2),
+        }
@@ -0,0 +1,67 @@
+"""
+Content-addressed cache for text embeddings.
+
+Keys are a SHA-256 of (embedding model id, text); values are the vector as
+float16 bytes (768 bytes for MiniLM), in SQLite with an in-memory LRU in
+front for hot texts such as repeated chat questions (see core/cache.py).
+Re-processing a lecture, or sectioning it again with other settings,
+finds every vector here and does no embedding work.
+"""
+
+import hashlib
+import numpy as np
+from app.core.cache import DiskCache
+from app.core.config import (
+    CACHE_DIR,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_TTL,
+    EMBEDDING_CACHE_MAX_BYTES,
+    EMBEDDING_CACHE_MEMORY_ITEMS,
+)
+
+_cache = DiskCache(
+    CACHE_DIR / "embeddings.sqlite3",
+    ttl=EMBEDDING_CACHE_TTL,
+    max_bytes=EMBEDDING_CACHE_MAX_BYTES,
+    memory_items=EMBEDDING_CACHE_MEMORY_ITEMS,
+)
+
+def embedding_cache_key(model_id: str, text: str) -> str:
+    return "emb:" + hashlib.sha256(f"{model_id}\n{text}".encode("utf-8")).hexdigest()
+
+def cached_encode(texts, encode, model_id: str) -> np.ndarray:
+    """
+    Embeddings for `texts` (float32, in order). Only texts missing from the
+    cache are passed to `encode`; their vectors are stored. Every vector
+    goes through float16, so a text gets the same vector hit or miss.
+    """
+    texts = list(texts)
+    if not EMBEDDING_CACHE_ENABLED or not texts:
+        return encode(texts)
+
+    keys = [embedding_cache_key(model_id, text) for text in texts]
+    vectors = [None] * len(texts)
+    missing = []
+    for i, key in enumerate(keys):
+        raw = _cache.get(key)
+        if raw is not None:
+            vectors[i] = np.frombuffer(raw, dtype=np.float16)
+        else:
+            missing.append(i)
+
+    if missing:
+        # Same text twice in one call (e.g. concurrent identical questions): encode once
+        unique = list(dict.fromkeys(texts[i] for i in missing))
+        fresh = dict(zip(unique, np.asarray(encode(unique), dtype=np.float16)))
+        for i in missing:
+            vectors[i] = fresh[texts[i]]
+        for text, vector in fresh.items():
+            try:
+                _cache.set(embedding_cache_key(model_id, text), vector.tobytes())
+            except Exception as e:
+                print(f"⚠️ Embedding cache write failed: {e}")
+
+    return np.vstack(vectors).astype(np.float32)
+
+def embedding_cache_stats() -> dict:
+    return _cache.stats()
@@ -1,37 +1,213 @@
-from sentence_transformers import SentenceTransformer
-import chromadb
+"""
+Sentence embeddings and the Chroma store for lecture chat.
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+The model (EMBEDDING_BACKEND: Torch, ONNX or int8 ONNX) and the Chroma
+client are created on first use (or by warm_up() in the background at
+startup), not at import: importing this module must stay cheap so a
+worker can answer /health right after it boots.
 
-chroma_client = chromadb.Client()
-collection = chroma_client.get_or_create_collection("lecture_notes")
+The store persists under VECTOR_STORE_DIR. Each section is one record with
+id "<video_id>:<section_index>:<content_hash>" and metadata (video_id,
+section_index, start, end, title), so lectures don't overwrite each other,
+queries can be scoped to one lecture or a library, and re-processing a
+lecture only embeds the sections whose text changed.
+"""
 
-def create_embeddings_for_sections(sections):
+import asyncio
+import hashlib
+import threading
+import time
+from app.core.config import (
+    VECTOR_STORE_PERSISTENT,
+    VECTOR_STORE_DIR,
+    EMBED_MAX_BATCH,
+    EMBED_BATCH_WINDOW_MS,
+    EMBEDDING_BACKEND,
+    EMBEDDING_ONNX_FILE,
+    EMBEDDING_ONNX_INT8_FILE,
+    EMBEDDING_THREADS,
+)
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.embedding_cache import cached_encode, embedding_cache_stats
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+EMBEDDING_REPO_ID = f"sentence-transformers/{EMBEDDING_MODEL_NAME}"
+# Backends give slightly different vectors: stored ones are tied to this
+EMBEDDING_MODEL_ID = f"{EMBEDDING_MODEL_NAME}:{EMBEDDING_BACKEND}"
+
+_model = None
+_collection = None
+_model_lock = threading.Lock()
+_store_lock = threading.Lock()
+_load_seconds = None
+
+def load_model(backend: str = EMBEDDING_BACKEND):
+    """
+    A fresh encoder for `backend` ("torch", "onnx", "onnx-int8"); both
+    kinds expose SentenceTransformer's encode().
+    """
+    if backend in ("onnx", "onnx-int8"):
+        from app.services.onnx_embedder import OnnxSentenceEncoder
+        file_name = EMBEDDING_ONNX_INT8_FILE if backend == "onnx-int8" else EMBEDDING_ONNX_FILE
+        return OnnxSentenceEncoder(EMBEDDING_REPO_ID, file_name, threads=EMBEDDING_THREADS)
+    if backend != "torch":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend}")
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME)
+
+def get_model():
+    """
+    The embedding model, loaded once (thread-safe).
+    """
+    global _model, _load_seconds
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                t0 = time.time()
+                _model = load_model()
+                _load_seconds = round(time.time() - t0, 2)
+                print(f"🧠 Embedding model ({EMBEDDING_BACKEND}) loaded in {_load_seconds}s")
+    return _model
+
+def get_collection():
+    global _collection
+    if _collection is None:
+        with _store_lock:
+            if _collection is None:
+                import chromadb
+                if VECTOR_STORE_PERSISTENT:
+                    VECTOR_STORE_DIR.mkdir(parents=True, exist_ok=True)
+                    chroma_client = chromadb.PersistentClient(path=str(VECTOR_STORE_DIR))
+                else:
+                    chroma_client = chromadb.Client()
+                # Vectors are normalized: cosine distance
+                _collection = chroma_client.get_or_create_collection(
+                    "lecture_sections", metadata={"hnsw:space": "cosine"}
+                )
+    return _collection
+
+def is_ready() -> bool:
+    return _model is not None and _collection is not None
+
+def warm_up():
+    """
+    Load the model and the store and run one encode, so the first real
+    request doesn't pay for it. Blocking: run it in a thread.
+    """
+    get_collection()
+    get_model().encode(["warm up"], show_progress_bar=False)
+
+def embedding_stats() -> dict:
+    return {
+        "model": EMBEDDING_MODEL_NAME,
+        "backend": EMBEDDING_BACKEND,
+        "model_loaded": _model is not None,
+        "store_ready": _collection is not None,
+        "load_seconds": _load_seconds,
+        "executor": EMBEDDER.stats(),
+        "cache": embedding_cache_stats(),
+    }
+
+def _encode_uncached(texts):
+    return get_model().encode(
+        texts,
+        batch_size=64,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    )
+
+def encode_texts(texts):
+    """
+    Batch-encode texts into L2-normalized float32 vectors (CPU friendly).
+    Texts seen before come from the embedding cache; the model is only
+    loaded and run for new ones.
+    """
+    return cached_encode(texts, _encode_uncached, EMBEDDING_MODEL_ID)
+
+# All encodes from async code go through one thread, in micro-batches
+EMBEDDER = EmbeddingBatcher(encode_texts, max_batch=EMBED_MAX_BATCH, window=EMBED_BATCH_WINDOW_MS / 1000)
+
+async def encode_texts_async(texts):
     """
-    Store section text embeddings in Chroma.
+    encode_texts without blocking the event loop.
     """
+    return await EMBEDDER.encode_async(texts)
 
-    docs = [s["text"] for s in sections]
-    ids = [f"section_{i}" for i in range(len(sections))]
+def content_hash(text: str) -> str:
+    # The model is part of the hash: switching models/backends re-embeds everything
+    return hashlib.sha256(f"{EMBEDDING_MODEL_ID}\n{text}".encode("utf-8")).hexdigest()[:16]
 
-    embeddings = model.encode(docs).tolist()
+def section_record_id(video_id: str, section_index: int, text: str) -> str:
+    return f"{video_id}:{section_index}:{content_hash(text)}"
 
-    collection.add(
+async def create_embeddings_for_sections(sections, video_id: str):
+    """
+    Upsert a lecture's section embeddings. Sections already stored with the
+    same text are skipped; records of the lecture that no longer match a
+    section (text changed, fewer sections) are removed. Lectures without a
+    real video id are not indexed: they would share one id space and
+    delete each other's records.
+    """
+    if not video_id or video_id == "unknown":
+        print("⚠️ Vector store: no video id, skipping embeddings")
+        return
+
+    # Chroma calls are blocking (SQLite + index files)
+    collection = await asyncio.to_thread(get_collection)
+    ids = [section_record_id(video_id, i, s["text"]) for i, s in enumerate(sections)]
+
+    stored = await asyncio.to_thread(collection.get, where={"video_id": video_id}, include=[])
+    stored = set(stored["ids"])
+    stale = list(stored - set(ids))
+    if stale:
+        await asyncio.to_thread(collection.delete, ids=stale)
+
+    new = [i for i, record_id in enumerate(ids) if record_id not in stored]
+    print(f"🗂️ Vector store: {video_id} has {len(sections)} sections, embedding {len(new)}, removed {len(stale)}")
+    if not new:
+        return
+
+    docs = [sections[i]["text"] for i in new]
+    embeddings = await encode_texts_async(docs)
+    await asyncio.to_thread(
+        collection.upsert,
+        ids=[ids[i] for i in new],
         documents=docs,
-        embeddings=embeddings,
-        ids=ids
+        embeddings=embeddings.tolist(),
+        metadatas=[
+            {
+                "video_id": video_id,
+                "section_index": i,
+                "start": float(sections[i].get("start", 0)),
+                "end": float(sections[i].get("end", 0)),
+                "title": sections[i].get("title") or "",
+            }
+            for i in new
+        ]
     )
 
-def search_sections(query, k=3):
+def _scope(video_id: str = None, video_ids: list[str] = None):
+    if video_id:
+        return {"video_id": video_id}
+    if video_ids:
+        return {"video_id": {"$in": list(video_ids)}}
+    return None
+
+async def search_sections(query, k=3, video_id: str = None, video_ids: list[str] = None):
     """
-    Retrieve most relevant sections.
+    Retrieve most relevant sections, optionally only from one lecture
+    (video_id) or a library of lectures (video_ids).
     """
 
-    query_embedding = model.encode([query]).tolist()
+    query_embedding = (await encode_texts_async([query])).tolist()
+    collection = await asyncio.to_thread(get_collection)
 
-    results = collection.query(
+    results = await asyncio.to_thread(
+        collection.query,
         query_embeddings=query_embedding,
-        n_results=k
+        n_results=k,
+        where=_scope(video_id, video_ids)
     )
 
     return results["documents"][0]
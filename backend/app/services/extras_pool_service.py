@@ -0,0 +1,130 @@
+"""
+"More questions" for quiz, flashcards and interview without repeats.
+
+Asking the model to avoid a growing list of existing items makes every
+round's prompt longer and still lets duplicates through. Instead:
+- ask once for more items than needed (NOVELTY_OVERGENERATE_FACTOR)
+- drop items whose question embedding is too close to anything the user
+  already has or to an item kept before it (cosine >= threshold)
+- serve `count` items and keep the rest in a pool per notes hash, so the
+  next rounds are answered locally with no LLM call
+"""
+
+import asyncio
+import weakref
+import numpy as np
+import orjson
+from app.core.config import (
+    NOVELTY_OVERGENERATE_FACTOR,
+    NOVELTY_SIMILARITY_THRESHOLD,
+    NOVELTY_PROMPT_EXCLUSIONS,
+)
+from app.services.llm_cache import get_cached_completion, store_completion
+from app.services.llm_service import generate_flashcards, generate_quiz, generate_interview_questions, result_cache_key
+from app.services.study_pack_service import PART_ITEMS, notes_hash
+from app.services.summary_tree_service import lecture_digest
+
+GENERATORS = {
+    "flashcards": generate_flashcards,
+    "quiz": generate_quiz,
+    "interview": generate_interview_questions,
+}
+
+# One round at a time per pool, so parallel "more" clicks don't serve the same items
+_locks = weakref.WeakValueDictionary()
+
+def _key(notes_text: str, language: str, part: str):
+    return result_cache_key(f"extras_pool:{part}", notes_hash(notes_text, language))
+
+def load_pool(key) -> list[dict]:
+    raw = get_cached_completion(key) if key else None
+    return orjson.loads(raw) if raw is not None else []
+
+def save_pool(key, items: list[dict]):
+    if key:
+        store_completion(key, orjson.dumps(items).decode("utf-8"))
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+async def _embed(texts: list[str]):
+    from app.services.embedding_service import encode_texts_async
+    return await encode_texts_async(texts)
+
+async def novel_items(candidates: list[dict], existing: list[str], threshold: float = NOVELTY_SIMILARITY_THRESHOLD) -> list[dict]:
+    """
+    Candidates (in order) whose question isn't a near-duplicate of an
+    existing question or of a candidate already kept.
+    """
+    candidates = [item for item in candidates if item.get("question")]
+    if not candidates:
+        return []
+    questions = [item["question"] for item in candidates]
+
+    try:
+        vectors = await _embed(list(existing) + questions)
+    except Exception as e:
+        print(f"⚠️ Novelty filter falling back to exact match: {e}")
+        seen = {_normalize(text) for text in existing}
+        kept = []
+        for item, question in zip(candidates, questions):
+            if _normalize(question) not in seen:
+                seen.add(_normalize(question))
+                kept.append(item)
+        return kept
+
+    # Vectors are L2-normalized: dot product == cosine similarity
+    reference = list(range(len(existing)))
+    kept = []
+    for index, item in enumerate(candidates, start=len(existing)):
+        if reference and float(np.max(vectors[reference] @ vectors[index])) >= threshold:
+            continue
+        reference.append(index)
+        kept.append(item)
+    return kept
+
+async def generate_more(
+    part: str,
+    notes_text: str,
+    language: str = "English",
+    count: int = 5,
+    seed: int = 0,
+    existing_items: list[str] = None,
+    section_summaries: list[str] = None,
+):
+    """
+    `count` new items for a part ("quiz", "flashcards", "interview"), in
+    the same shape as its generator. Served from the pool when it holds
+    enough novel items, otherwise from one over-generated LLM call on the
+    lecture digest.
+    """
+    items_key = PART_ITEMS[part]
+    existing = list(existing_items or [])
+    key = _key(notes_text, language, part)
+    lock = _locks.setdefault(key or f"{part}:{notes_hash(notes_text, language)}", asyncio.Lock())
+
+    async with lock:
+        pool = await novel_items(load_pool(key), existing)
+        if len(pool) >= count:
+            print(f"♻️ {part}: {count} items served from pool ({len(pool) - count} left)")
+        else:
+            ask = max(count, round(count * NOVELTY_OVERGENERATE_FACTOR))
+            result = await GENERATORS[part](
+                await lecture_digest(notes_text, language, section_summaries), language,
+                count=ask,
+                seed=seed,
+                # The embedding filter does the real deduplication; keep the prompt short
+                existing_items=existing[-NOVELTY_PROMPT_EXCLUSIONS:],
+            )
+            generated = result.get(items_key, [])
+            fresh = await novel_items(generated, existing + [item["question"] for item in pool])
+            print(f"🧹 {part}: kept {len(fresh)}/{len(generated)} generated items as novel")
+            pool += fresh
+            if not pool:
+                # Everything looked like a repeat; better than returning nothing
+                pool = generated
+
+        served, rest = pool[:count], pool[count:]
+        save_pool(key, rest)
+
+    return {items_key: served}
@@ -0,0 +1,229 @@
+"""
+Deterministic fake LLM for offline benchmarks and load tests.
+
+`fake_completion(messages)` recognises the prompts llm_service sends (notes,
+batched notes, study pack, TLDR, flashcards, quiz, interview, chat) and returns a
+response of the right shape, built from words of the prompt and seeded by
+its hash: the same prompt always gets the same answer.
+
+Two ways to use it:
+- LLM_PROVIDERS=fake: in-process backend (llm_providers.FakeBackend)
+- a Groq-compatible HTTP server with RPM/TPM limits, x-ratelimit-*
+  headers, 429 + retry-after and SSE streaming, for exercising the real
+  Groq client, rate limiter and key balancing:
+
+      python -m app.services.fake_llm --port 8001 --rpm 30 --tpm 6000
+      GROQ_BASE_URL=http://127.0.0.1:8001 GROQ_API_KEYS=fake-a,fake-b uvicorn app.main:app
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from ai_pipeline.tokens import count_tokens
+
+WORD_RE = re.compile(r"[^\W\d_]{4,}")
+COUNT_RE = re.compile(r"exactly (\d+)")
+SECTION_COUNT_RE = re.compile(r"EACH of the (\d+) lecture sections")
+
+def _rng(prompt: str) -> random.Random:
+    return random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+def _vocabulary(prompt: str) -> list[str]:
+    # Words of the material itself, not of the instructions
+    for marker in ("Text:", "Notes:", "Lecture Context:"):
+        if marker in prompt:
+            prompt = prompt.rsplit(marker, 1)[1]
+            break
+    words = WORD_RE.findall(prompt)
+    return words or ["lecture", "concept", "example", "method", "result"]
+
+def _sentence(rng: random.Random, words: list[str], n: int = 10) -> str:
+    return " ".join(rng.choice(words) for _ in range(n)).capitalize() + "."
+
+def _note(rng, words):
+    return {
+        "title": " ".join(rng.choice(words) for _ in range(3)).title(),
+        "summary": _sentence(rng, words, 12),
+        "explanation": " ".join(_sentence(rng, words) for _ in range(4)),
+        "bullet_notes": [_sentence(rng, words, 8) for _ in range(4)],
+        "examples": [_sentence(rng, words, 8)],
+        "key_concepts": [rng.choice(words).title() for _ in range(3)],
+        "difficulty": rng.choice(["Beginner", "Intermediate", "Advanced"]),
+    }
+
+def _flashcards(rng, words, count):
+    return [{"question": rng.choice(words).title(), "answer": _sentence(rng, words)} for _ in range(count)]
+
+def _quiz(rng, words, count):
+    quiz = []
+    for _ in range(count):
+        options = [rng.choice(words).title() for _ in range(4)]
+        quiz.append({"question": _sentence(rng, words, 8)[:-1] + "?", "options": options, "answer": options[0]})
+    return quiz
+
+def _interview(rng, words, count):
+    return [
+        {"question": _sentence(rng, words, 8)[:-1] + "?", "answer": " ".join(_sentence(rng, words) for _ in range(3))}
+        for _ in range(count)
+    ]
+
+def _tldr(rng, words):
+    return [_sentence(rng, words, 12) for _ in range(5)]
+
+def _count(prompt: str, default: int = 5) -> int:
+    match = COUNT_RE.search(prompt)
+    return int(match.group(1)) if match else default
+
+def fake_completion(messages: list[dict]) -> str:
+    prompt = "\n".join(m.get("content") or "" for m in messages)
+    rng = _rng(prompt)
+    words = _vocabulary(prompt)
+
+    if (match := SECTION_COUNT_RE.search(prompt)):
+        result = {str(i): _note(rng, words) for i in range(int(match.group(1)))}
+    elif "Create notes from lecture section" in prompt:
+        result = _note(rng, words)
+    elif "Create a study pack" in prompt:
+        counts = [int(n) for n in COUNT_RE.findall(prompt)] + [5, 5, 5]
+        result = {
+            "tldr": _tldr(rng, words),
+            "flashcards": _flashcards(rng, words, counts[0]),
+            "quiz": _quiz(rng, words, counts[1]),
+            "questions": _interview(rng, words, counts[2]),
+        }
+    elif '"flashcards"' in prompt:
+        result = {"flashcards": _flashcards(rng, words, _count(prompt))}
+    elif '"quiz"' in prompt:
+        result = {"quiz": _quiz(rng, words, _count(prompt))}
+    elif '"questions"' in prompt:
+        result = {"questions": _interview(rng, words, _count(prompt))}
+    elif '"tldr"' in prompt:
+        result = {"tldr": _tldr(rng, words)}
+    elif '"title"' in prompt:
+        result = {"title": " ".join(rng.choice(words) for _ in range(3)).title(), "summary": _sentence(rng, words, 12)}
+    else:
+        return " ".join(_sentence(rng, words) for _ in range(3))
+
+    return json.dumps(result, ensure_ascii=False)
+
+def truncate_completion(text: str, max_tokens: int = None) -> tuple[str, str]:
+    """
+    Cut like a real model hitting max_tokens. Returns (text, finish_reason).
+    """
+    if max_tokens and count_tokens(text) > max_tokens:
+        return text[:max_tokens * 4], "length"
+    return text, "stop"
+
+def create_app(rpm: int = 30, tpm: int = 6000, latency: float = 0.3, tokens_per_second: float = 800.0):
+    """
+    FastAPI app serving POST /openai/v1/chat/completions the way Groq does.
+    Limits are per API key (Authorization header).
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+    from app.services.rate_limiter import TokenBucket
+
+    app = FastAPI(title="Noteflix fake LLM")
+    buckets = {}
+
+    def limit_headers(requests, tokens):
+        return {
+            "x-ratelimit-limit-requests": str(rpm),
+            "x-ratelimit-remaining-requests": str(max(0, int(requests.tokens))),
+            "x-ratelimit-reset-requests": f"{max(0.0, (1 - requests.tokens) / requests.rate):.2f}s",
+            "x-ratelimit-limit-tokens": str(tpm),
+            "x-ratelimit-remaining-tokens": str(max(0, int(tokens.tokens))),
+            "x-ratelimit-reset-tokens": f"{max(0.0, (tpm - tokens.tokens) / tokens.rate):.2f}s",
+        }
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        key = request.headers.get("authorization", "")
+        requests, tokens = buckets.setdefault(key, (TokenBucket(rpm), TokenBucket(tpm)))
+
+        messages = body.get("messages", [])
+        prompt_tokens = sum(count_tokens(m.get("content") or "") for m in messages)
+        reserved = prompt_tokens + (body.get("max_tokens") or 1024)
+        if reserved > tpm:
+            return JSONResponse(status_code=413, content={"error": {
+                "message": f"Request too large: {reserved} tokens > {tpm} TPM",
+                "type": "tokens", "code": "rate_limit_exceeded",
+            }})
+
+        wait = max(requests.wait_time(1), tokens.wait_time(reserved))
+        if wait > 0:
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": f"{wait:.2f}", **limit_headers(requests, tokens)},
+                content={"error": {"message": "Rate limit reached", "type": "tokens", "code": "rate_limit_exceeded"}},
+            )
+        requests.consume(1)
+        tokens.consume(reserved)
+
+        text, finish_reason = truncate_completion(fake_completion(messages), body.get("max_tokens"))
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": count_tokens(text),
+            "total_tokens": prompt_tokens + count_tokens(text),
+        }
+        created = int(time.time())
+        headers = limit_headers(requests, tokens)
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency + usage["completion_tokens"] / tokens_per_second)
+            return JSONResponse(headers=headers, content={
+                "id": "fake-" + hashlib.md5(text.encode()).hexdigest(),
+                "object": "chat.completion",
+                "created": created,
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "finish_reason": finish_reason, "message": {"role": "assistant", "content": text}}],
+                "usage": usage,
+            })
+
+        async def events():
+            await asyncio.sleep(latency)
+            step = 16
+            for i in range(0, len(text), step):
+                piece = text[i:i + step]
+                await asyncio.sleep(count_tokens(piece) / tokens_per_second)
+                chunk = {
+                    "id": "fake", "object": "chat.completion.chunk", "created": created,
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            last = {
+                "id": "fake", "object": "chat.completion.chunk", "created": created,
+                "model": body.get("model", "fake"),
+                "choices": [{"index": 0, "delta": {}, "finish_reason": finish_reason}],
+                "x_groq": {"id": "fake", "usage": usage},
+            }
+            yield f"data: {json.dumps(last)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), headers=headers, media_type="text/event-stream")
+
+    return app
+
+if __name__ == "__main__":
+    import argparse
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic Groq-compatible fake LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--rpm", type=int, default=30)
+    parser.add_argument("--tpm", type=int, default=6000)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--tokens-per-second", type=float, default=800.0)
+    args = parser.parse_args()
+
+    uvicorn.run(
+        create_app(args.rpm, args.tpm, args.latency, args.tokens_per_second),
+        host=args.host,
+        port=args.port,
+    )
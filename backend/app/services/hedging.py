@@ -0,0 +1,174 @@
+"""
+Hedged execution of interchangeable async strategies.
+
+Used by the acquisition layer to get a transcript/metadata from whichever
+source answers first instead of waiting for each fallback in turn.
+
+Modes:
+- "sequential": start the next strategy only after the previous one failed
+- "hedged": also start the next one if the current one is slower than `hedge_delay`
+- "race": start every strategy at once
+
+The first valid result wins and the remaining tasks are cancelled.
+Latency and success rate of every strategy are tracked so the ordering
+adapts to whatever is currently fastest/most reliable (e.g. when YouTube
+starts blocking one of the methods).
+"""
+
+import asyncio
+import time
+
+MODES = ("sequential", "hedged", "race")
+
+class StrategyStats:
+    """
+    Running latency (EWMA) and success rate for one strategy.
+    """
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.attempts = 0
+        self.successes = 0
+        self.ewma_latency = None
+
+    def record(self, latency: float, ok: bool):
+        self.attempts += 1
+        if ok:
+            self.successes += 1
+            self._observe(latency)
+
+    def record_lost(self, elapsed: float):
+        """
+        Cancelled because another strategy won: a failed attempt that took
+        at least `elapsed`.
+        """
+        self.attempts += 1
+        if self.ewma_latency is None or elapsed > self.ewma_latency:
+            self._observe(elapsed)
+
+    def _observe(self, latency: float):
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = self.alpha * latency + (1 - self.alpha) * self.ewma_latency
+
+    @property
+    def success_rate(self) -> float:
+        return self.successes / self.attempts if self.attempts else 0.0
+
+    def expected_cost(self) -> float:
+        """
+        Expected time to a valid result; unreliable strategies cost more.
+        """
+        latency = self.ewma_latency if self.ewma_latency is not None else 60.0
+        return latency / max(self.success_rate, 0.05)
+
+    def to_dict(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "success_rate": round(self.success_rate, 3),
+            "ewma_latency": round(self.ewma_latency, 3) if self.ewma_latency is not None else None,
+        }
+
+_stats: dict[str, StrategyStats] = {}
+
+def get_stats(name: str) -> StrategyStats:
+    if name not in _stats:
+        _stats[name] = StrategyStats()
+    return _stats[name]
+
+def strategy_stats() -> dict:
+    return {name: stats.to_dict() for name, stats in _stats.items()}
+
+def order_strategies(strategies: list, min_samples: int = 5) -> list:
+    """
+    Sort (name, factory) pairs by expected cost among the strategies with
+    enough samples; the others keep their configured position.
+    """
+    sampled = [i for i, (name, _) in enumerate(strategies) if get_stats(name).attempts >= min_samples]
+    ordered = list(strategies)
+    ranked = sorted((strategies[i] for i in sampled), key=lambda s: get_stats(s[0]).expected_cost())
+    for i, strategy in zip(sampled, ranked):
+        ordered[i] = strategy
+    return ordered
+
+async def _timed(name: str, factory, validate):
+    t0 = time.perf_counter()
+    try:
+        result = await factory()
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        get_stats(name).record(time.perf_counter() - t0, False)
+        raise
+
+    ok = validate(result)
+    get_stats(name).record(time.perf_counter() - t0, ok)
+    if not ok:
+        raise ValueError(f"{name} returned an empty/invalid result")
+    return result
+
+async def run_strategies(strategies: list, mode: str = "hedged", hedge_delay: float = 3.0, validate=bool, adaptive: bool = True):
+    """
+    Run (name, factory) strategies according to `mode` and return
+    (name, result) for the first valid result.
+    `factory` is a zero-arg callable returning a coroutine.
+    Raises the last error if every strategy fails.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown hedging mode: {mode}")
+
+    queue = order_strategies(strategies) if adaptive else list(strategies)
+    if mode == "race":
+        delay = 0
+    elif mode == "hedged":
+        delay = hedge_delay
+    else:
+        delay = None
+
+    pending = {}
+    started = {}
+    last_error = None
+    winner = None
+
+    def launch():
+        name, factory = queue.pop(0)
+        task = asyncio.create_task(_timed(name, factory, validate))
+        pending[task] = name
+        started[task] = time.perf_counter()
+
+    try:
+        launch()
+        while pending or queue:
+            if not pending:
+                launch()
+                continue
+
+            done, _ = await asyncio.wait(
+                pending.keys(),
+                timeout=delay if queue else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                # Current strategies are slow -> hedge with the next one
+                if delay:
+                    print(f"⏱️ Hedging: starting {queue[0][0]} alongside {', '.join(pending.values())}")
+                launch()
+                continue
+
+            for task in done:
+                name = pending.pop(task)
+                if task.exception() is None:
+                    winner = name
+                    return name, task.result()
+                last_error = task.exception()
+                print(f"{name} failed: {last_error!r}")
+    finally:
+        for task, name in pending.items():
+            task.cancel()
+            # Losers count too, or a slow primary would never be demoted
+            if winner is not None:
+                get_stats(name).record_lost(time.perf_counter() - started[task])
+
+    raise last_error or Exception("No strategies to run")
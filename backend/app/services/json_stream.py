@@ -0,0 +1,243 @@
+"""
+JSON helpers for LLM output.
+
+`extract_json_object(text)` finds the first JSON object in messy output in
+a single pass and repairs objects cut off by max_tokens.
+
+`JSONFieldStream` is an incremental parser for a JSON object streamed
+token by token.
+
+LLM notes come back as one flat object:
+    {"title": "...", "summary": "...", "bullet_notes": ["...", ...], ...}
+
+`JSONFieldStream.feed(chunk)` returns events as soon as they are complete:
+- ("field", key, value) when a top-level value finishes (arrays excluded)
+- ("item", key, value) when an element of a top-level array finishes
+
+With nested=True, top-level values that are objects (batched notes:
+{"0": {...notes...}, "1": {...}}) are also streamed through a child
+parser, whose events come out with key (outer_key, inner_key).
+
+Every character is scanned once (string/escape state and nesting depth are
+kept between chunks), and each completed fragment is decoded once with
+json.loads, so the total cost stays linear in the response length.
+Text before the first "{" (e.g. a ```json fence) is ignored; fragments
+that don't decode are skipped, the final result still goes through
+safe_json_loads.
+"""
+
+import json
+import re
+
+WHITESPACE = " \t\r\n"
+TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+
+def _loads(text: str):
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    # Most common model mistake: trailing commas
+    try:
+        return json.loads(TRAILING_COMMA_RE.sub(r"\1", text))
+    except json.JSONDecodeError:
+        return None
+
+def _repair_truncated(tail: str, closers: str, in_string: bool, escape: bool, safe_end: int):
+    """
+    Close a JSON object that ran off the end of the text:
+    1. close the open string (keeps a partial value) and the open brackets
+    2. else cut back to the last complete value and close from there
+    """
+    fixed = tail
+    if in_string:
+        if escape:
+            fixed = fixed[:-1]
+        fixed += '"'
+    fixed = fixed.rstrip(WHITESPACE).rstrip(",")
+    result = _loads(fixed + closers)
+    if result is None and safe_end is not None:
+        result = _loads(tail[:safe_end].rstrip(WHITESPACE).rstrip(",") + closers)
+    return result
+
+def extract_json_object(text: str):
+    """
+    First decodable JSON object in `text`, found in one pass.
+
+    Every character is scanned once: a balanced candidate is decoded once
+    and, if it isn't valid JSON, scanning resumes after it rather than at
+    the next "{" inside it. An object truncated at the end of the text is
+    repaired instead of discarded. Raises ValueError if nothing is found.
+    """
+    n = len(text)
+    i = text.find("{")
+    while i != -1:
+        start = i
+        stack = []
+        in_string = escape = False
+        # text[start:safe_end] + closers is a complete value. The stack only
+        # changes at brackets, which also move safe_end, so the current
+        # stack is always the one that belongs to safe_end.
+        safe_end = None
+        j = start
+        while j < n:
+            c = text[j]
+            if in_string:
+                if escape:
+                    escape = False
+                elif c == "\\":
+                    escape = True
+                elif c == '"':
+                    in_string = False
+            elif c == '"':
+                in_string = True
+            elif c in "{[":
+                stack.append("}" if c == "{" else "]")
+                safe_end = j + 1 - start
+            elif c in "}]":
+                if c != stack[-1]:
+                    break
+                stack.pop()
+                if not stack:
+                    result = _loads(text[start:j + 1])
+                    if isinstance(result, dict):
+                        return result
+                    break
+                safe_end = j + 1 - start
+            elif c == ",":
+                safe_end = j - start
+            j += 1
+        else:
+            result = _repair_truncated(text[start:], "".join(reversed(stack)), in_string, escape, safe_end)
+            if isinstance(result, dict):
+                return result
+            break
+
+        i = text.find("{", j + 1)
+
+    raise ValueError("No JSON object found")
+
+class JSONFieldStream:
+    def __init__(self, nested: bool = False):
+        self.nested = nested
+        self.child = None
+        self.child_key = None
+        self.child_fed = 0
+        self.buffer = ""
+        self.pos = 0
+        self.started = False
+        self.done = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.expect_key = True
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.in_array = False
+        self.item_start = None
+
+    def feed(self, chunk: str) -> list[tuple]:
+        if self.done or not chunk:
+            return []
+
+        self.buffer += chunk
+        buffer = self.buffer
+        events = []
+
+        for i in range(self.pos, len(buffer)):
+            c = buffer[i]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    if self.key_start is not None:
+                        self.key = self._decode(self.key_start, i + 1)
+                        self.key_start = None
+                continue
+
+            if not self.started:
+                if c == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+
+            if c in WHITESPACE:
+                continue
+
+            # First character of a top-level value or of an array item
+            if c not in ",:]}":
+                if self.depth == 1 and not self.expect_key and self.value_start is None:
+                    self.value_start = i
+                    if c == "{" and self.nested:
+                        self.child = JSONFieldStream()
+                        self.child_key = self.key
+                        self.child_fed = i
+                elif self.depth == 2 and self.in_array and self.item_start is None:
+                    self.item_start = i
+
+            if c == '"':
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.key_start = i
+            elif c == "[" and self.depth == 1 and not self.expect_key:
+                self.in_array = True
+                self.depth = 2
+            elif c in "{[":
+                self.depth += 1
+            elif c == "]" and self.depth == 2 and self.in_array:
+                self._emit_item(events, i)
+                self.in_array = False
+                self.depth = 1
+                self.value_start = None
+            elif c == "}" and self.depth == 1:
+                self._emit_field(events, i)
+                self.done = True
+                break
+            elif c in "}]":
+                self.depth -= 1
+            elif c == ",":
+                if self.depth == 1:
+                    self._emit_field(events, i)
+                    self.expect_key = True
+                elif self.depth == 2 and self.in_array:
+                    self._emit_item(events, i)
+            elif c == ":" and self.depth == 1 and self.expect_key:
+                self.expect_key = False
+                self.value_start = None
+
+        self._feed_child(events, len(buffer))
+        self.pos = len(buffer)
+        return events
+
+    def _feed_child(self, events, end: int):
+        if self.child is not None and end > self.child_fed:
+            for kind, key, value in self.child.feed(self.buffer[self.child_fed:end]):
+                events.append((kind, (self.child_key, key), value))
+            self.child_fed = end
+
+    def _decode(self, start: int, end: int):
+        try:
+            return json.loads(self.buffer[start:end])
+        except json.JSONDecodeError:
+            return None
+
+    def _emit_field(self, events, end: int):
+        self._feed_child(events, end)
+        self.child = None
+        if self.value_start is not None and self.key is not None:
+            value = self._decode(self.value_start, end)
+            if value is not None:
+                events.append(("field", self.key, value))
+        self.value_start = None
+
+    def _emit_item(self, events, end: int):
+        if self.item_start is not None and self.key is not None:
+            value = self._decode(self.item_start, end)
+            if value is not None:
+                events.append(("item", self.key, value))
+        self.item_start = None
@@ -0,0 +1,55 @@
+"""
+Content-addressed cache for LLM completions.
+
+Keys are a SHA-256 of (model, messages, temperature, max_tokens), so an
+identical prompt with identical settings is answered from disk instead of
+Groq. SQLite on disk with an in-memory LRU in front (see core/cache.py).
+"""
+
+import hashlib
+import orjson
+from app.core.cache import DiskCache
+from app.core.config import (
+    CACHE_DIR,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_BYTES,
+    LLM_CACHE_MEMORY_ITEMS,
+)
+
+_cache = DiskCache(
+    CACHE_DIR / "llm.sqlite3",
+    ttl=LLM_CACHE_TTL,
+    max_bytes=LLM_CACHE_MAX_BYTES,
+    memory_items=LLM_CACHE_MEMORY_ITEMS,
+)
+
+def llm_cache_key(model: str, messages: list[dict], temperature: float, max_tokens: int = None, **extra) -> str:
+    payload = orjson.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **extra,
+        },
+        option=orjson.OPT_SORT_KEYS,
+    )
+    return hashlib.sha256(payload).hexdigest()
+
+def get_cached_completion(key: str):
+    if not LLM_CACHE_ENABLED:
+        return None
+    raw = _cache.get(key)
+    return raw.decode("utf-8") if raw is not None else None
+
+def store_completion(key: str, text: str):
+    if not LLM_CACHE_ENABLED or not text:
+        return
+    try:
+        _cache.set(key, text.encode("utf-8"))
+    except Exception as e:
+        print(f"⚠️ LLM cache write failed: {e}")
+
+def llm_cache_stats() -> dict:
+    return _cache.stats()
@@ -0,0 +1,482 @@
+"""
+LLM provider layer.
+
+Every completion goes through LLM_ROUTER, which spreads calls over all
+configured backends:
+- one GroqBackend per key in GROQ_API_KEYS (or GROQ_API_KEY), each with
+  its own AdaptiveRateLimiter, since Groq limits are per key
+- GeminiBackend (google-genai, optional) when GEMINI_API_KEY is set
+- FakeBackend, the deterministic local fake (LLM_PROVIDERS=fake)
+
+The router picks the backend with the smallest expected wait (rate-limit
+budget, free slots, latency EWMA), skips backends in cooldown after
+repeated failures, and is the single retry layer: a 429 or transient
+error moves the call to another backend before anything is slept on.
+"""
+
+import asyncio
+import inspect
+import random
+import time
+import httpx
+from groq import (
+    AsyncGroq,
+    RateLimitError,
+    APITimeoutError,
+    APIConnectionError,
+    InternalServerError,
+    BadRequestError,
+    AuthenticationError,
+    PermissionDeniedError,
+)
+from ai_pipeline.tokens import count_tokens
+from app.core.config import (
+    LLM_PROVIDERS,
+    GROQ_API_KEYS,
+    GROQ_BASE_URL,
+    GROQ_RPM,
+    GROQ_TPM,
+    GROQ_MAX_CONCURRENCY,
+    GROQ_INITIAL_CONCURRENCY,
+    GEMINI_API_KEY,
+    GEMINI_MODEL,
+    GEMINI_RPM,
+    GEMINI_TPM,
+    FAKE_LLM_LATENCY,
+    FAKE_LLM_TOKENS_PER_SECOND,
+    LLM_TIMEOUT,
+    LLM_MAX_ATTEMPTS,
+    LLM_DEFAULT_COMPLETION_TOKENS,
+    LLM_BACKEND_COOLDOWN,
+)
+from app.services.rate_limiter import AdaptiveRateLimiter, parse_duration
+from app.services.token_budget import count_message_tokens
+from app.services.fake_llm import fake_completion, truncate_completion
+
+# Consecutive failures before a backend is put in cooldown
+FAILURES_BEFORE_COOLDOWN = 3
+# Cooldown for a key the provider rejects (revoked, no access to the model)
+DISABLED_COOLDOWN = 600.0
+
+class Usage:
+    __slots__ = ("prompt_tokens", "completion_tokens")
+
+    def __init__(self, prompt_tokens: int, completion_tokens: int):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+
+class RateLimited(Exception):
+    def __init__(self, retry_after: float = 0.0):
+        super().__init__(f"rate limited (retry after {retry_after:.1f}s)")
+        self.retry_after = retry_after
+
+class TransientLLMError(Exception):
+    """Timeout, connection error or 5xx: worth retrying elsewhere."""
+
+    def __init__(self, message: str = "", connect_failed: bool = False):
+        super().__init__(message)
+        # The request never reached the server: it used no quota
+        self.connect_failed = connect_failed
+
+class BackendUnavailable(Exception):
+    """The backend itself is unusable (bad key, no access)."""
+
+def estimate_request_tokens(request: dict) -> int:
+    """
+    Tokens a request counts against TPM: prompt + requested completion.
+    """
+    return count_message_tokens(request.get("messages", [])) + (request.get("max_tokens") or LLM_DEFAULT_COMPLETION_TOKENS)
+
+def failed_generation(error: BadRequestError):
+    """
+    Text Groq rejected in JSON mode ("json_validate_failed"), if any. It is
+    usually only slightly malformed, so it is repaired locally.
+    """
+    body = error.body if isinstance(error.body, dict) else {}
+    body = body.get("error", body) if isinstance(body.get("error"), dict) else body
+    if body.get("code") == "json_validate_failed":
+        return body.get("failed_generation")
+    return None
+
+class LLMBackend:
+    provider = "base"
+    # Whether answers may go to the shared LLM cache
+    cacheable = True
+
+    def __init__(self, name: str, model: str, rpm: int, tpm: int, max_concurrency: int = GROQ_MAX_CONCURRENCY, initial_concurrency: int = GROQ_INITIAL_CONCURRENCY):
+        self.name = name
+        self.model = model
+        self.limiter = AdaptiveRateLimiter(
+            rpm=rpm,
+            tpm=tpm,
+            max_concurrency=max_concurrency,
+            initial_concurrency=initial_concurrency,
+        )
+        self.latency = None
+        self.calls = 0
+        self.failures = 0
+        self.rate_limited = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.last_error = None
+
+    def cache_namespace(self, model: str) -> str:
+        """
+        Provider and model that actually answer a request for `model`:
+        cached answers are keyed by it, so one backend's output is never
+        served as another's.
+        """
+        return f"{self.provider}:{self.model or model}"
+
+    def available(self, now: float) -> bool:
+        return now >= self.cooldown_until
+
+    def expected_wait(self, estimated_tokens: int) -> float:
+        """
+        Seconds until this backend could likely finish a request: waiting
+        for rate-limit budget plus queueing behind in-flight calls.
+        """
+        limiter = self.limiter
+        budget_wait = max(
+            limiter.blocked_until - time.monotonic(),
+            limiter.requests.wait_time(1),
+            limiter.tokens.wait_time(estimated_tokens),
+            0.0,
+        )
+        queued = (limiter.in_flight + 1) / limiter.limit
+        return budget_wait + queued * (self.latency or 1.0)
+
+    def record_success(self, latency: float):
+        self.calls += 1
+        self.consecutive_failures = 0
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+
+    def record_failure(self, error: Exception, cooldown: float = None):
+        self.failures += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error)[:200]
+        if cooldown is None and self.consecutive_failures >= FAILURES_BEFORE_COOLDOWN:
+            cooldown = min(LLM_BACKEND_COOLDOWN * 2 ** (self.consecutive_failures - FAILURES_BEFORE_COOLDOWN), 300.0)
+        if cooldown:
+            self.cooldown_until = time.monotonic() + cooldown
+            print(f"🩺 LLM backend {self.name} cooling down for {cooldown:.0f}s: {self.last_error}")
+
+    async def complete(self, request: dict, json_mode: bool = False):
+        """
+        Buffered completion. Returns (text, usage).
+        """
+        raise NotImplementedError
+
+    async def stream(self, request: dict, on_text):
+        """
+        Streamed completion, each delta passed to `on_text`. Returns (text, usage).
+        """
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "provider": self.provider,
+            "model": self.model,
+            "healthy": self.available(time.monotonic()),
+            "calls": self.calls,
+            "failures": self.failures,
+            "rate_limited": self.rate_limited,
+            "latency_ewma": round(self.latency, 3) if self.latency is not None else None,
+            "last_error": self.last_error,
+            **self.limiter.stats(),
+        }
+
+class GroqBackend(LLMBackend):
+    provider = "groq"
+
+    def __init__(self, api_key: str, base_url: str = None, model: str = None, **kwargs):
+        super().__init__(f"groq:...{api_key[-4:]}", model, **kwargs)
+        self.base_url = base_url
+        # Retries live in the router only, so the SDK's own retries are off
+        self.client = AsyncGroq(api_key=api_key, base_url=base_url, timeout=LLM_TIMEOUT, max_retries=0)
+
+    def cache_namespace(self, model: str) -> str:
+        # A custom endpoint (e.g. the fake_llm server) is another provider
+        # as far as the cache is concerned
+        if self.base_url:
+            return f"{self.provider}@{self.base_url}:{self.model or model}"
+        return super().cache_namespace(model)
+
+    async def _create(self, **request):
+        if self.model:
+            request["model"] = self.model
+        try:
+            raw = await self.client.chat.completions.with_raw_response.create(**request)
+        except RateLimitError as e:
+            headers = e.response.headers if e.response is not None else {}
+            self.limiter.update_from_headers(headers)
+            raise RateLimited(parse_duration(headers.get("retry-after"))) from e
+        except (APITimeoutError, APIConnectionError, InternalServerError) as e:
+            # The SDK raises these from the underlying httpx error
+            connect_failed = isinstance(e.__cause__, (httpx.ConnectError, httpx.ConnectTimeout))
+            raise TransientLLMError(str(e), connect_failed=connect_failed) from e
+        except (AuthenticationError, PermissionDeniedError) as e:
+            raise BackendUnavailable(str(e)) from e
+
+        self.limiter.update_from_headers(raw.headers)
+        response = raw.parse()
+        if inspect.isawaitable(response):
+            # AsyncAPIResponse.parse() is a coroutine in newer SDKs
+            response = await response
+        return response
+
+    async def complete(self, request: dict, json_mode: bool = False):
+        if json_mode:
+            request = {**request, "response_format": {"type": "json_object"}}
+        try:
+            response = await self._create(**request)
+        except BadRequestError as e:
+            text = failed_generation(e)
+            if text is None:
+                raise
+            print("⚠️ JSON mode rejected the output, repairing it locally")
+            return text, None
+        return response.choices[0].message.content or "", response.usage
+
+    async def stream(self, request: dict, on_text):
+        stream = await self._create(stream=True, **request)
+        parts = []
+        usage = None
+        try:
+            async for chunk in stream:
+                # Groq puts usage on the last chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                usage = getattr(chunk, "usage", None) or getattr(x_groq, "usage", None) or usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    on_text(delta)
+        except (APITimeoutError, APIConnectionError, httpx.TransportError) as e:
+            raise TransientLLMError(str(e)) from e
+        return "".join(parts), usage
+
+class GeminiBackend(LLMBackend):
+    provider = "gemini"
+
+    def __init__(self, api_key: str, model: str = GEMINI_MODEL, **kwargs):
+        # Optional dependency: only needed when Gemini is configured
+        from google import genai
+        from google.genai import types, errors
+
+        super().__init__(f"gemini:...{api_key[-4:]}", model, **kwargs)
+        self.types = types
+        self.errors = errors
+        self.client = genai.Client(api_key=api_key, http_options=types.HttpOptions(timeout=int(LLM_TIMEOUT * 1000)))
+
+    def _arguments(self, request: dict, json_mode: bool) -> dict:
+        types = self.types
+        messages = request["messages"]
+        system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+        contents = [
+            types.Content(
+                role="model" if m["role"] == "assistant" else "user",
+                parts=[types.Part(text=m["content"])],
+            )
+            for m in messages if m["role"] != "system"
+        ]
+        config = types.GenerateContentConfig(
+            temperature=request.get("temperature"),
+            max_output_tokens=request.get("max_tokens"),
+            system_instruction=system or None,
+            response_mime_type="application/json" if json_mode else None,
+        )
+        return {"model": self.model, "contents": contents, "config": config}
+
+    def _translate(self, error: Exception):
+        code = getattr(error, "code", None)
+        if code == 429:
+            return RateLimited()
+        if code in (401, 403):
+            return BackendUnavailable(str(error))
+        if isinstance(error, (httpx.TransportError, asyncio.TimeoutError)) or (code or 0) >= 500:
+            return TransientLLMError(str(error), connect_failed=isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout)))
+        return error
+
+    @staticmethod
+    def _usage(metadata):
+        if metadata is None:
+            return None
+        return Usage(metadata.prompt_token_count or 0, metadata.candidates_token_count or 0)
+
+    async def complete(self, request: dict, json_mode: bool = False):
+        try:
+            response = await self.client.aio.models.generate_content(**self._arguments(request, json_mode))
+        except (self.errors.APIError, httpx.TransportError, asyncio.TimeoutError) as e:
+            raise self._translate(e) from e
+        return response.text or "", self._usage(response.usage_metadata)
+
+    async def stream(self, request: dict, on_text):
+        parts = []
+        metadata = None
+        try:
+            async for chunk in await self.client.aio.models.generate_content_stream(**self._arguments(request, False)):
+                metadata = chunk.usage_metadata or metadata
+                if chunk.text:
+                    parts.append(chunk.text)
+                    on_text(chunk.text)
+        except (self.errors.APIError, httpx.TransportError, asyncio.TimeoutError) as e:
+            raise self._translate(e) from e
+        return "".join(parts), self._usage(metadata)
+
+class FakeBackend(LLMBackend):
+    """
+    In-process deterministic fake (see fake_llm): no network, no quota.
+    Its output is never cached.
+    """
+    provider = "fake"
+    cacheable = False
+
+    def __init__(self, latency: float = FAKE_LLM_LATENCY, tokens_per_second: float = FAKE_LLM_TOKENS_PER_SECOND, **kwargs):
+        super().__init__("fake", "fake", **kwargs)
+        self.delay = latency
+        self.tokens_per_second = tokens_per_second
+
+    def _respond(self, request: dict):
+        text, _ = truncate_completion(fake_completion(request["messages"]), request.get("max_tokens"))
+        usage = Usage(count_message_tokens(request["messages"]), count_tokens(text))
+        return text, usage
+
+    async def complete(self, request: dict, json_mode: bool = False):
+        text, usage = self._respond(request)
+        await asyncio.sleep(self.delay + usage.completion_tokens / self.tokens_per_second)
+        return text, usage
+
+    async def stream(self, request: dict, on_text):
+        text, usage = self._respond(request)
+        await asyncio.sleep(self.delay)
+        step = 16
+        for i in range(0, len(text), step):
+            piece = text[i:i + step]
+            await asyncio.sleep(count_tokens(piece) / self.tokens_per_second)
+            on_text(piece)
+        return text, usage
+
+class LLMRouter:
+    def __init__(self, backends: list[LLMBackend]):
+        self.backends = backends
+
+    def pick(self, estimated_tokens: int, avoid: LLMBackend = None) -> LLMBackend:
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b is not avoid] or self.backends
+        healthy = [b for b in candidates if b.available(now)]
+        if not healthy:
+            # Everything is cooling down: use whichever recovers first
+            return min(candidates, key=lambda b: b.cooldown_until)
+        return min(healthy, key=lambda b: b.expected_wait(estimated_tokens))
+
+    def cache_namespaces(self, model: str) -> list[str]:
+        """
+        Cache namespaces (provider:model) of the cacheable backends, in
+        order: where a cached answer for `model` may come from.
+        """
+        return list(dict.fromkeys(b.cache_namespace(model) for b in self.backends if b.cacheable))
+
+    @property
+    def cacheable(self) -> bool:
+        """
+        Every backend's output may be cached (no fake backend configured).
+        """
+        return bool(self.backends) and all(b.cacheable for b in self.backends)
+
+    def tokens_per_minute(self) -> float:
+        """
+        Smallest TPM limit among backends: a request sized to it fits any.
+        """
+        return min((b.limiter.tokens.capacity for b in self.backends), default=0)
+
+    async def complete(self, request: dict, json_mode: bool = False, on_text=None):
+        """
+        Run one completion on the best backend. Returns (text, usage,
+        backend that answered).
+        - 429: backs that backend off (retry-after, halved concurrency) and
+          moves on to another one
+        - timeouts / connection errors / 5xx: retried on another backend;
+          exponential backoff with jitter only when there is no other
+        - bad key / no access: backend disabled for a while
+        - anything else (bad request...) is raised immediately
+        A stream that fails after delivering tokens is not retried.
+        """
+        if not self.backends:
+            raise RuntimeError("No LLM backend configured: set GROQ_API_KEY(S), GEMINI_API_KEY or LLM_PROVIDERS=fake")
+
+        estimated_tokens = estimate_request_tokens(request)
+        delivered = False
+
+        def forward(chunk):
+            nonlocal delivered
+            delivered = True
+            on_text(chunk)
+
+        error = None
+        backend = None
+        for attempt in range(LLM_MAX_ATTEMPTS):
+            backend = self.pick(estimated_tokens, avoid=backend if error else None)
+            await backend.limiter.acquire(estimated_tokens)
+            ok = False
+            refund = False
+            backoff = 0
+            started = time.monotonic()
+            try:
+                if on_text:
+                    result = await backend.stream(dict(request), forward)
+                else:
+                    result = await backend.complete(dict(request), json_mode)
+                ok = True
+                backend.record_success(time.monotonic() - started)
+                return (*result, backend)
+            except RateLimited as e:
+                error = e
+                refund = True
+                backend.rate_limited += 1
+                backend.limiter.on_rate_limited(e.retry_after or min(2 * 2 ** attempt, 30))
+            except TransientLLMError as e:
+                error = e
+                refund = e.connect_failed
+                backend.record_failure(e)
+                if delivered:
+                    raise
+                if len(self.backends) == 1:
+                    backoff = min(2 ** attempt, 10) + random.uniform(0, 0.5)
+                print(f"⚠️ LLM error on {backend.name}: {e} ({attempt + 1}/{LLM_MAX_ATTEMPTS})")
+            except BackendUnavailable as e:
+                error = e
+                backend.record_failure(e, cooldown=DISABLED_COOLDOWN)
+                if len(self.backends) == 1:
+                    raise
+            finally:
+                await backend.limiter.release(ok, refund_tokens=estimated_tokens if refund else None)
+
+            if backoff:
+                await asyncio.sleep(backoff)
+
+        raise error
+
+    def stats(self) -> list[dict]:
+        return [b.stats() for b in self.backends]
+
+def build_backends() -> list[LLMBackend]:
+    limits = {"max_concurrency": GROQ_MAX_CONCURRENCY, "initial_concurrency": GROQ_INITIAL_CONCURRENCY}
+    backends = []
+    for provider in LLM_PROVIDERS:
+        if provider == "groq":
+            backends.extend(
+                GroqBackend(key, base_url=GROQ_BASE_URL, rpm=GROQ_RPM, tpm=GROQ_TPM, **limits)
+                for key in GROQ_API_KEYS
+            )
+        elif provider == "gemini" and GEMINI_API_KEY:
+            try:
+                backends.append(GeminiBackend(GEMINI_API_KEY, rpm=GEMINI_RPM, tpm=GEMINI_TPM, **limits))
+            except ImportError as e:
+                print(f"⚠️ google-genai unavailable, Gemini backend disabled: {e}")
+        elif provider == "fake":
+            backends.append(FakeBackend(rpm=10_000, tpm=10_000_000, max_concurrency=64, initial_concurrency=32))
+    print(f"🤖 LLM backends: {', '.join(b.name for b in backends) or 'none'}")
+    return backends
+
+LLM_ROUTER = LLMRouter(build_backends())
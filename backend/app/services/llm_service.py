@@ -1,55 +1,36 @@
-import os
 import json
-import time
-import re
 import asyncio
-from pathlib import Path
-from dotenv import load_dotenv
-from groq import AsyncGroq, RateLimitError
-
-# Load environment variables (fallback for local dev)
-env_paths = [
-    Path(__file__).resolve().parents[0] / ".env",
-    Path(__file__).resolve().parents[1] / ".env",
-    Path(__file__).resolve().parents[2] / ".env",
-]
-for path in env_paths:
-    if path.exists():
-        load_dotenv(path)
-
-client = AsyncGroq(
-    api_key=os.environ.get("GROQ_API_KEY"),
-    timeout=15,  
+from pydantic import ValidationError
+from ai_pipeline.tokens import count_tokens, truncate_to_tokens
+from app.core.config import NOTES_INPUT_TOKEN_LIMIT, EXTRAS_INPUT_TOKENS, LLM_PARSE_ATTEMPTS
+from app.services.llm_cache import llm_cache_key, get_cached_completion, store_completion
+from app.services.llm_providers import LLM_ROUTER
+from app.services.json_stream import JSONFieldStream, extract_json_object
+from app.schemas.llm import SectionNotes, TLDR, Flashcards, Quiz, InterviewQuestions
+from app.services.token_budget import (
+    count_message_tokens,
+    fit_max_tokens,
+    record_usage,
+    record_cache_hit,
+    depth_level,
+    format_kind,
+    notes_max_tokens,
+    list_max_tokens,
+    text_max_tokens,
+    FLASHCARD_TOKENS,
+    QUIZ_QUESTION_TOKENS,
+    INTERVIEW_QUESTION_TOKENS,
+    TLDR_TOKENS,
+    SECTION_METADATA_TOKENS,
+    CHAT_ANSWER_TOKENS,
 )
 
 MODEL = "llama-3.1-8b-instant"
 
-GROQ_SEMAPHORE = asyncio.Semaphore(4)
-
-async def groq_with_retry(func, *args, **kwargs):
-    """
-    Retry Groq calls when rate limited.
-    Wrapped in a semaphore to prevent flooding.
-    Optimized for speed - fewer retries, shorter waits.
-    """
-    async with GROQ_SEMAPHORE:
-        for attempt in range(2):  
-            try:
-                return await func(*args, **kwargs)
-            except RateLimitError:
-                wait_time = 3 + attempt * 2  
-                print(f"⏳ Groq rate limited. Waiting {wait_time}s...")
-                await asyncio.sleep(wait_time)
-            except Exception as e:
-                if attempt == 1: raise e
-                print(f"⚠️ Groq error: {e}. Retrying...")
-                await asyncio.sleep(1)  
-
-    raise Exception("Groq failed after retries")
-
 def safe_json_loads(text: str):
     """
-    Extract JSON from messy LLM output safely.
+    Extract JSON from messy LLM output safely (single pass, repairs
+    truncated output instead of asking the model again).
     """
     if not text:
         raise Exception("Empty LLM response")
@@ -61,46 +42,142 @@ def safe_json_loads(text: str):
     except json.JSONDecodeError:
         pass
 
-    brace_count = 0
-    start_idx = -1
-    for i, char in enumerate(text):
-        if char == '{':
-            if start_idx == -1:
-                start_idx = i
-            brace_count += 1
-        elif char == '}':
-            brace_count -= 1
-            if brace_count == 0 and start_idx != -1:
-                try:
-                    json_str = text[start_idx:i+1]
-                    return json.loads(json_str)
-                except json.JSONDecodeError:
-                    
-                    start_idx = -1
-                    brace_count = 0
-                    continue
+    try:
+        return extract_json_object(text)
+    except ValueError:
+        print(f"⚠️ Failed to parse JSON. Response preview: {text[:500]}")
+        raise Exception(f"No valid JSON found in LLM response. Response: {text[:200]}...")
 
-    match = re.search(r"\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}", text, re.DOTALL)
-    if match:
-        try:
-            return json.loads(match.group(0))
-        except json.JSONDecodeError:
-            pass
-
-    print(f"⚠️ Failed to parse JSON. Response preview: {text[:500]}")
-    raise Exception(f"No valid JSON found in LLM response. Response: {text[:200]}...")
-
-async def call_llm(prompt: str, temperature: float = 0.2):
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+def json_parser(schema):
+    """
+    parse= callable: extract JSON, validate against a Pydantic schema and
+    return a plain dict. A validation error counts as an unparseable
+    response (re-asked by chat_completion, never cached).
+    """
+    def parse(text: str):
+        return schema.model_validate(safe_json_loads(text)).model_dump()
+    return parse
+
+_inflight: dict[str, asyncio.Future] = {}
+
+async def chat_completion(
+    messages: list[dict],
+    temperature: float = 0.2,
+    max_tokens: int = None,
+    model: str = MODEL,
+    parse=None,
+    use_cache: bool = True,
+    on_text=None,
+    json_mode: bool = False,
+    label: str = "llm",
+):
+    """
+    Single entry point for chat completions (run by LLM_ROUTER).
+    - Identical (model, messages, temperature, max_tokens) requests are served
+      from the LLM cache; concurrent identical requests share one call.
+      Cache entries are keyed by the provider:model that answered, and
+      fake-backend output is never stored.
+    - `parse` (e.g. safe_json_loads) is applied before caching, so an
+      unparseable response is never cached; it is re-asked up to
+      LLM_PARSE_ATTEMPTS times. Transport retries live in LLM_ROUTER.
+    - use_cache=False for "give me something different" requests.
+    - `on_text(chunk)` switches to a streamed call and receives each delta
+      (a cached answer arrives as one chunk). A re-ask after unparseable
+      output is not streamed; the caller gets the parsed result either way.
+    - json_mode requests response_format=json_object (buffered calls only);
+      output Groq rejects as invalid JSON is repaired locally by `parse`.
+    - max_tokens is clamped so prompt + max_tokens fits the TPM limit;
+      token usage is reported under `label`.
+    """
+    # Deduplicates concurrent calls; cache entries use per-backend keys
+    key = llm_cache_key(model, messages, temperature, max_tokens)
+
+    if use_cache:
+        cached = None
+        for namespace in LLM_ROUTER.cache_namespaces(model):
+            cached = get_cached_completion(llm_cache_key(namespace, messages, temperature, max_tokens))
+            if cached is not None:
+                break
+        if cached is not None:
+            record_cache_hit()
+            if on_text:
+                on_text(cached)
+            return parse(cached) if parse else cached
+
+        leader = _inflight.get(key)
+        if leader is not None:
+            try:
+                text = await asyncio.shield(leader)
+                if on_text:
+                    on_text(text)
+                return parse(text) if parse else text
+            except asyncio.CancelledError:
+                # The leading request was cancelled (client went away), not us
+                if not leader.cancelled():
+                    raise
+
+    request = {"model": model, "messages": messages, "temperature": temperature}
+    prompt_tokens = count_message_tokens(messages)
+    if max_tokens:
+        request["max_tokens"] = fit_max_tokens(prompt_tokens, max_tokens, LLM_ROUTER.tokens_per_minute())
+
+    future = asyncio.get_running_loop().create_future()
+    if use_cache:
+        _inflight[key] = future
+    try:
+        for attempt in range(LLM_PARSE_ATTEMPTS):
+            if on_text and attempt == 0:
+                text, usage, backend = await LLM_ROUTER.complete(request, on_text=on_text)
+            else:
+                text, usage, backend = await LLM_ROUTER.complete(request, json_mode=json_mode)
+            record_usage(
+                label,
+                usage.prompt_tokens if usage else prompt_tokens,
+                usage.completion_tokens if usage else count_tokens(text),
+                request.get("max_tokens"),
+            )
+            try:
+                result = parse(text) if parse else text
+                break
+            except Exception:
+                # Bad model output, not a transport error: ask again once
+                if attempt == LLM_PARSE_ATTEMPTS - 1:
+                    raise
+                print(f"⚠️ Unparseable LLM response, asking again ({attempt + 1}/{LLM_PARSE_ATTEMPTS})")
+
+        if use_cache and backend.cacheable:
+            store_completion(llm_cache_key(backend.cache_namespace(model), messages, temperature, max_tokens), text)
+        future.set_result(text)
+        return result
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Nobody may be waiting on the future; don't log "exception never retrieved"
+        future.exception()
+        raise
+    finally:
+        if _inflight.get(key) is future:
+            del _inflight[key]
+
+def result_cache_key(kind: str, digest: str):
+    """
+    Cache key for results built from LLM output (study packs, extras
+    pools, summary trees), scoped to the configured backends. None when
+    they must not be cached because a fake backend may have produced them.
+    """
+    if not LLM_ROUTER.cacheable:
+        return None
+    return f"{kind}:{'|'.join(LLM_ROUTER.cache_namespaces(MODEL))}:{digest}"
+
+async def call_llm(prompt: str, temperature: float = 0.2, use_cache: bool = True):
+    text = await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=temperature,
+        use_cache=use_cache,
     )
-
-    text = response.choices[0].message.content.strip()
-    
-    return text.replace("```json", "").replace("```", "")
+    return text.strip().replace("```json", "").replace("```", "")
 
 async def generate_section_metadata(section_text: str):
     """
@@ -117,48 +194,50 @@ async def generate_section_metadata(section_text: str):
     Text:
     {section_text[:3000]}
     """
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.3,
+        max_tokens=SECTION_METADATA_TOKENS,
+        parse=safe_json_loads,
+        json_mode=True,
+        label="section_metadata",
     )
-    return safe_json_loads(response.choices[0].message.content)
 
-async def generate_section_notes_with_title(
-    section_text: str,
-    chapter_title: str,
-    depth: str,
-    format_type: str,
-    tone: str,
-    language: str,
-    include_visuals: bool,
-    include_code: bool,
-    visual_resources: list[dict] = None
-):
+NOTES_JSON_FORMAT = """{
+  "title": "improved title (use chapter as hint)",
+  "summary": "1-sentence summary",
+  "explanation": "main explanation",
+  "bullet_notes": ["point 1", "point 2"],
+  "examples": ["example"],
+  "key_concepts": ["concept"],
+  "difficulty": "Beginner|Intermediate|Advanced"
+}"""
+
+def visual_hint_for(visual_resources, include_visuals: bool, include_code: bool) -> str:
+    if not ((include_visuals or include_code) and visual_resources):
+        return ""
+    available_ts = [v["timestamp"] for v in visual_resources]
+    return (
+        f"\n- AVAILABLE VISUALS (Timestamps): {available_ts}\n"
+        "- CRITICAL: If a visual is relevant to a specific concept, embed it on its OWN line using: [[VISUAL:timestamp]].\n"
+        "- Only use timestamps from the list provided above."
+    )
+
+def build_notes_rules(depth: str, format_type: str, tone: str, language: str, include_visuals: bool, include_code: bool) -> str:
     """
-    Generate title, summary, and notes in ONE call for speed.
-    Uses chapter title as hint but can improve it.
+    Format/depth/tone/language instruction block shared by the single and
+    batched notes prompts.
     """
-
-    visual_hint = ""
-    if (include_visuals or include_code) and visual_resources:
-        available_ts = [v["timestamp"] for v in visual_resources]
-        visual_hint = (
-            f"\n- AVAILABLE VISUALS (Timestamps): {available_ts}\n"
-            "- CRITICAL: If a visual is relevant to a specific concept, embed it on its OWN line using: [[VISUAL:timestamp]].\n"
-            "- Only use timestamps from the list provided above."
-        )
-
     format_rules = ""
-    if "Bullet" in format_type or "bullet" in format_type.lower():
+    kind = format_kind(format_type)
+    if kind == "Bullet Points":
         format_instruction = "Bullet Points"
         format_rules = (
             '- STRICTLY set "explanation" to "" (empty string).\n'
             '- Provide ALL content in "bullet_notes" as a list of strings.\n'
             '- DO NOT write any paragraphs.'
         )
-    elif "Paragraph" in format_type or "paragraph" in format_type.lower():
+    elif kind == "Paragraphs":
         format_instruction = "Paragraphs"
         format_rules = (
             '- STRICTLY set "bullet_notes" to [] (empty list).\n'
@@ -173,17 +252,12 @@ async def generate_section_notes_with_title(
             '- CRITICAL: ZERO REPETITION. If a fact is in bullet_notes, do NOT mention it in explanation. If a concept is in explanation, do NOT repeat it in bullet_notes.'
         )
 
-    depth_instruction = ""
-    length_constraint = ""
-    if "Concise" in depth or "concise" in depth.lower():
-        depth_instruction = "Concise"
-        length_constraint = "Keep the content brief and to the point (under 150 words)."
-    elif "Detailed" in depth or "detailed" in depth.lower():
-        depth_instruction = "Detailed"
-        length_constraint = "Provide a comprehensive, in-depth explanation covering all nuances (min 400 words)."
-    else:
-        depth_instruction = "Standard"
-        length_constraint = "Aim for a balanced explanation with key details (approx 200-250 words)."
+    depth_instruction = depth_level(depth)
+    length_constraint = {
+        "Concise": "Keep the content brief and to the point (under 150 words).",
+        "Detailed": "Provide a comprehensive, in-depth explanation covering all nuances (min 400 words).",
+        "Standard": "Aim for a balanced explanation with key details (approx 200-250 words).",
+    }[depth_instruction]
 
     context_instructions = []
     if include_visuals:
@@ -192,11 +266,8 @@ async def generate_section_notes_with_title(
         context_instructions.append("Include code snippets, commands, or technical implementation details when present")
     
     context_note = "\n".join(context_instructions) if context_instructions else "Focus on conceptual content"
-    
-    prompt = f"""Create notes from lecture section. Return ONLY valid JSON, no other text.
 
-Chapter: {chapter_title}
-Format: {format_instruction} | Depth: {depth_instruction} | Tone: {tone} | Language: {language}
+    return f"""Format: {format_instruction} | Depth: {depth_instruction} | Tone: {tone} | Language: {language}
 
 Rules:
 - Write ALL content strictly in {language}.
@@ -213,34 +284,152 @@ Rules:
 - Use proper brand names and capitalization
 - Title should be concise and descriptive
 - Return ONLY the JSON object, no explanations or markdown
-- {context_note}
+- {context_note}"""
+
+NOTES_PARSER = json_parser(SectionNotes)
+
+async def generate_section_notes_with_title(
+    section_text: str,
+    chapter_title: str,
+    depth: str,
+    format_type: str,
+    tone: str,
+    language: str,
+    include_visuals: bool,
+    include_code: bool,
+    visual_resources: list[dict] = None,
+    on_delta=None
+):
+    """
+    Generate title, summary, and notes in ONE call for speed.
+    Uses chapter title as hint but can improve it.
+    With `on_delta(kind, key, value)` the completion is streamed and every
+    finished field / list item is reported as soon as it is generated.
+    """
+    rules = build_notes_rules(depth, format_type, tone, language, include_visuals, include_code)
+    visual_hint = visual_hint_for(visual_resources, include_visuals, include_code)
+    
+    prompt = f"""Create notes from lecture section. Return ONLY valid JSON, no other text.
+
+Chapter: {chapter_title}
+{rules}
 {visual_hint}
 
 Required JSON format (return exactly this structure):
-{{
-  "title": "improved title (use chapter as hint)",
-  "summary": "1-sentence summary",
-  "explanation": "main explanation",
-  "bullet_notes": ["point 1", "point 2"],
-  "examples": ["example"],
-  "key_concepts": ["concept"],
-  "difficulty": "Beginner|Intermediate|Advanced"
-}}
+{NOTES_JSON_FORMAT}
 
 Text:
-{section_text[:2500]}
+{truncate_to_tokens(section_text, NOTES_INPUT_TOKEN_LIMIT)}
 """
+
+    on_text = None
+    if on_delta:
+        fields = JSONFieldStream()
+
+        def on_text(chunk):
+            for kind, key, value in fields.feed(chunk):
+                on_delta(kind, key, value)
     
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.2,
-        max_tokens=4000,
+        max_tokens=notes_max_tokens(depth, format_type, language, include_code),
+        parse=NOTES_PARSER,
+        json_mode=True,
+        on_text=on_text,
+        label="notes",
     )
 
-    text = response.choices[0].message.content.strip()
-    return safe_json_loads(text)
+def parse_notes_batch(text: str) -> dict[int, dict]:
+    """
+    {"0": {...}, "1": {...}} -> {0: {...}, 1: {...}}.
+    Uses the incremental field parser, so sections that completed before a
+    truncation or a malformed tail are kept.
+    """
+    results = {}
+    for kind, key, value in JSONFieldStream().feed(text or ""):
+        if kind == "field" and str(key).isdigit() and isinstance(value, dict):
+            results[int(key)] = SectionNotes.model_validate(value).model_dump()
+    if not results:
+        raise ValueError(f"No section notes in batch response: {(text or '')[:200]}")
+    return results
+
+async def generate_section_notes_batch(
+    sections: list[dict],
+    depth: str,
+    format_type: str,
+    tone: str,
+    language: str,
+    include_visuals: bool,
+    include_code: bool,
+    on_section=None,
+    on_delta=None
+):
+    """
+    Notes for several small sections in ONE request (one instruction block
+    instead of one per section). `sections` are {"text", "title",
+    "visual_resources"} dicts; the response is keyed by their position.
+
+    Returns {position: notes}. Positions missing from the result (truncated
+    or malformed output) are left to the caller to generate individually.
+    `on_section(position, notes)` streams each section as soon as its
+    object is complete; `on_delta(position, kind, key, value)` reports its
+    fields / list items before that, like generate_section_notes_with_title.
+    """
+    rules = build_notes_rules(depth, format_type, tone, language, include_visuals, include_code)
+
+    blocks = []
+    for i, section in enumerate(sections):
+        visual_hint = visual_hint_for(section.get("visual_resources"), include_visuals, include_code)
+        blocks.append(
+            f"### SECTION {i}\n"
+            f"Chapter: {section.get('title', '')}{visual_hint}\n"
+            f"Text:\n{truncate_to_tokens(section['text'], NOTES_INPUT_TOKEN_LIMIT)}"
+        )
+    keys = ", ".join(f'"{i}"' for i in range(len(sections)))
+
+    prompt = f"""Create notes for EACH of the {len(sections)} lecture sections below. Return ONLY valid JSON, no other text.
+
+{rules}
+- Each section gets its own notes; do not merge or skip sections.
+
+Required JSON format: one object keyed by section number ({keys}), each value exactly this structure:
+{NOTES_JSON_FORMAT}
+
+{chr(10).join(blocks)}
+"""
+
+    on_text = None
+    if on_section or on_delta:
+        fields = JSONFieldStream(nested=bool(on_delta))
+
+        def on_text(chunk):
+            for kind, key, value in fields.feed(chunk):
+                if isinstance(key, tuple):
+                    position, key = key
+                    if str(position).isdigit() and int(position) < len(sections):
+                        on_delta(int(position), kind, key, value)
+                    continue
+                if not on_section:
+                    continue
+                if kind == "field" and str(key).isdigit() and isinstance(value, dict) and int(key) < len(sections):
+                    try:
+                        notes = SectionNotes.model_validate(value).model_dump()
+                    except ValueError:
+                        # Left for the per-section fallback
+                        continue
+                    on_section(int(key), notes)
+
+    results = await chat_completion(
+        [{"role": "user", "content": prompt}],
+        temperature=0.2,
+        max_tokens=notes_max_tokens(depth, format_type, language, include_code) * len(sections),
+        parse=parse_notes_batch,
+        json_mode=True,
+        on_text=on_text,
+        label="notes_batch",
+    )
+    return {i: notes for i, notes in results.items() if i < len(sections)}
 
 async def generate_section_notes(
     section_text: str,
@@ -263,27 +452,6 @@ async def generate_section_notes(
         "difficulty": result.get("difficulty", "Intermediate")
     }
 
-async def generate_tldr(notes_text: str, language: str = "English"):
-    prompt = f"""
-    Create a concise TLDR summary (5-7 bullet points) from these lecture notes.
-    
-    CRITICAL: Write ALL content strictly in {language}.
-    
-    Return JSON:
-    {{ "tldr": ["", "", ""] }}
-    
-    Notes:
-    {notes_text[:4000]}
-    """
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.3,
-    )
-
-    return safe_json_loads(response.choices[0].message.content)
-
 async def generate_flashcards(notes_text: str, language: str = "English", count: int = 5, seed: int = 0, existing_items: list[str] = None):
     variation_prompt = ""
     if seed > 0:
@@ -304,18 +472,19 @@ async def generate_flashcards(notes_text: str, language: str = "English", count:
     {{ "flashcards":[{{"question":"Term or Concept","answer":"Definition or Explanation"}}] }}
     
     Notes:
-    {notes_text[:6000]}
+    {truncate_to_tokens(notes_text, EXTRAS_INPUT_TOKENS)}
     """
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.3,
+        max_tokens=list_max_tokens(count, FLASHCARD_TOKENS, language),
+        parse=json_parser(Flashcards),
+        json_mode=True,
+        use_cache=seed == 0,
+        label="flashcards",
     )
 
-    return safe_json_loads(response.choices[0].message.content)
-
-async def generate_quiz(notes_text: str, language: str = "English", seed: int = 0, existing_items: list[str] = None):
+async def generate_quiz(notes_text: str, language: str = "English", count: int = 5, seed: int = 0, existing_items: list[str] = None):
     variation_prompt = ""
     if seed > 0:
         variation_prompt = f"Variation Seed: {seed}. Ensure these questions are DIFFERENT from previous sets."
@@ -325,27 +494,28 @@ async def generate_quiz(notes_text: str, language: str = "English", seed: int =
         exclusion_prompt = f"CRITICAL: Avoid these topics/questions already covered: {', '.join(existing_items)}. Focus on other parts of the notes."
 
     prompt = f"""
-    Create 5 UNIQUE MCQ quiz questions.
+    Create exactly {count} UNIQUE MCQ quiz questions.
     {variation_prompt}
     {exclusion_prompt}
     
     CRITICAL: Write ALL content strictly in {language}.
     
     Return JSON:
-    {{ "quiz":[{{"question":"","options":["A","B","C","D"],"answer":"A"}}] }}
+    {{ "quiz":[{{"question":"","options":["...","...","...","..."],"answer":"text of the correct option"}}] }}
     
     Notes:
-    {notes_text[:4000]}
+    {truncate_to_tokens(notes_text, EXTRAS_INPUT_TOKENS)}
     """
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.3,
+        max_tokens=list_max_tokens(count, QUIZ_QUESTION_TOKENS, language),
+        parse=json_parser(Quiz),
+        json_mode=True,
+        use_cache=seed == 0,
+        label="quiz",
     )
 
-    return safe_json_loads(response.choices[0].message.content)
-
 async def generate_interview_questions(notes_text: str, language: str = "English", count: int = 5, seed: int = 0, existing_items: list[str] = None):
     variation_prompt = ""
     if seed > 0:
@@ -373,17 +543,18 @@ async def generate_interview_questions(notes_text: str, language: str = "English
     }}
     
     Notes:
-    {notes_text[:4000]}
+    {truncate_to_tokens(notes_text, EXTRAS_INPUT_TOKENS)}
     """
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.3,
+        max_tokens=list_max_tokens(count, INTERVIEW_QUESTION_TOKENS, language),
+        parse=json_parser(InterviewQuestions),
+        json_mode=True,
+        use_cache=seed == 0,
+        label="interview",
     )
 
-    return safe_json_loads(response.choices[0].message.content)
-
 async def generate_tldr(notes_text: str, language: str = "English"):
     prompt = f"""
     Create a "Too Long; Didn't Read" (TLDR) summary of these notes.
@@ -398,16 +569,108 @@ async def generate_tldr(notes_text: str, language: str = "English"):
     {{ "tldr": ["Summary paragraph...", "Key takeaway 1", "Key takeaway 2", "Key takeaway 3"] }}
     
     Notes:
-    {notes_text[:6000]}
+    {truncate_to_tokens(notes_text, EXTRAS_INPUT_TOKENS)}
     """
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.3,
+        max_tokens=text_max_tokens(TLDR_TOKENS, language),
+        parse=json_parser(TLDR),
+        json_mode=True,
+        label="tldr",
+    )
+
+async def merge_summaries(summaries: list[str], language: str = "English", max_tokens: int = 300):
+    """
+    One summary-tree merge step: condense consecutive section (or group)
+    summaries into a single paragraph.
+    """
+    joined = "\n".join(f"- {summary}" for summary in summaries)
+    prompt = f"""
+    Condense these consecutive lecture section summaries into ONE paragraph.
+    Keep every distinct topic, term and result; drop repetition.
+
+    CRITICAL: Write strictly in {language}. Return only the paragraph.
+
+    Summaries:
+    {joined}
+    """
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
+        temperature=0.2,
+        max_tokens=text_max_tokens(max_tokens, language),
+        label="summary_merge",
     )
 
-    return safe_json_loads(response.choices[0].message.content)
+STUDY_PACK_PARTS = {
+    "tldr": TLDR,
+    "flashcards": Flashcards,
+    "quiz": Quiz,
+    "interview": InterviewQuestions,
+}
+
+def parse_study_pack(text: str) -> dict:
+    """
+    Validate each part on its own: a malformed or truncated quiz doesn't
+    throw away a good TLDR. Missing parts are left to the caller.
+    """
+    data = safe_json_loads(text)
+    pack = {}
+    for part, schema in STUDY_PACK_PARTS.items():
+        try:
+            pack[part] = schema.model_validate(data).model_dump()
+        except ValidationError:
+            continue
+    if not pack:
+        raise ValueError(f"No usable study pack parts in response: {text[:200]}")
+    return pack
+
+async def generate_study_pack(
+    notes_text: str,
+    language: str = "English",
+    flashcard_count: int = 5,
+    quiz_count: int = 5,
+    interview_count: int = 5,
+):
+    """
+    TLDR, flashcards, quiz and interview questions in ONE call, so the notes
+    are sent and tokenized once. Returns {part: result} with each result in
+    the same shape as its single generator; parts that failed are missing.
+    """
+    prompt = f"""
+    Create a study pack from these lecture notes.
+
+    CRITICAL: Write ALL content strictly in {language}.
+
+    Return ONLY valid JSON with exactly these keys:
+    {{
+        "tldr": ["Summary paragraph (2-3 sentences)...", "Key takeaway 1", "Key takeaway 2", "Key takeaway 3"],
+        "flashcards": [{{"question": "Term or Concept", "answer": "Definition or Explanation"}}],
+        "quiz": [{{"question": "", "options": ["...", "...", "...", "..."], "answer": "text of the correct option"}}],
+        "questions": [{{"question": "The interview question", "answer": "A comprehensive correct answer"}}]
+    }}
+
+    - "tldr": a concise summary paragraph followed by 3-5 key takeaways
+    - "flashcards": exactly {flashcard_count} study flashcards
+    - "quiz": exactly {quiz_count} UNIQUE MCQ questions; "answer" is one of the options
+    - "questions": exactly {interview_count} interview questions with answers
+
+    Notes:
+    {truncate_to_tokens(notes_text, EXTRAS_INPUT_TOKENS)}
+    """
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
+        temperature=0.3,
+        max_tokens=(
+            text_max_tokens(TLDR_TOKENS, language)
+            + list_max_tokens(flashcard_count, FLASHCARD_TOKENS, language)
+            + list_max_tokens(quiz_count, QUIZ_QUESTION_TOKENS, language)
+            + list_max_tokens(interview_count, INTERVIEW_QUESTION_TOKENS, language)
+        ),
+        parse=parse_study_pack,
+        json_mode=True,
+        label="study_pack",
+    )
 
 async def chat_with_context(question: str, context_docs: list[str]):
     """
@@ -437,12 +700,10 @@ Question:
 {question}
 """
 
-    response = await groq_with_retry(
-        client.chat.completions.create,
-        model="llama-3.1-8b-instant",
-        messages=[{"role": "user", "content": prompt}],
+    return await chat_completion(
+        [{"role": "user", "content": prompt}],
         temperature=0.3,
+        max_tokens=CHAT_ANSWER_TOKENS,
+        label="chat",
     )
 
-    return response.choices[0].message.content
-
@@ -1,5 +1,165 @@
 import asyncio
+from ai_pipeline.chunking.chunker import split_text_by_tokens
+from ai_pipeline.tokens import count_tokens
+from app.core.config import (
+    SECTION_TOKEN_BUDGET,
+    MAPREDUCE_THRESHOLD_TOKENS,
+    NOTES_INPUT_TOKEN_LIMIT,
+    NOTES_BATCH_MAX_SECTIONS,
+    NOTES_BATCH_TOKEN_BUDGET,
+)
 from app.services.llm_service import generate_section_notes_with_title
+from app.services.llm_providers import LLM_ROUTER
+
+DIFFICULTY_ORDER = ["Beginner", "Intermediate", "Advanced"]
+
+# Instruction block + JSON format of a notes prompt
+NOTES_PROMPT_OVERHEAD_TOKENS = 700
+
+def _dedupe(items):
+    seen = set()
+    result = []
+    for item in items:
+        key = item.strip().lower() if isinstance(item, str) else repr(item)
+        if key and key not in seen:
+            seen.add(key)
+            result.append(item)
+    return result
+
+def merge_partial_notes(partials, chapter_title: str):
+    """
+    Reduce step: combine the notes of several sub-chunks into one note
+    result without another LLM call.
+    """
+    difficulties = [p.get("difficulty") for p in partials if p.get("difficulty") in DIFFICULTY_ORDER]
+
+    return {
+        "title": chapter_title or partials[0].get("title", ""),
+        "summary": " ".join(p.get("summary", "") for p in partials if p.get("summary")),
+        "explanation": "\n\n".join(p.get("explanation", "") for p in partials if p.get("explanation")),
+        "bullet_notes": _dedupe(b for p in partials for b in (p.get("bullet_notes") or [])),
+        "examples": _dedupe(e for p in partials for e in (p.get("examples") or [])),
+        "key_concepts": _dedupe(k for p in partials for k in (p.get("key_concepts") or [])),
+        "difficulty": max(difficulties, key=DIFFICULTY_ORDER.index) if difficulties else "Intermediate",
+    }
+
+async def generate_section_notes_mapreduce(
+    section_text, chapter_title, depth, format_type, tone, language,
+    include_visuals, include_code, visual_resources=None
+):
+    """
+    Map-reduce notes for sections larger than the prompt budget.
+    Sub-chunks are generated concurrently (the backends' rate limiters
+    still cap in-flight calls) and merged locally.
+    """
+    chunks = split_text_by_tokens(section_text, SECTION_TOKEN_BUDGET)
+    print(f"🗺️ Map-reduce: '{chapter_title or 'section'}' split into {len(chunks)} parts")
+
+    results = await asyncio.gather(*[
+        generate_section_notes_with_title(
+            chunk,
+            f"{chapter_title} (part {i + 1}/{len(chunks)})" if chapter_title else "",
+            depth, format_type, tone, language,
+            include_visuals=include_visuals,
+            include_code=include_code,
+            visual_resources=visual_resources
+        )
+        for i, chunk in enumerate(chunks)
+    ], return_exceptions=True)
+
+    partials = [r for r in results if isinstance(r, dict)]
+    if not partials:
+        errors = [r for r in results if isinstance(r, BaseException)]
+        raise errors[0] if errors else ValueError("Map-reduce produced no notes")
+    if len(partials) < len(results):
+        print(f"⚠️ Map-reduce: {len(results) - len(partials)}/{len(results)} parts failed for '{chapter_title or 'section'}'")
+
+    return merge_partial_notes(partials, chapter_title)
+
+async def generate_section_notes_auto(
+    section_text, chapter_title, depth, format_type, tone, language,
+    include_visuals, include_code, visual_resources=None, on_delta=None
+):
+    """
+    Single call for normal sections, map-reduce above MAPREDUCE_THRESHOLD_TOKENS.
+    `on_delta` streams the single-call path; map-reduce parts are merged
+    at the end, so they are not streamed.
+    """
+    if count_tokens(section_text) > MAPREDUCE_THRESHOLD_TOKENS:
+        return await generate_section_notes_mapreduce(
+            section_text, chapter_title, depth, format_type, tone, language,
+            include_visuals=include_visuals,
+            include_code=include_code,
+            visual_resources=visual_resources
+        )
+
+    return await generate_section_notes_with_title(
+        section_text, chapter_title, depth, format_type, tone, language,
+        include_visuals=include_visuals,
+        include_code=include_code,
+        visual_resources=visual_resources,
+        on_delta=on_delta
+    )
+
+def build_note_item(section, result):
+    """
+    Note payload sent to the client for one section.
+    """
+    return {
+        "title": result.get("title", section.get("title", "Untitled")),
+        "summary": result.get("summary", ""),
+        "start": section["start"],
+        "end": section["end"],
+        "notes": {
+            "explanation": result.get("explanation", "") or "",
+            "bullet_notes": result.get("bullet_notes", []) or [],
+            "examples": result.get("examples", []) or [],
+            "key_concepts": result.get("key_concepts", []) or [],
+            "difficulty": result.get("difficulty", "Intermediate")
+        }
+    }
+
+def note_batch_token_budget() -> int:
+    """
+    Prompt + completion tokens one batched request may use: the configured
+    budget, capped below the smallest tokens-per-minute limit of the LLM
+    backends (a request above TPM is rejected outright).
+    """
+    return int(min(NOTES_BATCH_TOKEN_BUDGET, LLM_ROUTER.tokens_per_minute() * 0.8))
+
+def plan_note_batches(sections, output_tokens: int, token_budget: int = None, max_sections: int = NOTES_BATCH_MAX_SECTIONS):
+    """
+    Group sections, in order, into notes requests.
+    Each section costs its (capped) transcript tokens plus `output_tokens`
+    (token_budget.notes_max_tokens); a batch shares one instruction block
+    and stays within `token_budget`. Map-reduce sized sections always go
+    alone. Returns lists of section indices.
+    """
+    if token_budget is None:
+        token_budget = note_batch_token_budget()
+
+    batches = []
+    current = []
+    used = NOTES_PROMPT_OVERHEAD_TOKENS
+    for i, section in enumerate(sections):
+        tokens = count_tokens(section["text"])
+        if tokens > MAPREDUCE_THRESHOLD_TOKENS:
+            batches.append([i])
+            continue
+
+        cost = min(tokens, NOTES_INPUT_TOKEN_LIMIT) + output_tokens
+        if current and (len(current) >= max_sections or used + cost > token_budget):
+            batches.append(current)
+            current = []
+            used = NOTES_PROMPT_OVERHEAD_TOKENS
+        current.append(i)
+        used += cost
+
+    if current:
+        batches.append(current)
+
+    batches.sort(key=lambda batch: batch[0])
+    return batches
 
 async def generate_notes_for_sections(
     sections, depth, format, tone, language, include_visuals, include_code
@@ -15,25 +175,13 @@ async def generate_notes_for_sections(
         try:
             print(f"   Processing section {index + 1}/{len(sections)}: {section.get('title', 'Untitled')}")
             
-            result = await generate_section_notes_with_title(
+            result = await generate_section_notes_auto(
                 section["text"], 
                 section.get("title", ""),  
                 depth, format, tone, language, include_visuals, include_code
             )
             
-            note_item = {
-                "title": result.get("title", section.get("title", "Untitled")),
-                "summary": result.get("summary", ""),
-                "start": section["start"],
-                "end": section["end"],
-                "notes": {
-                    "explanation": result.get("explanation", ""),
-                    "bullet_notes": result.get("bullet_notes", []),
-                    "examples": result.get("examples", []),
-                    "key_concepts": result.get("key_concepts", []),
-                    "difficulty": result.get("difficulty", "Intermediate")
-                }
-            }
+            note_item = build_note_item(section, result)
             
             print(f"   ✅ Generated notes for section {index + 1}")
             return (index, note_item)
@@ -0,0 +1,66 @@
+"""
+ONNX Runtime sentence encoder (no Torch).
+
+Runs the ONNX export of a sentence-transformers model that its Hugging Face
+repo ships (onnx/model.onnx, plus int8 dynamically quantized variants such
+as onnx/model_quint8_avx2.onnx) with onnxruntime + tokenizers, and
+reproduces the model's pooling: mean over tokens, then L2 normalization.
+
+`encode()` takes the arguments embedding_service passes to
+SentenceTransformer.encode, so either object can be returned by get_model().
+Torch is never imported, which is most of the memory saving per worker.
+"""
+
+import os
+import numpy as np
+
+class OnnxSentenceEncoder:
+    def __init__(self, repo_id: str, file_name: str = "onnx/model.onnx", max_length: int = 256, threads: int = 0):
+        import onnxruntime as ort
+        from huggingface_hub import hf_hub_download
+        from tokenizers import Tokenizer
+
+        self.repo_id = repo_id
+        self.file_name = file_name
+        self.tokenizer = Tokenizer.from_file(hf_hub_download(repo_id, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding(pad_id=0, pad_token="[PAD]")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads or (os.cpu_count() or 1)
+        self.session = ort.InferenceSession(
+            hf_hub_download(repo_id, file_name),
+            sess_options=options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def _encode_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encodings], dtype=np.int64)
+
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, texts, batch_size: int = 64, convert_to_numpy: bool = True, normalize_embeddings: bool = False, show_progress_bar: bool = False):
+        single = isinstance(texts, str)
+        texts = [texts] if single else list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+
+        # Batch similar lengths together: less padding per batch
+        order = np.argsort([-len(text) for text in texts], kind="stable")
+        parts = []
+        for i in range(0, len(texts), batch_size):
+            parts.append(self._encode_batch([texts[j] for j in order[i:i + batch_size]]))
+        vectors = np.vstack(parts).astype(np.float32)[np.argsort(order)]
+
+        if normalize_embeddings:
+            vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
@@ -0,0 +1,176 @@
+"""
+Adaptive rate limiter for LLM API calls.
+
+Replaces the fixed `asyncio.Semaphore(4)`:
+- token buckets for requests/minute and tokens/minute, re-synced from the
+  x-ratelimit-* headers Groq returns on every response
+- AIMD concurrency: +1 slot per window of successful calls, halved on 429
+- a shared "blocked until" deadline from retry-after, so every caller
+  backs off together instead of hammering the API
+- slots are released while a caller waits/backs off
+- requests rejected with 429 or that never connected are refunded
+"""
+
+import asyncio
+import re
+import time
+
+DURATION_RE = re.compile(r"([\d.]+)(ms|h|m|s)")
+DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+def parse_duration(value) -> float:
+    """
+    Parse Groq reset values like "7.66s", "2m59.56s", "120ms" or plain seconds.
+    """
+    if value is None:
+        return 0.0
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    return sum(float(n) * DURATION_UNITS[unit] for n, unit in DURATION_RE.findall(str(value)))
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_seconds: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Seconds until `amount` is available (0 if it is now).
+        """
+        now = time.monotonic()
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def consume(self, amount: float):
+        self._refill(time.monotonic())
+        self.tokens -= min(amount, self.capacity)
+
+    def refund(self, amount: float):
+        """
+        Give back what consume() took for a request the server never counted.
+        """
+        self._refill(time.monotonic())
+        self.tokens = min(self.capacity, self.tokens + min(amount, self.capacity))
+
+    def sync(self, limit: float = None, remaining: float = None, reset: float = None):
+        """
+        Align the bucket with what the server reports.
+        """
+        now = time.monotonic()
+        self._refill(now)
+        if limit:
+            self.capacity = limit
+            self.rate = limit / 60.0
+        if remaining is not None:
+            self.tokens = min(self.tokens, remaining)
+            if reset and remaining <= 0:
+                # Bucket is empty until the server-side window resets
+                self.tokens = -self.rate * reset
+
+class AdaptiveRateLimiter:
+    def __init__(self, rpm: int, tpm: int, max_concurrency: int = 8, initial_concurrency: int = 4, min_concurrency: int = 1):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.concurrency = float(initial_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self._cond = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_concurrency, int(self.concurrency))
+
+    async def acquire(self, estimated_tokens: int = 0):
+        """
+        Wait for a concurrency slot and enough request/token budget.
+        """
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: self.in_flight < self.limit)
+
+                wait = max(
+                    self.blocked_until - time.monotonic(),
+                    self.requests.wait_time(1),
+                    self.tokens.wait_time(estimated_tokens),
+                )
+                if wait <= 0:
+                    self.requests.consume(1)
+                    self.tokens.consume(estimated_tokens)
+                    self.in_flight += 1
+                    return
+
+            # Wait without holding a slot (or the lock)
+            await asyncio.sleep(min(wait, 30.0))
+
+    async def release(self, ok: bool = True, refund_tokens: int = None):
+        """
+        Free the slot. With `refund_tokens` (the estimate passed to
+        acquire) the request and its tokens go back to the buckets: a
+        connection that never reached the server or a 429 used no quota.
+        """
+        async with self._cond:
+            self.in_flight -= 1
+            if refund_tokens is not None:
+                self.requests.refund(1)
+                self.tokens.refund(refund_tokens)
+            if ok:
+                # Additive increase: roughly +1 slot per `limit` successes
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.limit)
+            self._cond.notify_all()
+
+    def on_rate_limited(self, retry_after: float):
+        """
+        Multiplicative decrease + shared backoff deadline.
+        """
+        self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+        self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        print(f"⏳ Rate limited: backing off {retry_after:.1f}s, concurrency → {self.limit}")
+
+    def update_from_headers(self, headers):
+        """
+        Sync buckets with x-ratelimit-* response headers.
+        Groq reports tokens per minute; the requests headers may cover a
+        longer window, so they only matter once they run out.
+        """
+        if not headers:
+            return
+
+        def number(name):
+            value = headers.get(name)
+            try:
+                return float(value) if value is not None else None
+            except ValueError:
+                return None
+
+        self.tokens.sync(
+            limit=number("x-ratelimit-limit-tokens"),
+            remaining=number("x-ratelimit-remaining-tokens"),
+            reset=parse_duration(headers.get("x-ratelimit-reset-tokens")),
+        )
+
+        remaining_requests = number("x-ratelimit-remaining-requests")
+        if remaining_requests is not None and remaining_requests <= 0:
+            reset = parse_duration(headers.get("x-ratelimit-reset-requests"))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + reset)
+
+    def stats(self) -> dict:
+        return {
+            "concurrency_limit": self.limit,
+            "in_flight": self.in_flight,
+            "requests_available": round(self.requests.tokens, 1),
+            "tokens_available": round(self.tokens.tokens),
+            "tokens_per_minute": self.tokens.capacity,
+        }
@@ -1,39 +1,57 @@
 from ai_pipeline.chunking.chunker import create_sections
+from ai_pipeline.chunking.semantic import semantic_sections
+from ai_pipeline.normalization.normalizer import normalize_transcript
+from ai_pipeline.transcript import Transcript, IntervalIndex
+from app.core.config import SECTION_TOKEN_BUDGET, SEMANTIC_SECTIONING
+from app.services.embedding_service import encode_texts_async
 from app.services.llm_service import generate_section_metadata
 import asyncio
+import time
 
-def split_transcript_by_chapters(transcript, chapters):
+def split_transcript_by_chapters(transcript, chapters, open_end=True):
+    """
+    Slice the transcript into chapter sections using an interval index.
+    Segments crossing a chapter boundary go to the chapter they overlap most.
+    With `open_end` the last chapter also takes the segments past its end:
+    captions often run past the last chapter or the video duration.
+    """
+    index = IntervalIndex(transcript)
     sections = []
+    last = max(range(len(chapters)), key=lambda i: chapters[i]["end"], default=None)
 
-    for chapter in chapters:
+    for i, chapter in enumerate(chapters):
         start = chapter["start"]
         end = chapter["end"]
 
-        text_parts = [
-            seg["text"] for seg in transcript
-            if seg["start"] >= start and seg["end"] <= end
-        ]
-
-        if not text_parts:
+        query_end = float("inf") if open_end and i == last else end
+        chapter_segments = index.query(start, query_end)
+        if not chapter_segments:
             continue
 
         sections.append({
             "title": chapter["title"],
             "start": start,
             "end": end,
-            "text": " ".join(text_parts),
+            "text": chapter_segments.joined_text(),
             "source": "youtube_chapters"
         })
 
     return sections
 
-async def generate_sections(transcript, metadata, selected_ranges=None):
+async def generate_sections(transcript, metadata, selected_ranges=None, normalize=True):
     """
     Generate sections using YouTube chapters (no separate AI title generation).
     Uses chapter titles directly for speed.
+    Captions are normalized first (dedupe, filler removal, sentence merging)
+    so section text sent to the LLM is as small as possible.
     """
     base_sections = []
 
+    if normalize:
+        raw_chars = len(Transcript.coerce(transcript).buffer)
+        transcript = normalize_transcript(transcript)
+        print(f"🧹 Normalized transcript: {raw_chars} → {len(transcript.buffer)} chars, {len(transcript)} segments")
+
     if selected_ranges:
         print(f"✂️ Filtering for {len(selected_ranges)} selected user ranges")
         formatted_chapters = []
@@ -43,7 +61,10 @@ async def generate_sections(transcript, metadata, selected_ranges=None):
                 "start": rng.start,
                 "end": rng.end
             })
-        base_sections = split_transcript_by_chapters(transcript, formatted_chapters)
+        # Only a selection that reaches the end of the video owns the tail
+        video_end = max((c["end"] for c in metadata.get("chapters") or []), default=metadata.get("duration") or 0)
+        open_end = bool(video_end) and max(rng.end for rng in selected_ranges) >= video_end
+        base_sections = split_transcript_by_chapters(transcript, formatted_chapters, open_end=open_end)
 
     elif metadata.get("chapters"):
         print("📚 Using YouTube chapters")
@@ -52,7 +73,30 @@ async def generate_sections(transcript, metadata, selected_ranges=None):
         )
 
     else:
-        print("🧠 No chapters found → using AI chunking")
-        base_sections = create_sections(transcript)
+        base_sections = []
+        if SEMANTIC_SECTIONING:
+            print("🧠 No chapters found → using semantic topic segmentation")
+            try:
+                t0 = time.perf_counter()
+                loop = asyncio.get_running_loop()
+
+                def encode(texts):
+                    # Through the shared batcher, so only one encoder ever runs
+                    return asyncio.run_coroutine_threadsafe(encode_texts_async(texts), loop).result()
+
+                base_sections = await asyncio.to_thread(
+                    semantic_sections,
+                    transcript,
+                    encode,
+                    min_tokens=SECTION_TOKEN_BUDGET // 3,
+                    max_tokens=SECTION_TOKEN_BUDGET,
+                )
+                print(f"   {len(base_sections)} topic sections in {time.perf_counter() - t0:.2f}s")
+            except Exception as e:
+                print(f"⚠️ Semantic segmentation failed, falling back to token chunking: {e}")
+
+        if not base_sections:
+            print("🧠 Using AI chunking")
+            base_sections = create_sections(transcript, max_tokens=SECTION_TOKEN_BUDGET)
 
     return base_sections
@@ -0,0 +1,98 @@
+"""
+Study pack: TLDR, flashcards, quiz and interview questions for one set of
+notes, generated together and cached per notes hash.
+
+The notes page asks for each extra separately (/generate-quiz,
+/generate-flashcards, ...). Once a pack exists, those first requests
+(seed 0, nothing to exclude) are answered from it without an LLM call.
+"""
+
+import asyncio
+import hashlib
+import orjson
+from app.services.llm_cache import get_cached_completion, store_completion
+from app.services.llm_service import (
+    STUDY_PACK_PARTS,
+    result_cache_key,
+    generate_study_pack as generate_study_pack_llm,
+    generate_tldr,
+    generate_flashcards,
+    generate_quiz,
+    generate_interview_questions,
+)
+from app.services.summary_tree_service import lecture_digest
+
+# Item list inside each part's result
+PART_ITEMS = {"tldr": "tldr", "flashcards": "flashcards", "quiz": "quiz", "interview": "questions"}
+
+def notes_hash(notes_text: str, language: str) -> str:
+    return hashlib.sha256(orjson.dumps([notes_text, language])).hexdigest()
+
+def _key(notes_text: str, language: str):
+    return result_cache_key("study_pack", notes_hash(notes_text, language))
+
+def get_cached_study_pack(notes_text: str, language: str = "English"):
+    key = _key(notes_text, language)
+    raw = get_cached_completion(key) if key else None
+    return orjson.loads(raw) if raw is not None else None
+
+def get_cached_part(notes_text: str, language: str, part: str, count: int = None):
+    """
+    One part of a cached pack, cut to `count` items. None if there is no
+    pack or it holds fewer items than asked for.
+    """
+    pack = get_cached_study_pack(notes_text, language)
+    if not pack or part not in pack:
+        return None
+    items = pack[part][PART_ITEMS[part]]
+    if count is not None and part != "tldr":
+        if len(items) < count:
+            return None
+        items = items[:count]
+    print(f"📦 {part} served from cached study pack")
+    return {PART_ITEMS[part]: items}
+
+async def generate_study_pack(
+    notes_text: str,
+    language: str = "English",
+    flashcard_count: int = 5,
+    quiz_count: int = 5,
+    interview_count: int = 5,
+    section_summaries: list[str] = None,
+):
+    """
+    One batched LLM call for all parts; parts it fails to return are
+    generated concurrently with the single-part generators. The model
+    reads the lecture digest (summary tree) rather than the raw notes.
+    """
+    pack = get_cached_study_pack(notes_text, language)
+    if pack and all(part in pack for part in STUDY_PACK_PARTS):
+        return pack
+
+    source = await lecture_digest(notes_text, language, section_summaries)
+    try:
+        pack = await generate_study_pack_llm(source, language, flashcard_count, quiz_count, interview_count)
+    except Exception as e:
+        print(f"⚠️ Study pack call failed, generating parts separately: {e}")
+        pack = {}
+
+    fallbacks = {
+        "tldr": lambda: generate_tldr(source, language),
+        "flashcards": lambda: generate_flashcards(source, language, count=flashcard_count),
+        "quiz": lambda: generate_quiz(source, language, count=quiz_count),
+        "interview": lambda: generate_interview_questions(source, language, count=interview_count),
+    }
+    missing = [part for part in STUDY_PACK_PARTS if part not in pack]
+    if missing:
+        print(f"🔁 Study pack: generating {', '.join(missing)} separately")
+        results = await asyncio.gather(*[fallbacks[part]() for part in missing], return_exceptions=True)
+        for part, result in zip(missing, results):
+            if isinstance(result, dict):
+                pack[part] = result
+            else:
+                print(f"❌ Study pack part '{part}' failed: {result}")
+
+    key = _key(notes_text, language)
+    if key and all(part in pack for part in STUDY_PACK_PARTS):
+        store_completion(key, orjson.dumps(pack).decode("utf-8"))
+    return pack
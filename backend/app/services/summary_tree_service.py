@@ -0,0 +1,90 @@
+"""
+Summary tree: a whole-lecture digest for TLDR and extras.
+
+The generators only read the first EXTRAS_INPUT_TOKENS of their input, so
+for long lectures they used to see the first few sections only. The leaves
+here are per-section digests of the notes the pipeline already produced
+(title, summary and bullet notes); consecutive nodes are merged level by level (one LLM call per
+group of ~SUMMARY_TREE_GROUP_TOKENS) until the top level fits the input
+budget. Cost grows with the number of sections, not the size of the notes,
+and each tree is cached per lecture (hash of its leaves).
+"""
+
+import asyncio
+import hashlib
+import orjson
+from ai_pipeline.chunking.chunker import split_text_by_tokens
+from ai_pipeline.tokens import count_tokens
+from app.core.config import EXTRAS_INPUT_TOKENS, SUMMARY_TREE_GROUP_TOKENS
+from app.services.llm_cache import get_cached_completion, store_completion
+from app.services.llm_service import merge_summaries, result_cache_key
+
+def _key(leaves: list[str], language: str):
+    return result_cache_key("summary_tree", hashlib.sha256(orjson.dumps([leaves, language])).hexdigest())
+
+def _tokens(texts: list[str]) -> int:
+    return sum(count_tokens(text) for text in texts)
+
+def group_nodes(nodes: list[str], group_tokens: int = SUMMARY_TREE_GROUP_TOKENS) -> list[list[str]]:
+    """
+    Consecutive nodes packed into groups of at most ~group_tokens tokens
+    (a single larger node gets a group of its own).
+    """
+    groups, current, used = [], [], 0
+    for node in nodes:
+        tokens = count_tokens(node)
+        if current and used + tokens > group_tokens:
+            groups.append(current)
+            current, used = [], 0
+        current.append(node)
+        used += tokens
+    if current:
+        groups.append(current)
+    return groups
+
+async def build_summary_tree(leaves: list[str], language: str = "English", budget: int = EXTRAS_INPUT_TOKENS) -> list[list[str]]:
+    """
+    Levels of the tree, leaves first; the last level fits `budget` tokens.
+    """
+    key = _key(leaves, language)
+    raw = get_cached_completion(key) if key else None
+    if raw is not None:
+        return orjson.loads(raw)
+
+    levels = [leaves]
+    while _tokens(levels[-1]) > budget:
+        groups = group_nodes(levels[-1])
+        # Size merged nodes so the next level roughly fits the budget
+        target = max(64, min(300, budget // len(groups)))
+        merged = await asyncio.gather(*[
+            merge_summaries(group, language, max_tokens=target) for group in groups
+        ])
+        level = [text.strip() for text in merged if text and text.strip()]
+        if not level or (len(level) == len(levels[-1]) and _tokens(level) >= _tokens(levels[-1])):
+            break
+        levels.append(level)
+
+    print(f"🌳 Summary tree: {len(leaves)} leaves -> {' -> '.join(str(len(level)) for level in levels[1:]) or 'no merge needed'}")
+    if key:
+        store_completion(key, orjson.dumps(levels).decode("utf-8"))
+    return levels
+
+async def lecture_digest(notes_text: str, language: str = "English", section_summaries: list[str] = None) -> str:
+    """
+    Input text for TLDR / extras that covers the whole lecture.
+
+    Notes that fit the budget are used as they are. Longer notes go
+    through the summary tree, built from the section digests or, when
+    the caller has none, from token-sized chunks of the notes.
+    """
+    if count_tokens(notes_text) <= EXTRAS_INPUT_TOKENS:
+        return notes_text
+    leaves = [summary.strip() for summary in (section_summaries or []) if summary and summary.strip()]
+    if not leaves:
+        leaves = split_text_by_tokens(notes_text, SUMMARY_TREE_GROUP_TOKENS)
+    try:
+        levels = await build_summary_tree(leaves, language)
+    except Exception as e:
+        print(f"⚠️ Summary tree failed, using the start of the notes: {e}")
+        return notes_text
+    return "\n\n".join(levels[-1])
@@ -0,0 +1,139 @@
+"""
+Token budgeting for LLM calls.
+
+Groq admits a request against the tokens-per-minute limit using prompt
+tokens + the requested max_tokens, so a 4000-token cap on a "Concise" note
+costs as much quota as a long one even though the model stops early.
+Here:
+- prompt tokens are counted with tiktoken (ai_pipeline.tokens)
+- max_tokens is sized from depth, format, language and item count
+- actual usage is reported per call, per pipeline run and in total
+"""
+
+import contextvars
+from ai_pipeline.tokens import count_tokens
+
+# Role/formatting tokens the API adds per message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Completion tokens for one section note (JSON keys and quotes included)
+NOTES_OUTPUT_TOKENS = {"Concise": 450, "Standard": 800, "Detailed": 1600}
+FORMAT_FACTOR = {"Bullet Points": 1.0, "Paragraphs": 0.9, "Mixed": 1.15}
+CODE_EXTRA_TOKENS = 150
+
+# Per-item completion tokens for the list generators
+FLASHCARD_TOKENS = 90
+QUIZ_QUESTION_TOKENS = 130
+INTERVIEW_QUESTION_TOKENS = 220
+LIST_OVERHEAD_TOKENS = 60
+
+TLDR_TOKENS = 400
+SECTION_METADATA_TOKENS = 150
+CHAT_ANSWER_TOKENS = 700
+
+# Scripts that take noticeably more tokens per word than English
+DENSE_SCRIPT_LANGUAGES = (
+    "hindi", "marathi", "bengali", "tamil", "telugu", "gujarati", "kannada",
+    "malayalam", "punjabi", "urdu", "arabic", "persian", "chinese", "japanese",
+    "korean", "thai", "russian", "ukrainian", "greek", "hebrew",
+)
+
+def depth_level(depth: str) -> str:
+    if "concise" in depth.lower():
+        return "Concise"
+    if "detailed" in depth.lower():
+        return "Detailed"
+    return "Standard"
+
+def format_kind(format_type: str) -> str:
+    if "bullet" in format_type.lower():
+        return "Bullet Points"
+    if "paragraph" in format_type.lower():
+        return "Paragraphs"
+    return "Mixed"
+
+def language_factor(language: str) -> float:
+    language = (language or "English").lower()
+    if language == "english":
+        return 1.0
+    if any(name in language for name in DENSE_SCRIPT_LANGUAGES):
+        return 2.0
+    return 1.3
+
+def count_message_tokens(messages: list[dict]) -> int:
+    return sum(count_tokens(m.get("content") or "") + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+def notes_max_tokens(depth: str, format_type: str = "", language: str = "English", include_code: bool = False) -> int:
+    tokens = NOTES_OUTPUT_TOKENS[depth_level(depth)] * FORMAT_FACTOR[format_kind(format_type)]
+    if include_code:
+        tokens += CODE_EXTRA_TOKENS
+    return int(tokens * language_factor(language))
+
+def list_max_tokens(count: int, per_item: int, language: str = "English") -> int:
+    return int((LIST_OVERHEAD_TOKENS + count * per_item) * language_factor(language))
+
+def text_max_tokens(tokens: int, language: str = "English") -> int:
+    return int(tokens * language_factor(language))
+
+def fit_max_tokens(prompt_tokens: int, max_tokens: int, tokens_per_minute: float) -> int:
+    """
+    Keep prompt + max_tokens under the TPM limit (a larger request is
+    rejected outright), without going below a usable floor.
+    """
+    if not tokens_per_minute:
+        return max_tokens
+    return max(min(max_tokens, int(tokens_per_minute) - prompt_tokens), min(max_tokens, 256))
+
+class UsageCounter:
+    def __init__(self):
+        self.calls = 0
+        self.cached = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.reserved_tokens = 0
+
+    def add(self, prompt_tokens: int, completion_tokens: int, max_tokens: int):
+        self.calls += 1
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.reserved_tokens += max_tokens or 0
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "cached": self.cached,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.prompt_tokens + self.completion_tokens,
+            # Requested max_tokens; the gap to completion_tokens is unused quota
+            "reserved_completion_tokens": self.reserved_tokens,
+        }
+
+_total_usage = UsageCounter()
+_run_usage: contextvars.ContextVar = contextvars.ContextVar("llm_run_usage", default=None)
+
+def track_usage() -> UsageCounter:
+    """
+    Start counting usage for the current task (e.g. one /process-video run).
+    Tasks and threads started afterwards inherit the counter.
+    """
+    counter = UsageCounter()
+    _run_usage.set(counter)
+    return counter
+
+def _counters():
+    run = _run_usage.get()
+    return (_total_usage, run) if run is not None else (_total_usage,)
+
+def record_usage(label: str, prompt_tokens: int, completion_tokens: int, max_tokens: int = None):
+    for counter in _counters():
+        counter.add(prompt_tokens, completion_tokens, max_tokens)
+    cap = f"/{max_tokens}" if max_tokens else ""
+    print(f"🧮 {label}: {prompt_tokens} prompt + {completion_tokens}{cap} completion tokens")
+
+def record_cache_hit():
+    for counter in _counters():
+        counter.cached += 1
+
+def usage_stats() -> dict:
+    return _total_usage.as_dict()
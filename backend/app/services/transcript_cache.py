@@ -0,0 +1,91 @@
+"""
+Persistent transcript cache.
+
+Transcripts are stored on disk keyed by (video_id, language, source), so a
+lecture that was already processed never hits YouTube again until the
+entry expires or is evicted. A per-video pointer remembers the last
+transcript stored so lookups work without knowing the language upfront.
+"""
+
+import orjson
+from ai_pipeline.transcript import Transcript
+from app.core.cache import DiskCache
+from app.core.config import (
+    CACHE_DIR,
+    TRANSCRIPT_CACHE_ENABLED,
+    TRANSCRIPT_CACHE_TTL,
+    TRANSCRIPT_CACHE_MAX_BYTES,
+)
+
+_cache = DiskCache(
+    CACHE_DIR / "transcripts.sqlite3",
+    ttl=TRANSCRIPT_CACHE_TTL,
+    max_bytes=TRANSCRIPT_CACHE_MAX_BYTES,
+    memory_items=32,
+)
+
+def _entry_key(video_id: str, language: str, source: str) -> str:
+    return f"transcript:{video_id}:{language or 'unknown'}:{source}"
+
+def _latest_key(video_id: str) -> str:
+    return f"latest:{video_id}"
+
+def get_cached_transcript(video_id: str, language: str = None, source: str = None):
+    """
+    Return {"language", "source", "transcript"} for a cached video or None,
+    plus "metadata" when it was stored with the transcript.
+    The transcript is returned as a columnar `Transcript`.
+    Without language/source, the most recently stored transcript is used.
+    """
+    if not TRANSCRIPT_CACHE_ENABLED or not video_id or video_id == "unknown":
+        return None
+
+    if language and source:
+        key = _entry_key(video_id, language, source)
+    else:
+        pointer = _cache.get(_latest_key(video_id))
+        if pointer is None:
+            return None
+        key = pointer.decode()
+
+    raw = _cache.get(key)
+    if raw is None:
+        return None
+
+    entry = orjson.loads(raw)
+    if source and entry["source"] != source:
+        return None
+    if language and entry["language"] != language:
+        return None
+
+    columns = entry.pop("columns")
+    entry["transcript"] = Transcript.from_columns(columns["texts"], columns["starts"], columns["ends"])
+    return entry
+
+def store_transcript(video_id: str, language: str, source: str, transcript, metadata: dict = None):
+    """
+    Save a freshly fetched transcript and make it the video's default entry.
+    `metadata` is kept with it, so a cache hit needs no network at all.
+    """
+    if not TRANSCRIPT_CACHE_ENABLED or not video_id or video_id == "unknown" or not transcript:
+        return
+
+    key = _entry_key(video_id, language, source)
+    payload = orjson.dumps({
+        "video_id": video_id,
+        "language": language or "unknown",
+        "source": source,
+        "columns": Transcript.coerce(transcript).to_columns(),
+        **({"metadata": metadata} if metadata else {}),
+    })
+    try:
+        _cache.set(key, payload)
+        _cache.set(_latest_key(video_id), key.encode())
+    except Exception as e:
+        print(f"⚠️ Transcript cache write failed: {e}")
+
+def invalidate_transcript(video_id: str):
+    _cache.delete(_latest_key(video_id))
+
+def transcript_cache_stats() -> dict:
+    return _cache.stats()
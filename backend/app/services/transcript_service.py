@@ -8,19 +8,33 @@ FINAL PIPELINE (production-ready)
 4) Return unified transcript format
 """
 
-import os
-import uuid
-import json
-import glob
 import re
+import orjson
 import requests
 import asyncio
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any
 from youtube_transcript_api import YouTubeTranscriptApi
 from youtube_transcript_api.formatters import JSONFormatter
 import yt_dlp
 from dotenv import load_dotenv
+from ai_pipeline.transcript import Transcript
+from app.core.config import (
+    ACQUIRE_MAX_THREADS,
+    ACQUIRE_YTDLP_THREADS,
+    YTDLP_SOCKET_TIMEOUT,
+    OEMBED_TIMEOUT,
+    YTDLP_METADATA_TIMEOUT,
+    TRANSCRIPT_API_TIMEOUT,
+    YTDLP_CAPTIONS_TIMEOUT,
+    ACQUIRE_HEDGE_MODE,
+    METADATA_HEDGE_DELAY,
+    TRANSCRIPT_HEDGE_DELAY,
+)
+from app.services.transcript_cache import get_cached_transcript, store_transcript
+from app.services.hedging import run_strategies
 
 env_path = Path(__file__).resolve().parents[2] / ".env"
 load_dotenv(env_path)
@@ -29,166 +43,240 @@ def get_video_id(url: str) -> str:
     match = re.search(r"(?:v=|\/)([0-9A-Za-z_-]{11}).*", url)
     return match.group(1) if match else "unknown"
 
+def _oembed_to_metadata(video_id: str, data: dict):
+    return {
+        "video_id": video_id,
+        "title": data.get("title", "YouTube Lecture"),
+        "duration": 0, # oEmbed doesn't provide duration
+        "author": data.get("author_name", "Unknown"),
+        "thumbnail": data.get("thumbnail_url", f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"),
+        "chapters": []
+    }
+
+def _default_metadata(video_id: str):
+    return {
+        "video_id": video_id,
+        "title": "YouTube Lecture",
+        "duration": 0,
+        "author": "Unknown",
+        "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
+        "chapters": []
+    }
+
+def get_metadata_with_ytdlp(url: str):
+    """
+    Full metadata (incl. chapters) via yt-dlp. Blocking, may be IP-blocked.
+    """
+    ydl_opts = {
+        "quiet": True,
+        "skip_download": True,
+        "nocheckcertificate": True,
+        "noplaylist": True,       
+        "extract_flat": False,    
+        "socket_timeout": YTDLP_SOCKET_TIMEOUT,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(url, download=False)
+        
+    chapters = []
+    if info.get("chapters"):
+        for ch in info["chapters"]:
+            chapters.append({
+                "title": ch.get("title", "Chapter"),
+                "start": ch.get("start_time", 0),
+                "end": ch.get("end_time", 0)
+            })
+
+    return {
+        "video_id": info.get("id"),
+        "title": info.get("title", "Untitled Video"),
+        "duration": info.get("duration", 0),
+        "author": info.get("uploader", "Unknown"),
+        "thumbnail": info.get("thumbnail", ""),
+        "chapters": chapters
+    }
+
 def get_video_metadata(url: str):
     video_id = get_video_id(url)
     
     # Strategy 1: oEmbed (Most resilient to IP blocks)
     try:
         oembed_url = f"https://www.youtube.com/oembed?url={url}&format=json"
-        response = requests.get(oembed_url, timeout=5)
+        response = requests.get(oembed_url, timeout=OEMBED_TIMEOUT)
         if response.status_code == 200:
-            data = response.json()
-            return {
-                "video_id": video_id,
-                "title": data.get("title", "YouTube Lecture"),
-                "duration": 0, # oEmbed doesn't provide duration
-                "author": data.get("author_name", "Unknown"),
-                "thumbnail": data.get("thumbnail_url", f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg"),
-                "chapters": []
-            }
+            return _oembed_to_metadata(video_id, response.json())
     except Exception as e:
         print(f"oEmbed failed: {e}")
 
     # Strategy 2: yt-dlp (Fallback, likely to be blocked but has chapters)
     try:
-        ydl_opts = {
-            "quiet": True,
-            "skip_download": True,
-            "nocheckcertificate": True,
-            "noplaylist": True,       
-            "extract_flat": False,    
-        }
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            
-        chapters = []
-        if info.get("chapters"):
-            for ch in info["chapters"]:
-                chapters.append({
-                    "title": ch.get("title", "Chapter"),
-                    "start": ch.get("start_time", 0),
-                    "end": ch.get("end_time", 0)
-                })
-
-        return {
-            "video_id": info.get("id"),
-            "title": info.get("title", "Untitled Video"),
-            "duration": info.get("duration", 0),
-            "author": info.get("uploader", "Unknown"),
-            "thumbnail": info.get("thumbnail", ""),
-            "chapters": chapters
-        }
+        return get_metadata_with_ytdlp(url)
     except Exception as e:
         print(f"yt-dlp metadata failed: {e}")
         
     # Final Fallback
-    return {
-        "video_id": video_id,
-        "title": "YouTube Lecture",
-        "duration": 0,
-        "author": "Unknown",
-        "thumbnail": f"https://img.youtube.com/vi/{video_id}/maxresdefault.jpg",
-        "chapters": []
-    }
+    return _default_metadata(video_id)
 
-def get_captions_with_ytdlp(url: str):
+SUBTITLE_LANGS = ["en", "en-US", "en-orig", "en-GB"]
+
+def _pick_json3_track(info: dict):
     """
-    Download English subtitles using yt-dlp.
-    Converts YouTube JSON3 → transcript format.
+    Find the JSON3 subtitle URL in yt-dlp info.
+    Manual subtitles win over auto-generated ones.
+    Returns (language, url) or (None, None).
     """
+    for key in ("subtitles", "automatic_captions"):
+        tracks = info.get(key) or {}
+        for lang in SUBTITLE_LANGS:
+            for fmt in tracks.get(lang) or []:
+                if fmt.get("ext") == "json3" and fmt.get("url"):
+                    return lang, fmt["url"]
+    return None, None
+
+def iter_json3_segments(raw: bytes):
+    """
+    Yield (text, start, end) tuples from a YouTube JSON3 payload.
+    """
+    data = orjson.loads(raw)
+
+    for event in data.get("events") or ():
+        segs = event.get("segs")
+        if not segs:
+            continue
 
-    file_id = f"subs_{uuid.uuid4()}"
-    output_template = f"{file_id}"
+        text = "".join(seg.get("utf8", "") for seg in segs).strip()
+        if not text:
+            continue
 
+        start = event.get("tStartMs", 0) / 1000
+        duration = event.get("dDurationMs", 0) / 1000
+        yield text, start, start + duration
+
+def parse_json3(raw: bytes) -> Transcript:
+    texts, starts, ends = [], [], []
+    for text, start, end in iter_json3_segments(raw):
+        texts.append(text)
+        starts.append(start)
+        ends.append(end)
+    return Transcript.from_columns(texts, starts, ends)
+
+def get_captions_with_ytdlp_lang(url: str):
+    """
+    Fetch English subtitles using yt-dlp, entirely in memory.
+    Returns (Transcript, language) or (None, None).
+    """
     ydl_opts = {
         "skip_download": True,
-        "writesubtitles": True,
-        "writeautomaticsub": True,
-        "subtitleslangs": ["en", "en-US", "en-orig", "en-GB"],
-        "subtitlesformat": "json3",
-        "outtmpl": output_template,
         "quiet": True,
         "no_warnings": True,
+        "nocheckcertificate": True,
+        "noplaylist": True,
+        "socket_timeout": YTDLP_SOCKET_TIMEOUT,
     }
 
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+            info = ydl.extract_info(url, download=False)
+            language, subtitle_url = _pick_json3_track(info)
+            if not subtitle_url:
+                print("❌ No subtitles found")
+                return None, None
 
-        subtitle_files = glob.glob(f"{file_id}*.json3")
-        if not subtitle_files:
-            print("❌ No subtitles found")
-            return None
+            with ydl.urlopen(subtitle_url) as response:
+                raw = response.read()
 
-        subtitle_file = subtitle_files[0]
+        transcript = parse_json3(raw)
+        if not transcript:
+            return None, None
 
-        with open(subtitle_file, "r") as f:
-            data = json.load(f)
+        return transcript, language
 
-        os.remove(subtitle_file)
+    except Exception as e:
+        print("⚠️ yt-dlp subtitle fetch failed:", e)
+        return None, None
 
-        transcript = []
+def get_captions_with_ytdlp(url: str):
+    """
+    Download English subtitles using yt-dlp.
+    Converts YouTube JSON3 → transcript format.
+    """
+    transcript, _ = get_captions_with_ytdlp_lang(url)
+    return transcript
 
-        for event in data.get("events", []):
-            if "segs" not in event:
-                continue
+def get_transcript_with_api(video_id: str):
+    """
+    Fetch captions via youtube-transcript-api.
+    Returns (Transcript, language_code). Blocking.
+    """
+    api = YouTubeTranscriptApi()
+    if hasattr(api, "list"):
+        transcript_list = api.list(video_id)
+    else:
+        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
 
-            text = "".join(seg.get("utf8", "") for seg in event["segs"])
-            start = event.get("tStartMs", 0) / 1000
-            duration = event.get("dDurationMs", 0) / 1000
+    # Prefer manually created, then auto-generated
+    try:
+        ts = transcript_list.find_manually_created_transcript()
+    except Exception:
+        ts = transcript_list.find_generated_transcript(['en', 'hi', 'es', 'fr', 'de'])
 
-            if text.strip():
-                transcript.append({
-                    "text": text.strip(),
-                    "start": start,
-                    "end": start + duration
-                })
+    data = ts.fetch()
+    if hasattr(data, "to_raw_data"):
+        data = data.to_raw_data()
 
-        if len(transcript) == 0:
-            return None
+    # Format for our needs
+    transcript = Transcript.from_columns(
+        [entry["text"] for entry in data],
+        [entry["start"] for entry in data],
+        [entry["start"] + entry["duration"] for entry in data],
+    )
+    return transcript, getattr(ts, "language_code", None)
 
-        return transcript
+def _lookup_cached_transcript(video_id: str):
+    cached = get_cached_transcript(video_id)
+    if cached:
+        print(f"⚡ Transcript cache hit for {video_id} ({cached['source']}, {cached['language']})")
+    return cached
 
-    except Exception as e:
-        print("⚠️ yt-dlp subtitle fetch failed:", e)
-        return None
+def _store(video_id: str, language: str, source: str, transcript, metadata: dict):
+    # Fallback defaults aren't worth keeping: fetch real metadata next time
+    if metadata == _default_metadata(video_id):
+        metadata = None
+    store_transcript(video_id, language, source, transcript, metadata)
+
+NO_TRANSCRIPT_ERROR = "Could not extract any transcripts for this video. YouTube might be blocking the server or captions are disabled."
 
 def generate_transcript(url: str):
     """
     High-level transcript generation:
+    0. Serve from the local transcript cache if we already have it
+       (metadata included, so a hit makes no network call)
     1. Try youtube-transcript-api (Fastest, most resilient)
     2. Try yt-dlp auto-subs
+    The transcript is a columnar `Transcript`; call .to_dicts() at the API edge.
     """
     video_id = get_video_id(url)
+
+    cached = _lookup_cached_transcript(video_id)
+    if cached:
+        return {
+            "metadata": cached.get("metadata") or get_video_metadata(url),
+            "source": cached["source"],
+            "transcript": cached["transcript"]
+        }
+
     metadata = get_video_metadata(url)
-    
+
     transcript = None
     source = None
+    language = None
 
     # 1. youtube-transcript-api
     try:
         print(f"Attempting youtube-transcript-api for {video_id}...")
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        
-        # Prefer manually created, then auto-generated
-        try:
-            ts = transcript_list.find_manually_created_transcript()
-        except:
-            ts = transcript_list.find_generated_transcript(['en', 'hi', 'es', 'fr', 'de'])
-            
-        data = ts.fetch()
-        
-        # Format for our needs
-        transcript = []
-        for entry in data:
-            transcript.append({
-                "text": entry["text"],
-                "start": entry["start"],
-                "end": entry["start"] + entry["duration"]
-            })
+        transcript, language = get_transcript_with_api(video_id)
         source = "youtube_transcript_api"
         print(f"✅ Successfully fetched transcript via API ({len(transcript)} segments)")
-            
     except Exception as e:
         print(f"youtube-transcript-api failed: {e}")
 
@@ -196,7 +284,7 @@ def generate_transcript(url: str):
     if not transcript:
         try:
             print(f"Falling back to yt-dlp for {video_id}...")
-            transcript = get_captions_with_ytdlp(url)
+            transcript, language = get_captions_with_ytdlp_lang(url)
             if transcript:
                 source = "yt_dlp"
                 print(f"✅ Successfully fetched transcript via yt-dlp ({len(transcript)} segments)")
@@ -205,7 +293,162 @@ def generate_transcript(url: str):
 
     # If all fails, raise a helpful error
     if not transcript:
-        raise Exception("Could not extract any transcripts for this video. YouTube might be blocking the server or captions are disabled.")
+        raise Exception(NO_TRANSCRIPT_ERROR)
+
+    _store(video_id, language, source, transcript, metadata)
+
+    return {
+        "metadata": metadata,
+        "source": source,
+        "transcript": transcript
+    }
+
+# ---------------------------------------------------------------------------
+# Async acquisition layer
+#
+# The functions above block on the network (requests, yt-dlp, youtube-
+# transcript-api). The async versions below are what the API routes use:
+# oEmbed goes through one pooled keep-alive httpx client, blocking libraries
+# run on dedicated thread pools (yt-dlp on its own, so threads abandoned by
+# hedging can't starve the primary strategies), and every call has its own
+# deadline so a slow video can never freeze the event loop or other streams.
+# Fallback chains are hedged (see hedging.py) rather than strictly serial.
+# ---------------------------------------------------------------------------
+
+_http_client = None
+_acquire_pool = ThreadPoolExecutor(max_workers=ACQUIRE_MAX_THREADS, thread_name_prefix="acquire")
+_ytdlp_pool = ThreadPoolExecutor(max_workers=ACQUIRE_YTDLP_THREADS, thread_name_prefix="acquire-ytdlp")
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(OEMBED_TIMEOUT),
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10, keepalive_expiry=60),
+            follow_redirects=True,
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+async def run_blocking(func, *args, timeout: float, pool: ThreadPoolExecutor = None):
+    """
+    Run a blocking call on an acquisition pool with a deadline.
+    The deadline starts when a thread picks the call up, not while it waits
+    in the pool's queue. On timeout the thread is abandoned (yt-dlp can't
+    be cancelled) but the caller gets asyncio.TimeoutError right away; a
+    call cancelled while still queued never runs.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+
+    def call():
+        loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+        return func(*args)
+
+    future = loop.run_in_executor(pool or _acquire_pool, call)
+    try:
+        await asyncio.wait({started, future}, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    return await asyncio.wait_for(future, timeout=timeout)
+
+async def get_oembed_metadata_async(url: str):
+    video_id = get_video_id(url)
+    response = await get_http_client().get(
+        "https://www.youtube.com/oembed",
+        params={"url": url, "format": "json"},
+    )
+    response.raise_for_status()
+    return _oembed_to_metadata(video_id, response.json())
+
+async def _ytdlp_metadata_async(url: str):
+    return await run_blocking(get_metadata_with_ytdlp, url, timeout=YTDLP_METADATA_TIMEOUT, pool=_ytdlp_pool)
+
+async def get_video_metadata_async(url: str):
+    """
+    Non-blocking get_video_metadata: oEmbed / yt-dlp (hedged) -> defaults.
+    """
+    video_id = get_video_id(url)
+
+    strategies = [
+        ("metadata:oembed", lambda: get_oembed_metadata_async(url)),
+        ("metadata:yt_dlp", lambda: _ytdlp_metadata_async(url)),
+    ]
+    try:
+        _, metadata = await run_strategies(
+            strategies, mode=ACQUIRE_HEDGE_MODE, hedge_delay=METADATA_HEDGE_DELAY
+        )
+        return metadata
+    except Exception as e:
+        print(f"All metadata strategies failed: {e!r}")
+
+    return _default_metadata(video_id)
+
+async def _api_transcript_async(video_id: str):
+    transcript, language = await run_blocking(
+        get_transcript_with_api, video_id, timeout=TRANSCRIPT_API_TIMEOUT
+    )
+    return transcript, "youtube_transcript_api", language
+
+async def _ytdlp_transcript_async(url: str):
+    transcript, language = await run_blocking(
+        get_captions_with_ytdlp_lang, url, timeout=YTDLP_CAPTIONS_TIMEOUT, pool=_ytdlp_pool
+    )
+    return transcript, "yt_dlp", language
+
+async def fetch_transcript_async(url: str):
+    """
+    Non-blocking transcript fetch (no metadata, no cache).
+    youtube-transcript-api and yt-dlp are run according to ACQUIRE_HEDGE_MODE.
+    Returns (transcript, source, language).
+    """
+    video_id = get_video_id(url)
+
+    strategies = [
+        ("transcript:youtube_transcript_api", lambda: _api_transcript_async(video_id)),
+        ("transcript:yt_dlp", lambda: _ytdlp_transcript_async(url)),
+    ]
+    try:
+        name, (transcript, source, language) = await run_strategies(
+            strategies,
+            mode=ACQUIRE_HEDGE_MODE,
+            hedge_delay=TRANSCRIPT_HEDGE_DELAY,
+            validate=lambda result: bool(result[0]),
+        )
+    except Exception as e:
+        print(f"All transcript strategies failed for {video_id}: {e!r}")
+        raise Exception(NO_TRANSCRIPT_ERROR)
+
+    print(f"✅ Successfully fetched transcript via {source} ({len(transcript)} segments)")
+    return transcript, source, language
+
+async def generate_transcript_async(url: str):
+    """
+    Non-blocking generate_transcript. Metadata and captions are fetched
+    concurrently since neither depends on the other.
+    """
+    video_id = get_video_id(url)
+
+    cached = _lookup_cached_transcript(video_id)
+    if cached:
+        return {
+            "metadata": cached.get("metadata") or await get_video_metadata_async(url),
+            "source": cached["source"],
+            "transcript": cached["transcript"]
+        }
+
+    metadata, (transcript, source, language) = await asyncio.gather(
+        get_video_metadata_async(url),
+        fetch_transcript_async(url),
+    )
+
+    _store(video_id, language, source, transcript, metadata)
 
     return {
         "metadata": metadata,
@@ -0,0 +1,191 @@
+"""
+Benchmark the embedding backends on lecture sections.
+
+Compares EMBEDDING_BACKEND choices ("torch", "onnx", "onnx-int8") on:
+- throughput: texts/second encoding all sections in batches
+- latency: single chat-query encode, p50 / p95
+- memory: worker RSS after loading the model
+- agreement with the first backend: cosine between the two embeddings of
+  each section, top-1 and top-k overlap when retrieving a section for
+  queries taken from the sections
+
+Each backend runs in its own process, so memory and imports don't mix.
+
+    cd backend
+    python scripts/benchmark_embeddings.py
+    python scripts/benchmark_embeddings.py --sections result.json --backends torch,onnx-int8
+
+--sections takes a JSON list of strings or of sections ({"text": ...}), or
+a saved /process-video result (its "sections").
+"""
+
+import argparse
+import json
+import multiprocessing
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+SAMPLE_SECTIONS = [
+    "A binary search tree keeps every key in the left subtree smaller than the node and every key in the right subtree larger. Search, insert and delete follow one path from the root, so they cost time proportional to the height. If keys arrive in sorted order the tree degenerates into a linked list. Balanced variants such as AVL and red-black trees rotate nodes to keep the height logarithmic.",
+    "Photosynthesis happens in two stages. The light-dependent reactions in the thylakoid membranes split water, release oxygen and produce ATP and NADPH. The Calvin cycle in the stroma uses that ATP and NADPH to fix carbon dioxide into three-carbon sugars. Rubisco, the enzyme that fixes carbon, is slow and sometimes binds oxygen instead.",
+    "Supply and demand set the market price where the quantity buyers want equals the quantity sellers offer. A price ceiling below equilibrium creates a shortage, while a price floor above it creates a surplus. Elasticity measures how strongly quantity responds to a change in price. Goods with close substitutes tend to have elastic demand.",
+    "Gradient descent updates the parameters in the direction opposite to the gradient of the loss. The learning rate controls the step size: too large and training diverges, too small and it crawls. Stochastic gradient descent estimates the gradient on a mini-batch, which is noisy but much cheaper. Momentum and Adam smooth the updates over previous steps.",
+    "The French Revolution began in 1789 with a fiscal crisis and the calling of the Estates-General. The Third Estate declared itself the National Assembly and the storming of the Bastille followed in July. The Declaration of the Rights of Man proclaimed liberty and equality before the law. The monarchy was abolished in 1792 and the Terror followed.",
+    "Newton's second law states that the net force on a body equals its mass times its acceleration. Forces are vectors, so components along each axis are added separately. A free-body diagram lists every force acting on one object. Friction opposes relative motion and is proportional to the normal force.",
+    "TCP provides a reliable, ordered byte stream on top of IP. A three-way handshake opens the connection and sequence numbers let the receiver reorder segments and detect loss. Lost segments are retransmitted after a timeout or three duplicate acknowledgements. Congestion control grows the window slowly and halves it when loss signals congestion.",
+    "Mitosis divides one nucleus into two genetically identical nuclei. During prophase the chromosomes condense and the spindle forms. In metaphase they line up at the cell's equator, and in anaphase the sister chromatids are pulled to opposite poles. Telophase and cytokinesis finish the division into two daughter cells.",
+    "A relational database stores data in tables with typed columns and a primary key per row. Foreign keys link rows across tables, and joins combine them in queries. Normalization removes redundancy by splitting tables until every non-key column depends on the key. Indexes speed up lookups at the cost of slower writes.",
+    "The derivative measures the instantaneous rate of change of a function. It is defined as the limit of the difference quotient as the interval shrinks to zero. The chain rule differentiates a composition by multiplying the outer derivative by the inner one. Setting the derivative to zero finds candidate maxima and minima.",
+    "Supervised learning fits a model on labelled examples and is evaluated on held-out data. Overfitting means the model memorises noise in the training set and generalises poorly. Regularization, more data and early stopping reduce it. Cross-validation estimates performance by rotating the validation fold.",
+    "Inflation is a general rise in prices that reduces the purchasing power of money. Central banks raise interest rates to slow borrowing and spending when inflation is high. Expectations matter: if people expect prices to rise, they demand higher wages, which feeds further inflation. Deflation can be equally harmful because it delays spending.",
+]
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+
+def load_sections(path: str = None, repeat: int = 1) -> list[str]:
+    if not path:
+        return SAMPLE_SECTIONS * repeat
+    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    if isinstance(data, dict):
+        data = data.get("sections") or data.get("data", {}).get("sections") or []
+    texts = [item if isinstance(item, str) else item.get("text", "") for item in data]
+    return [text for text in texts if text.strip()] * repeat
+
+def make_queries(sections: list[str]) -> list[str]:
+    """
+    One query per distinct section: a sentence from its middle.
+    """
+    queries = []
+    for text in dict.fromkeys(sections):
+        sentences = SENTENCE_RE.split(text.strip())
+        queries.append(sentences[len(sentences) // 2])
+    return queries
+
+def rss_mb() -> float:
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_backend(backend: str, sections: list[str], queries: list[str], batch_size: int, rounds: int) -> dict:
+    from app.services.embedding_service import load_model
+
+    rss_before = rss_mb()
+    t0 = time.perf_counter()
+    model = load_model(backend)
+    load_seconds = time.perf_counter() - t0
+
+    def encode(texts, size=batch_size):
+        return model.encode(texts, batch_size=size, convert_to_numpy=True, normalize_embeddings=True, show_progress_bar=False)
+
+    encode(sections[:8])
+
+    best = None
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        section_vectors = encode(sections)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+
+    latencies = []
+    for query in queries:
+        t0 = time.perf_counter()
+        encode([query], size=1)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    latencies.sort()
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "rss_mb": rss_mb(),
+        "model_rss_mb": rss_mb() - rss_before,
+        "texts_per_second": len(sections) / best,
+        "query_p50_ms": statistics.median(latencies),
+        "query_p95_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+        "section_vectors": np.asarray(section_vectors, dtype=np.float32),
+        "query_vectors": np.asarray(encode(queries), dtype=np.float32),
+    }
+
+def _child(backend, sections, queries, batch_size, rounds, results):
+    try:
+        results.put(run_backend(backend, sections, queries, batch_size, rounds))
+    except Exception as e:
+        results.put({"backend": backend, "error": f"{type(e).__name__}: {e}"})
+
+def agreement(reference: dict, result: dict, k: int) -> dict:
+    cosine = np.sum(reference["section_vectors"] * result["section_vectors"], axis=1)
+    ref_top = np.argsort(-(reference["query_vectors"] @ reference["section_vectors"].T), axis=1)[:, :k]
+    top = np.argsort(-(result["query_vectors"] @ result["section_vectors"].T), axis=1)[:, :k]
+    return {
+        "cosine_mean": float(cosine.mean()),
+        "cosine_min": float(cosine.min()),
+        "top1_agreement": float(np.mean(ref_top[:, 0] == top[:, 0])),
+        f"top{k}_overlap": float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ref_top, top)])),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Torch vs ONNX embedding backends")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8", help="comma-separated; the first is the reference")
+    parser.add_argument("--sections", help="JSON file with sections (default: built-in sample)")
+    parser.add_argument("--repeat", type=int, default=20, help="repeat the section list to get a longer run")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    sections = load_sections(args.sections, args.repeat)
+    # First position of each distinct section, in make_queries' order
+    first = {}
+    for i, text in enumerate(sections):
+        first.setdefault(text, i)
+    distinct = list(first)
+    positions = list(first.values())
+    queries = make_queries(sections)
+    print(f"{len(sections)} sections ({len(distinct)} distinct), {len(queries)} queries")
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for backend in [b.strip() for b in args.backends.split(",") if b.strip()]:
+        queue = context.Queue()
+        process = context.Process(target=_child, args=(backend, sections, queries, args.batch_size, args.rounds, queue))
+        process.start()
+        result = queue.get()
+        process.join()
+        if "error" in result:
+            print(f"{backend:>10}: failed ({result['error']})")
+            continue
+        # Retrieval over distinct sections only
+        result["section_vectors"] = result["section_vectors"][positions]
+        results.append(result)
+
+    if not results:
+        sys.exit(1)
+
+    reference = results[0]
+    k = min(args.top_k, len(distinct))
+    print(f"\n{'backend':>10} {'load s':>7} {'RSS MB':>7} {'model MB':>9} {'texts/s':>9} {'speedup':>8} {'p50 ms':>7} {'p95 ms':>7}")
+    for result in results:
+        print(
+            f"{result['backend']:>10} {result['load_seconds']:7.2f} {result['rss_mb']:7.0f} {result['model_rss_mb']:9.0f} "
+            f"{result['texts_per_second']:9.1f} {result['texts_per_second'] / reference['texts_per_second']:7.2f}x "
+            f"{result['query_p50_ms']:7.2f} {result['query_p95_ms']:7.2f}"
+        )
+
+    print(f"\nAgreement with {reference['backend']}:")
+    for result in results[1:]:
+        scores = agreement(reference, result, k)
+        print(f"{result['backend']:>10} " + "  ".join(f"{name} {value:.4f}" for name, value in scores.items()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Offline and isolated: the in-process fake LLM, a throwaway cache
+os.environ.setdefault("LLM_PROVIDERS", "fake")
+os.environ.setdefault("NOTEFLIX_CACHE_DIR", tempfile.mkdtemp(prefix="noteflix-tests-"))
@@ -0,0 +1,77 @@
+import asyncio
+import itertools
+
+import pytest
+
+from app.services.hedging import StrategyStats, get_stats, order_strategies, run_strategies
+
+_names = itertools.count()
+
+def unique(name: str) -> str:
+    # Stats are module-global: keep every test's strategies apart
+    return f"{name}-{next(_names)}"
+
+def returns(value, delay: float = 0.0):
+    async def factory():
+        await asyncio.sleep(delay)
+        return value
+    return factory
+
+def fails(delay: float = 0.0):
+    async def factory():
+        await asyncio.sleep(delay)
+        raise RuntimeError("boom")
+    return factory
+
+def test_stats_cost_penalizes_failures():
+    fast_flaky, slow_reliable = StrategyStats(), StrategyStats()
+    for ok in (True, False, False, False):
+        fast_flaky.record(1.0, ok)
+    slow_reliable.record(2.0, True)
+    assert fast_flaky.success_rate == 0.25
+    assert slow_reliable.expected_cost() < fast_flaky.expected_cost()
+
+def test_lost_attempt_raises_the_latency_floor():
+    stats = StrategyStats()
+    stats.record_lost(5.0)
+    assert stats.attempts == 1 and stats.successes == 0
+    assert stats.ewma_latency == 5.0
+
+def test_sequential_falls_back_in_order():
+    a, b = unique("a"), unique("b")
+    name, result = asyncio.run(run_strategies([(a, fails()), (b, returns("ok"))], mode="sequential"))
+    assert (name, result) == (b, "ok")
+    assert get_stats(a).attempts == 1 and get_stats(a).successes == 0
+
+def test_invalid_results_count_as_failures():
+    a, b = unique("a"), unique("b")
+    name, _ = asyncio.run(run_strategies([(a, returns("")), (b, returns("ok"))], mode="sequential"))
+    assert name == b
+
+def test_all_failing_raises_the_last_error():
+    with pytest.raises(RuntimeError):
+        asyncio.run(run_strategies([(unique("a"), fails()), (unique("b"), fails())], mode="race"))
+
+def test_hedged_slow_primary_is_recorded_and_demoted():
+    slow, fast = unique("slow"), unique("fast")
+    strategies = [(slow, returns("slow", 0.2)), (fast, returns("fast", 0.01))]
+
+    async def rounds():
+        return [await run_strategies(strategies, mode="hedged", hedge_delay=0.01) for _ in range(5)]
+
+    assert {name for name, _ in asyncio.run(rounds())} == {fast}
+    assert get_stats(slow).attempts == 5
+    assert [name for name, _ in order_strategies(strategies)] == [fast, slow]
+
+def test_order_ranks_only_sampled_strategies():
+    a, b, c = unique("a"), unique("b"), unique("c")
+    for _ in range(5):
+        get_stats(a).record(3.0, True)
+        get_stats(c).record(1.0, True)
+    strategies = [(a, None), (b, None), (c, None)]
+    # b has no samples and keeps its slot
+    assert [name for name, _ in order_strategies(strategies)] == [c, b, a]
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        asyncio.run(run_strategies([(unique("a"), returns(1))], mode="parallel"))
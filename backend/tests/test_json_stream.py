@@ -0,0 +1,59 @@
+import pytest
+
+from app.services.json_stream import JSONFieldStream, extract_json_object
+
+def test_extract_from_fenced_output():
+    text = 'Here you go:\n```json\n{"title": "Trees", "items": [1, 2]}\n```'
+    assert extract_json_object(text) == {"title": "Trees", "items": [1, 2]}
+
+def test_extract_skips_invalid_candidates():
+    assert extract_json_object('{not json} then {"ok": true}') == {"ok": True}
+
+def test_extract_braces_inside_strings():
+    assert extract_json_object('{"a": "x } y { z", "b": 1}') == {"a": "x } y { z", "b": 1}
+
+def test_extract_trailing_commas():
+    assert extract_json_object('{"a": [1, 2,], "b": 3,}') == {"a": [1, 2], "b": 3}
+
+def test_extract_repairs_truncated_output():
+    assert extract_json_object('{"title": "Trees", "bullets": ["one", "tw') == {"title": "Trees", "bullets": ["one", "tw"]}
+
+def test_extract_without_object_raises():
+    with pytest.raises(ValueError):
+        extract_json_object("no json here")
+
+NOTES = '```json\n{"title": "A, b", "bullet_notes": ["x", "y\\"z"], "meta": {"k": [1]}, "difficulty": "Beginner"}\n```'
+
+def feed(stream: JSONFieldStream, text: str, size: int) -> list:
+    events = []
+    for i in range(0, len(text), size):
+        events += stream.feed(text[i:i + size])
+    return events
+
+@pytest.mark.parametrize("size", [1, 2, 7, len(NOTES)])
+def test_field_stream_events_do_not_depend_on_chunking(size):
+    assert feed(JSONFieldStream(), NOTES, size) == [
+        ("field", "title", "A, b"),
+        ("item", "bullet_notes", "x"),
+        ("item", "bullet_notes", 'y"z'),
+        ("field", "meta", {"k": [1]}),
+        ("field", "difficulty", "Beginner"),
+    ]
+
+def test_field_stream_ignores_text_after_the_object():
+    stream = JSONFieldStream()
+    stream.feed('{"a": 1}')
+    assert stream.done
+    assert stream.feed(', "b": 2}') == []
+
+BATCH = '{"0": {"title": "A", "bullet_notes": ["x"]}, "1": {"title": "B,}"}}'
+
+@pytest.mark.parametrize("size", [1, 3, len(BATCH)])
+def test_nested_field_stream_reports_inner_fields(size):
+    assert feed(JSONFieldStream(nested=True), BATCH, size) == [
+        ("field", ("0", "title"), "A"),
+        ("item", ("0", "bullet_notes"), "x"),
+        ("field", "0", {"title": "A", "bullet_notes": ["x"]}),
+        ("field", ("1", "title"), "B,}"),
+        ("field", "1", {"title": "B,}"}),
+    ]
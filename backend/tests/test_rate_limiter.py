@@ -0,0 +1,99 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.rate_limiter import AdaptiveRateLimiter, TokenBucket, parse_duration
+
+@pytest.mark.parametrize("value, seconds", [
+    ("7.66s", 7.66),
+    ("2m59.56s", 179.56),
+    ("120ms", 0.12),
+    ("1h", 3600),
+    ("3", 3.0),
+    (None, 0.0),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == pytest.approx(seconds)
+
+def test_bucket_waits_only_when_short():
+    bucket = TokenBucket(60, per_seconds=60)
+    assert bucket.wait_time(60) == 0
+    bucket.consume(60)
+    # 1 token per second
+    assert bucket.wait_time(10) == pytest.approx(10, abs=0.1)
+
+def test_bucket_refund_is_capped_at_capacity():
+    bucket = TokenBucket(100)
+    bucket.consume(30)
+    bucket.refund(50)
+    assert bucket.tokens == pytest.approx(100)
+
+def test_bucket_sync_follows_the_server():
+    bucket = TokenBucket(1000)
+    bucket.sync(limit=600, remaining=0, reset=6.0)
+    assert bucket.capacity == 600
+    # Empty until the window resets
+    assert bucket.wait_time(1) == pytest.approx(6.0, abs=0.1)
+
+def test_release_refund_returns_the_budget():
+    async def scenario():
+        limiter = AdaptiveRateLimiter(rpm=30, tpm=6000)
+        await limiter.acquire(1000)
+        assert limiter.in_flight == 1
+        await limiter.release(False, refund_tokens=1000)
+        return limiter
+    limiter = asyncio.run(scenario())
+    assert limiter.in_flight == 0
+    assert limiter.requests.tokens == pytest.approx(30, abs=0.01)
+    assert limiter.tokens.tokens == pytest.approx(6000, abs=1)
+
+def test_release_without_refund_keeps_the_spend():
+    async def scenario():
+        limiter = AdaptiveRateLimiter(rpm=30, tpm=6000)
+        await limiter.acquire(1000)
+        await limiter.release(False)
+        return limiter
+    limiter = asyncio.run(scenario())
+    assert limiter.tokens.tokens == pytest.approx(5000, abs=1)
+
+def test_aimd_concurrency():
+    async def scenario():
+        limiter = AdaptiveRateLimiter(rpm=1000, tpm=10**6, max_concurrency=8, initial_concurrency=4)
+        for _ in range(4):
+            await limiter.acquire()
+            await limiter.release(True)
+        return limiter
+    limiter = asyncio.run(scenario())
+    # +1 slot per `limit` successes
+    assert limiter.limit == 5
+    limiter.on_rate_limited(1.0)
+    assert limiter.limit == 2
+    limiter.on_rate_limited(1.0)
+    limiter.on_rate_limited(1.0)
+    assert limiter.limit == limiter.min_concurrency
+
+def test_acquire_respects_the_concurrency_limit():
+    async def scenario():
+        limiter = AdaptiveRateLimiter(rpm=1000, tpm=10**6, initial_concurrency=2)
+        await limiter.acquire()
+        await limiter.acquire()
+        third = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+        blocked = not third.done()
+        await limiter.release()
+        await asyncio.wait_for(third, 1)
+        return blocked, limiter.in_flight
+    assert asyncio.run(scenario()) == (True, 2)
+
+def test_headers_block_when_requests_run_out():
+    limiter = AdaptiveRateLimiter(rpm=30, tpm=6000)
+    limiter.update_from_headers({
+        "x-ratelimit-limit-tokens": "6000",
+        "x-ratelimit-remaining-tokens": "2500",
+        "x-ratelimit-remaining-requests": "0",
+        "x-ratelimit-reset-requests": "2m",
+    })
+    assert limiter.tokens.tokens <= 2500
+    assert limiter.stats()["tokens_available"] <= 2500
+    assert limiter.blocked_until - time.monotonic() == pytest.approx(120, abs=1)
@@ -0,0 +1,39 @@
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.llm import Flashcards, InterviewQuestions, Quiz, SectionNotes
+
+OPTIONS = ["Red", "Blue", "Green", "Yellow"]
+
+@pytest.mark.parametrize("answer", ["Blue", "blue ", "B", "b) Blue", "(B)", 1, "1"])
+def test_quiz_answer_becomes_the_option_text(answer):
+    quiz = Quiz.model_validate({"quiz": [{"question": "Sky?", "options": OPTIONS, "answer": answer}]})
+    assert quiz.quiz[0].answer == "Blue"
+
+def test_quiz_drops_invalid_questions():
+    quiz = Quiz.model_validate({"quiz": [
+        {"question": "Sky?", "options": OPTIONS, "answer": "Purple"},
+        {"question": "Grass?", "options": OPTIONS, "answer": 2},
+        {"question": "No options"},
+    ]})
+    assert [q.question for q in quiz.quiz] == ["Grass?"]
+
+def test_list_with_no_valid_item_still_fails():
+    with pytest.raises(ValidationError):
+        Flashcards.model_validate({"flashcards": [{"front": "x"}]})
+
+def test_non_string_answers_are_text():
+    cards = Flashcards.model_validate({"flashcards": [{"question": "One?", "answer": 1}, {"question": "Missing"}]})
+    assert [(c.question, c.answer) for c in cards.flashcards] == [("One?", "1")]
+    questions = InterviewQuestions.model_validate({"questions": [{"question": "Why?", "answer": ["Because", "so"]}]})
+    assert questions.questions[0].answer == "Because\n\nso"
+
+def test_section_notes_are_lenient():
+    notes = SectionNotes.model_validate({
+        "explanation": ["First.", "Second."],
+        "examples": [{"input": "2", "output": "4"}],
+        "difficulty": None,
+    })
+    assert notes.explanation == "First.\n\nSecond."
+    assert notes.examples == ["2 - 4"]
+    assert notes.difficulty == "Intermediate"
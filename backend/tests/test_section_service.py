@@ -0,0 +1,24 @@
+from ai_pipeline.transcript import Transcript
+from app.services.section_service import split_transcript_by_chapters
+
+CHAPTERS = [
+    {"title": "Intro", "start": 0, "end": 100},
+    {"title": "Main", "start": 100, "end": 199},
+]
+
+def captions_to(count: int) -> Transcript:
+    # Segment i spans [2i, 2i + 2.5]: the last one ends at 200.5
+    starts = [i * 2.0 for i in range(count)]
+    return Transcript.from_columns([f"w{i}" for i in range(count)], starts, [s + 2.5 for s in starts])
+
+def words(sections) -> list[str]:
+    return [word for section in sections for word in section["text"].split()]
+
+def test_chapters_keep_captions_past_the_last_chapter():
+    sections = split_transcript_by_chapters(captions_to(100), CHAPTERS)
+    assert words(sections) == [f"w{i}" for i in range(100)]
+    assert [s["end"] for s in sections] == [100, 199]
+
+def test_selection_before_the_end_stays_closed():
+    sections = split_transcript_by_chapters(captions_to(100), CHAPTERS[:1], open_end=False)
+    assert words(sections) == [f"w{i}" for i in range(50)]
@@ -236,6 +236,8 @@ function NotesPageContent() {
     interview: null
   });
   const [processingStatus, setProcessingStatus] = useState("");
+  // One /generate-study-pack request per set of notes, shared by the extras
+  const studyPackRef = useRef<{ notesText: string, pack: Promise<any> } | null>(null);
 
   const [flashcardIndex, setFlashcardIndex] = useState(0);
 
@@ -391,11 +393,31 @@ function NotesPageContent() {
 
         localStorage.setItem("noteflix_data", JSON.stringify(currentData));
 
+        // Sections still streaming aren't stored; keep showing them
+        prevData?.notes?.forEach((n: any, i: number) => {
+          if (n?.partial && !currentData.notes[i]) currentData.notes[i] = n;
+        });
+
         setLoading(false);
         return { ...currentData };
       });
     };
 
+    const handleNoteDelta = (e: CustomEvent) => {
+      const { note, index } = e.detail;
+      setData((prevData: any) => {
+        if (!prevData?.notes) return prevData;
+        const current = prevData.notes[index];
+        if (current && !current.partial) return prevData;
+        const notes = [...prevData.notes];
+        while (notes.length <= index) {
+          notes.push(null);
+        }
+        notes[index] = note;
+        return { ...prevData, notes };
+      });
+    };
+
     const handleNotesUpdate = async (e: CustomEvent) => {
       const completeData = e.detail;
       setData(completeData);
@@ -426,6 +448,7 @@ function NotesPageContent() {
 
     window.addEventListener("sectionsReady", handleSectionsReady as unknown as EventListener);
     window.addEventListener("noteStreamed", handleNoteStreamed as unknown as EventListener);
+    window.addEventListener("noteDelta", handleNoteDelta as unknown as EventListener);
     window.addEventListener("notesUpdated", handleNotesUpdate as unknown as EventListener);
     window.addEventListener("processingStatus", handleProcessingStatus as unknown as EventListener);
 
@@ -461,6 +484,7 @@ function NotesPageContent() {
       if (timeout) clearTimeout(timeout);
       window.removeEventListener("sectionsReady", handleSectionsReady as unknown as EventListener);
       window.removeEventListener("noteStreamed", handleNoteStreamed as unknown as EventListener);
+      window.removeEventListener("noteDelta", handleNoteDelta as unknown as EventListener);
       window.removeEventListener("notesUpdated", handleNotesUpdate as unknown as EventListener);
       window.removeEventListener("processingStatus", handleProcessingStatus as unknown as EventListener);
     };
@@ -485,7 +509,8 @@ function NotesPageContent() {
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           question: userMessage,
-          transcript: data?.transcript || []
+          transcript: data?.transcript || [],
+          video_id: data?.metadata?.video_id
         }),
       });
 
@@ -617,13 +642,21 @@ function NotesPageContent() {
       }
 
       const notesText = data.notes
-        .filter((n: any) => n)
+        .filter((n: any) => n && !n.partial)
         .map((n: any) =>
           `${n.title}\n${n.notes.explanation}\n${n.notes.bullet_notes.join("\n")}`
         ).join("\n\n");
 
       const language = data.metadata.language || "English";
 
+      // Leaves of the backend's summary tree (whole-lecture coverage)
+      const sectionSummaries = data.notes
+        .filter((n: any) => n && !n.partial)
+        .map((n: any) => [
+          n.summary ? `${n.title}: ${n.summary}` : n.title,
+          ...(n.notes?.bullet_notes || []).map((point: string) => `- ${point}`)
+        ].join("\n"));
+
       let existingItems: string[] = [];
       if (extras[type]) {
         if (type === "quiz") {
@@ -637,7 +670,39 @@ function NotesPageContent() {
 
       const seed = force ? Math.floor(Math.random() * 1000) : 0;
 
-      const count = type === "flashcards" && data.sections ? data.sections.length : 5;
+      const flashcardCount = data.sections ? data.sections.length : 5;
+      const count = type === "flashcards" ? flashcardCount : 5;
+
+      // First load: all extras come from one batched study pack call
+      if (!extras[type]) {
+        let studyPack = studyPackRef.current;
+        if (!studyPack || studyPack.notesText !== notesText) {
+          const pack = fetch(`${API_URL}/generate-study-pack`, {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({
+              notes_text: notesText,
+              language,
+              flashcard_count: flashcardCount,
+              quiz_count: 5,
+              interview_count: 5,
+              section_summaries: sectionSummaries
+            }),
+          }).then((r) => (r.ok ? r.json() : null)).catch(() => null);
+          studyPack = { notesText, pack };
+          studyPackRef.current = studyPack;
+        }
+        const pack = await studyPack.pack;
+        if (pack && pack[type]) {
+          setExtras((prev: any) => ({
+            quiz: prev.quiz || pack.quiz || null,
+            flashcards: prev.flashcards || pack.flashcards || null,
+            interview: prev.interview || pack.interview || null
+          }));
+          if (type === "flashcards") setFlashcardIndex(0);
+          return;
+        }
+      }
 
       const response = await fetch(`${API_URL}/generate-${type}`, {
         method: "POST",
@@ -647,7 +712,8 @@ function NotesPageContent() {
           language,
           seed,
           count,
-          existing_items: existingItems
+          existing_items: existingItems,
+          section_summaries: sectionSummaries
         }),
       });
 
@@ -912,7 +978,7 @@ function NotesPageContent() {
     if (data.metadata?.title) html += `<h1>${data.metadata.title}</h1>`;
 
     data.notes?.forEach((section: any) => {
-      if (!section) return;
+      if (!section || section.partial) return;
 
       html += `<h2>${section.title}</h2>`;
       if (section.notes.explanation) {
@@ -1338,8 +1404,14 @@ function NotesPageContent() {
                                 return (
                                   <div key={idx}>
                                     <h2 className="text-3xl font-bold text-foreground mb-4 pb-2 border-b-2 border-purple-200/30">
-                                      {section.title}
+                                      {section.title || `Chapter ${idx + 1}`}
                                     </h2>
+                                    {section.partial && (
+                                      <p className="text-sm text-purple-500/80 mb-4 font-medium flex items-center gap-2">
+                                        <Sparkles size={14} className="animate-pulse" />
+                                        Generating notes...
+                                      </p>
+                                    )}
                                     <div className="text-foreground/80 mb-6 leading-relaxed text-lg">
                                       <NoteContent text={String(section.notes.explanation)} videoId={videoId} />
                                     </div>
@@ -1377,7 +1449,7 @@ function NotesPageContent() {
                               <p className="text-foreground-muted">Generating quiz...</p>
                             </div>
                           ) : (
-                            <div onClick={() => generateExtra("quiz", true)} className="cursor-pointer group hover:bg-card/80 transition p-6 rounded-xl">
+                            <div onClick={() => generateExtra("quiz")} className="cursor-pointer group hover:bg-card/80 transition p-6 rounded-xl">
                               <FileQuestion className="text-purple-400 group-hover:text-purple-600 transition mx-auto mb-2" size={42} />
                               <p className="text-foreground-muted group-hover:text-purple-700">Click to generate quiz</p>
                             </div>
@@ -1421,7 +1493,7 @@ function NotesPageContent() {
                               <p className="text-foreground-muted">Generating flashcards...</p>
                             </div>
                           ) : (
-                            <div onClick={() => generateExtra("flashcards", true)} className="cursor-pointer group hover:bg-card/80 transition p-6 rounded-xl">
+                            <div onClick={() => generateExtra("flashcards")} className="cursor-pointer group hover:bg-card/80 transition p-6 rounded-xl">
                               <FileText className="text-purple-400 group-hover:text-purple-600 transition mx-auto mb-2" size={42} />
                               <p className="text-foreground-muted group-hover:text-purple-700">Click to generate flashcards</p>
                             </div>
@@ -1461,7 +1533,7 @@ function NotesPageContent() {
                               <p className="text-foreground-muted">Generating interview questions...</p>
                             </div>
                           ) : (
-                            <div onClick={() => generateExtra("interview", true)} className="cursor-pointer group hover:bg-card/80 transition p-6 rounded-xl">
+                            <div onClick={() => generateExtra("interview")} className="cursor-pointer group hover:bg-card/80 transition p-6 rounded-xl">
                               <MessageSquare className="text-purple-400 group-hover:text-purple-600 transition mx-auto mb-2" size={42} />
                               <p className="text-foreground-muted group-hover:text-purple-700">Click to generate interview preparation</p>
                             </div>
@@ -1508,10 +1580,14 @@ function QuizQuestion({ index, data }: any) {
     setShowAnswer(true);
   };
 
+  // "answer" is the correct option's text (older quizzes: its letter)
+  const answerIndex = data.options.indexOf(data.answer);
+  const correctLabel = answerIndex >= 0 ? String.fromCharCode(65 + answerIndex) : data.answer;
+
   const getOptionClass = (opt: string) => {
     if (!showAnswer) return "bg-muted/50 border-border hover:bg-muted text-foreground/80";
-    if (opt === data.answer) return "bg-green-500/10 border-green-500 text-green-600 font-medium";
-    if (selected === opt && opt !== data.answer) return "bg-red-500/10 border-red-500 text-red-600";
+    if (opt === correctLabel) return "bg-green-500/10 border-green-500 text-green-600 font-medium";
+    if (selected === opt && opt !== correctLabel) return "bg-red-500/10 border-red-500 text-red-600";
     return "bg-muted/20 border-border text-foreground-muted opacity-60";
   };
 
@@ -1537,9 +1613,9 @@ function QuizQuestion({ index, data }: any) {
               className={`w-full text-left p-4 rounded-xl border transition-all flex items-center gap-3 ${getOptionClass(label)}`}
             >
               <span className={`w-8 h-8 rounded-full border flex items-center justify-center shrink-0 text-sm font-semibold transition-colors
-                ${showAnswer && label === data.answer
+                ${showAnswer && label === correctLabel
                   ? "bg-green-500 border-green-500 text-white"
-                  : showAnswer && selected === label && label !== data.answer
+                  : showAnswer && selected === label && label !== correctLabel
                     ? "bg-red-500 border-red-500 text-white"
                     : "border-border text-foreground-muted bg-muted/30"
                 }
@@ -1547,8 +1623,8 @@ function QuizQuestion({ index, data }: any) {
                 {label}
               </span>
               <span className="flex-1">{cleanOpt}</span>
-              {showAnswer && label === data.answer && <CheckCircle2 size={20} className="text-green-600" />}
-              {showAnswer && selected === label && label !== data.answer && <XCircle size={20} className="text-red-600" />}
+              {showAnswer && label === correctLabel && <CheckCircle2 size={20} className="text-green-600" />}
+              {showAnswer && selected === label && label !== correctLabel && <XCircle size={20} className="text-red-600" />}
             </button>
           )
         })}
@@ -122,6 +122,8 @@ export default function ProcessPage() {
       const reader = response.body.getReader();
       const decoder = new TextDecoder();
       let buffer = "";
+      // Sections being generated, built up from note_delta events
+      const partialNotes: Record<number, any> = {};
 
       while (true) {
         const { done, value } = await reader.read();
@@ -164,6 +166,27 @@ export default function ProcessPage() {
               window.dispatchEvent(new CustomEvent("metadataReady", { detail: { metadata: event.metadata, transcript: event.transcript } }));
             }
 
+            if (event.status === "note_delta") {
+              const note = partialNotes[event.index] || (partialNotes[event.index] = {
+                title: "",
+                summary: "",
+                partial: true,
+                notes: { explanation: "", bullet_notes: [], examples: [], key_concepts: [], difficulty: "" }
+              });
+              const target = event.field === "title" || event.field === "summary" ? note : note.notes;
+              if (event.kind === "item") {
+                target[event.field] = [...(target[event.field] || []), event.value];
+              } else {
+                target[event.field] = event.value;
+              }
+              window.dispatchEvent(new CustomEvent("noteDelta", {
+                detail: {
+                  note: { ...note, notes: { ...note.notes } },
+                  index: event.index
+                }
+              }));
+            }
+
             if (event.status === "note_ready" && event.note) {
               const currentData = JSON.parse(localStorage.getItem("noteflix_data") || "{}");
               if (!currentData.notes) currentData.notes = [];